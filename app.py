@@ -4,7 +4,7 @@
 
 
 from flask import Flask, render_template, jsonify, request, Response, abort, redirect, url_for
-from pymongo import MongoClient, DESCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from flask_caching import Cache
 import csv
 import io
@@ -18,8 +18,18 @@ import os
 from pymongo import MongoClient, DESCENDING
 from pymongo.errors import PyMongoError
 from map_utils import power_plants, compute_top5_for
-from map_utils import power_plants, compute_top5_for, generate_topsis_map_html
-from utils import export_csv, upload_csv
+from map_utils import power_plants, compute_top5_for, get_scores
+from map_utils import topsis_payload, plant_geojson, current_sector, evacuation_payload, exposure_payload
+from map_utils import mapping_codes, scenario_payload, stab_map, korean_to_category, mcda_payload
+import mcda
+from topsis_engine import COMBINE
+from geodata import GEOMETRY_LEVELS, level_for_zoom
+import shelters
+import mongo_indexes
+import downsample
+import rollups
+import latest
+from utils import export_csv, upload_csv, keyset_page, page_args
 from chatbot_utils import get_best_match
 from flask import abort
 import numpy as np
@@ -85,6 +95,9 @@ analysis2_collection = FNC_collection    # ← 여기가 핵심!
 analysis3_collection = KAERI_collection
 analysis4_collection = RMT_collection
 
+# 라우트 조회용 인덱스 보장 — ENSURE_MONGO_INDEXES=1일 때만 (배포 시: python mongo_indexes.py --ensure)
+mongo_indexes.ensure_indexes_on_startup(db)
+
 # 로깅 설정
 class ColoredFormatter(logging.Formatter):
     COLORS = {
@@ -208,6 +221,24 @@ def reject_user(user_id):
 # ---------------------------------------------------------------------
 # 라우터 설정
 # ---------------------------------------------------------------------
+# 최신값 응답: 내용 해시를 ETag로 달고, If-None-Match가 같으면 본문 없이 304
+def conditional_json(data):
+    response = jsonify(data)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+# 전체 발전소 최신 기상 (latest.NPP_weather_latest 점 조회, {genName: 문서})
+@app.route('/api/data/latest', methods=['GET'])
+def get_latest_weather_all():
+    try:
+        latest.refresh_if_stale(db, backup_collection.name)
+        docs = latest.read(db, backup_collection.name)
+        return conditional_json({doc.pop('_id'): doc for doc in docs})
+    except Exception as e:
+        logging.error(f"Error fetching latest weather data: {e}")
+        return jsonify({"error": "An error occurred while fetching the data"}), 500
+
 # 최신 기상 데이터 조회 (genName 기준으로)
 @app.route('/api/data/<genName>/latest', methods=['GET'])
 def get_latest_weather_data(genName):
@@ -215,10 +246,11 @@ def get_latest_weather_data(genName):
     logging.info(f"Received request for latest data for genName: {normalized_genName}")
 
     try:
-        data =backup_collection.find_one({"genName": normalized_genName}, {"_id": 0}, sort=[("time", DESCENDING)])
+        latest.refresh_if_stale(db, backup_collection.name)
+        data = latest.read_one(db, backup_collection.name, normalized_genName, {"_id": 0})
         if data:
             logging.info(f"Latest data found: {data}")
-            return jsonify(data)
+            return conditional_json(data)
         else:
             logging.warning(f"No latest data found for genName: {normalized_genName}")
             return jsonify({"error": "No data found for this genName"}), 404
@@ -243,13 +275,26 @@ def get_filtered_weather_data(genName):
             end_time_str = end_date_obj.strftime("%Y-%m-%d 00:00")
             query["time"] = {"$gte": start_time_str, "$lt": end_time_str}
 
-        data = list(backup_collection.find(query, {"_id": 0}).sort("time", DESCENDING))
+        # ?resolution=hour|day: 시간별/일별 집계 (시간 오름차순, <필드>_min/_max/_mean/_count)
+        resolution = request.args.get('resolution', 'raw')
+        if resolution != 'raw':
+            start, end = history_range(request.args)
+            resolution = history_resolution(backup_collection.name, resolution, start, end, None)
+            if resolution:
+                return jsonify(rollups.read(db, backup_collection.name, resolution,
+                                            {"genName": normalized_genName}, start, end))
+        limit, after, fields, paged = page_args(request.args)
+        data, next_token = keyset_page(backup_collection, query, DESCENDING, limit, after, fields)
+        if paged:
+            return jsonify({"items": data, "next": next_token, "limit": limit})
         if data:
             logging.info(f"Returning {len(data)} records for genName: {normalized_genName}")
             return jsonify(data)
         else:
             logging.warning(f"No data found for genName: {normalized_genName} with given date range.")
             return jsonify({"error": "No data found for this genName"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Error in get_filtered_weather_data: {e}")
         return jsonify({"error": "An error occurred while fetching the data"}), 500
@@ -298,7 +343,9 @@ def get_busan_radiation_data():
 @app.route('/api/busan_radiation/latest', methods=['GET'])
 def get_latest_radiation_data():
     try:
-        latest_data = list(busan_radiation_collection.find({}, {"_id": 0}).sort("time", DESCENDING))
+        # 측정소(locNm)별 최신값 문서 (latest.Busan_radiation_latest)
+        latest.refresh_if_stale(db, busan_radiation_collection.name)
+        latest_data = latest.read(db, busan_radiation_collection.name, {"_id": 0})
         data = []
         for item in latest_data:
             data.append({
@@ -310,7 +357,7 @@ def get_latest_radiation_data():
                 "longitude": item.get("lng")
             })
 
-        return jsonify(data)
+        return conditional_json(data)
     except Exception as e:
         logging.error(f"Error fetching latest radiation data: {e}")
         return jsonify({"error": "Failed to fetch latest radiation data"}), 500
@@ -327,16 +374,27 @@ def radiation_history():
         return jsonify({"error": "locNm parameter is required"}), 400
 
     try:
-        history_data = list(busan_radiation_backup_collection.find({"locNm": locNm}).sort("time", DESCENDING))
-
-        for item in history_data:
-            item['_id'] = str(item['_id'])
+        # ?resolution=hour|day[&start=&end=]: 시간별/일별 집계 (시간 오름차순, min/max/mean/count)
+        resolution = request.args.get('resolution', 'raw')
+        if resolution != 'raw':
+            start, end = history_range(request.args)
+            resolution = history_resolution(busan_radiation_backup_collection.name, resolution, start, end, None)
+            if resolution:
+                return jsonify(rollups.read(db, busan_radiation_backup_collection.name, resolution,
+                                            {"locNm": locNm}, start, end))
+        limit, after, fields, paged = page_args(request.args)
+        history_data, next_token = keyset_page(busan_radiation_backup_collection, {"locNm": locNm},
+                                               DESCENDING, limit, after, fields, with_id=True)
+        if paged:
+            return jsonify({"items": history_data, "next": next_token, "limit": limit})
 
         if history_data:
             return jsonify(history_data)
         else:
             return jsonify({"error": f"No data found for location {locNm}"}), 404
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": "An error occurred while fetching the data", "details": str(e)}), 500
 
@@ -351,30 +409,28 @@ def get_nuclear_radiation_data():
         query['genName'] = genName
     if date:
         start_time_str = f"{date} 00:00"
-        end_date_obj = parser.parse(date) + datetime.timedelta(days=1)
+        end_date_obj = parser.parse(date) + timedelta(days=1)
         end_time_str = end_date_obj.strftime("%Y-%m-%d 00:00")
         query['time'] = {'$gte': start_time_str, '$lt': end_time_str}
 
-    data = list(nuclear_radiation_collection.find(query, {"_id": 0}).sort("time", DESCENDING))
+    try:
+        limit, after, fields, paged = page_args(request.args)
+        data, next_token = keyset_page(nuclear_radiation_collection, query, DESCENDING, limit, after, fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if paged:
+        return jsonify({"items": data, "next": next_token, "limit": limit})
     return jsonify(data)
 
 # 최신 방사선 데이터를 제공하는 API
 @app.route('/api/nuclear_radiation/latest', methods=['GET'])
 def get_latest_nuclear_radiation_data():
     try:
-        latest_data = list(nuclear_radiation_collection.aggregate([
-            {"$sort": {"time": -1}},
-            {"$group": {
-                "_id": "$genName",
-                "genName": {"$first": "$genName"},
-                "expl": {"$first": "$expl"},
-                "time": {"$first": "$time"},
-                "value": {"$first": "$value"},
-                "lat": {"$first": "$lat"},
-                "lng": {"$first": "$lng"}
-            }}
-        ]))
-        return jsonify(latest_data)
+        # 발전소(genName)별 최신값 문서 (latest.nuclear_radiation_latest, _id = genName)
+        latest.refresh_if_stale(db, nuclear_radiation_collection.name)
+        latest_data = latest.read(db, nuclear_radiation_collection.name,
+                                  {"genName": 1, "expl": 1, "time": 1, "value": 1, "lat": 1, "lng": 1})
+        return conditional_json(latest_data)
     except Exception as e:
         logging.error(f"Error fetching latest nuclear radiation data: {e}")
         return jsonify({"error": "Failed to fetch latest radiation data"}), 500
@@ -497,6 +553,65 @@ def get_highest_radiation_by_plant():
         return jsonify({"error": "An error occurred while fetching the data"}), 500
 
 
+# 이력 기간: ?start=YYYY-MM-DD&end=YYYY-MM-DD (끝 날짜 포함)
+def history_range(args):
+    """반환: ('YYYY-MM-DD 00:00' 또는 None, 끝 다음 날 'YYYY-MM-DD 00:00' 또는 None)"""
+    start, end = args.get('start'), args.get('end')
+    start = f"{parser.parse(start):%Y-%m-%d} 00:00" if start else None
+    end = f"{parser.parse(end) + timedelta(days=1):%Y-%m-%d} 00:00" if end else None
+    return start, end
+
+
+def history_resolution(source, resolution, start, end, points):
+    """
+    resolution: auto | raw | hour | day → 읽을 집계 해상도 (None이면 원본)
+    auto는 기간과 points가 모두 있을 때 버킷이 points개 이상인 가장 굵은 집계, 집계가 아직 없으면 원본
+    """
+    if resolution not in ('auto', 'raw', *rollups.RESOLUTIONS):
+        raise ValueError(f"resolution must be one of {['auto', 'raw', *rollups.RESOLUTIONS]}")
+    if resolution == 'raw' or not rollups.available(db, source):
+        if resolution in rollups.RESOLUTIONS:
+            raise ValueError(f"{source} rollups have not been built (python rollups.py)")
+        return None
+    if resolution == 'auto':
+        if not (points and start and end):
+            return None
+        resolution = rollups.pick_resolution(parser.parse(start), parser.parse(end), points)
+    if resolution:
+        rollups.refresh_if_stale(db, source)
+    return resolution
+
+
+# 차트용 이력: ?points=N[&method=lttb|minmax][&start=...&end=...][&resolution=auto|raw|hour|day]
+# 집계(rollups)에서 읽을 수 있으면 집계의 mean을 value로 쓰고, points가 있으면 그 결과를 다운샘플
+# (컬렉션, 발전소, 측정 지점, 기간, N, 방식, 해상도)별로 downsample.TTL_SECONDS 동안 캐시
+def downsampled_history(collection, genName, expl, args):
+    """points/resolution 인자가 없으면 None, 있으면 시간순 목록 — 잘못된 인자는 ValueError"""
+    points = args.get('points', type=int)
+    if points is None and args.get('resolution') in (None, 'raw'):
+        return None
+    method = args.get('method', 'lttb')
+    if points is not None and (method not in downsample.METHODS or not 3 <= points <= downsample.MAX_POINTS):
+        raise ValueError(f"points must be 3..{downsample.MAX_POINTS} and method one of {list(downsample.METHODS)}")
+    start, end = history_range(args)
+    resolution = history_resolution(collection.name, args.get('resolution', 'auto'), start, end, points)
+    if points is None and resolution is None:
+        return None
+    match = {'genName': genName, 'expl': expl}
+
+    def compute():
+        if resolution:
+            docs = rollups.read(db, collection.name, resolution, match, start, end)
+        else:
+            query = dict(match)
+            if start or end:
+                query['time'] = {k: v for k, v in (('$gte', start), ('$lt', end)) if v}
+            docs = list(collection.find(query, {'_id': 0, 'time': 1, 'value': 1}).sort('time', 1))
+        return downsample.downsample(docs, points, method) if points else docs
+
+    key = (collection.name, genName, expl, start, end, points, method, resolution)
+    return downsample.cached(key, compute)
+
 # 과거 방사선 데이터를 가져오는 API
 @app.route('/api/nuclear_radiation/history', methods=['GET'])
 def get_radiation_history():
@@ -519,13 +634,18 @@ def get_radiation_history():
         mapped_genName = genName
 
     try:
+        sampled = downsampled_history(nuclear_radiation_collection, mapped_genName, expl, request.args)
+        if sampled is not None:
+            return jsonify(sampled)
         history_data = list(nuclear_radiation_collection.find(
             {'genName': mapped_genName, 'expl': expl},
             {'_id': 0, 'time': 1, 'value': 1}
         ).sort('time', 1))
 
-        logging.info(f"Fetched history data: {history_data}")  # 여기에 로그 추가
+        logging.info(f"Fetched {len(history_data)} history records")  # 여기에 로그 추가
         return jsonify(history_data)
+    except (ValueError, OverflowError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Error fetching history data for {genName}, {expl}: {e}")
         return jsonify({"error": "Failed to fetch radiation history data"}), 500
@@ -553,18 +673,32 @@ def get_backup_radiation_data():
     try:
         logging.info(f"Querying backup history for genName: {genName}, expl: {expl}")
 
-        backup_data = list(nuclear_radiation_backup_collection.find(
-            {'genName': genName, 'expl': expl},
-            {'_id': 0, 'time': 1, 'value': 1}
-        ).sort('time', 1))
-
-        logging.info(f"Fetched backup history data: {backup_data}")
+        sampled = downsampled_history(nuclear_radiation_backup_collection, genName, expl, request.args)
+        if sampled is not None:
+            return jsonify(sampled)
+        limit, after, fields, paged = page_args(request.args)
+        order = request.args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be 'asc' or 'desc'")
+        query = {'genName': genName, 'expl': expl}
+        start, end = history_range(request.args)
+        if start or end:
+            query['time'] = {k: v for k, v in (('$gte', start), ('$lt', end)) if v}
+        backup_data, next_token = keyset_page(nuclear_radiation_backup_collection, query,
+                                              DESCENDING if order == 'desc' else ASCENDING,
+                                              limit, after, fields or ['time', 'value'])
+        if paged:
+            return jsonify({"items": backup_data, "next": next_token, "limit": limit})
+
+        logging.info(f"Fetched {len(backup_data)} backup history records")
 
         if not backup_data:
             logging.warning(f"No backup data found for genName: {genName}, expl: {expl}")
             return jsonify([])
 
         return jsonify(backup_data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Error fetching backup history data for {genName}, {expl}: {e}")
         return jsonify({"error": "Failed to fetch backup history data"}), 500
@@ -794,21 +928,150 @@ def upload_analysis4_csv():
 # 발전소 선택 페이지
 @app.route('/optimal_shelter_evaluation')
 def optimal_shelter_evaluation():
-    sites = list(power_plants.keys())  # ['고리','월성','한빛','한울']
+    sites = list(power_plants.keys())  # ['고리','월성','한빛','한울','새울']
     return render_template('optimal_shelter_evaluation.html', sites=sites)
 
 # 선택한 발전소 결과 페이지
+# 지도는 브라우저가 /api/topsis/<site> 점수와 정적 GeoJSON을 받아 직접 그림
 @app.route('/optimal_shelter_result/<site>')
 def optimal_shelter_result(site):
-    # 1) TOP5 정보
-    top5     = compute_top5_for(site)
-    # 2) folium map HTML
-    map_html = generate_topsis_map_html(site)
+    if site not in power_plants:
+        abort(404)
+    # 최신 기상 기준 점수 (발전소·기상 시각별 캐시)
+    top5 = compute_top5_for(site, get_scores(site))
     return render_template(
         'optimal_shelter_result.html',
-        map_html=map_html,
+        site=site,
         top5_shelters=top5
     )
+
+# 행정동별 TOPSIS 점수 + TOP N (지도 HTML 없이 JSON만)
+# level=0~3 또는 zoom=<지도 줌>으로 경계 단순화 단계 선택
+@app.route('/api/topsis/<site>', methods=['GET'])
+def topsis_api(site):
+    if site not in power_plants:
+        return jsonify({"error": f"Unsupported plant '{site}'"}), 404
+    top_n = request.args.get('top', 5, type=int)
+    level = request.args.get('level', type=int)
+    if level not in GEOMETRY_LEVELS:
+        level = level_for_zoom(request.args.get('zoom', 8, type=int))
+    try:
+        payload = topsis_payload(site, top_n=max(1, top_n))
+        payload['geojson_levels'] = [
+            {'level': lv, 'min_zoom': GEOMETRY_LEVELS[lv][2],
+             'url': url_for('topsis_geojson', site=site, level=lv, digest=plant_geojson(site, lv)[0])}
+            for lv in sorted(GEOMETRY_LEVELS)
+        ]
+        payload['geojson_url'] = payload['geojson_levels'][level]['url']
+        return jsonify(payload)
+    except Exception as e:
+        logging.error(f"Error computing TOPSIS scores for {site}: {e}")
+        return jsonify({"error": "Failed to compute TOPSIS scores"}), 500
+
+# 같은 기준 행렬로 TOPSIS / VIKOR / PROMETHEE II 순위와 방법 간 일치도 (?methods=topsis,vikor&top=5)
+@app.route('/api/mcda/<site>', methods=['GET'])
+def mcda_api(site):
+    if site not in power_plants:
+        return jsonify({"error": f"Unsupported plant '{site}'"}), 404
+    methods = [m for m in request.args.get('methods', ','.join(mcda.METHODS)).split(',') if m]
+    if not methods or any(m not in mcda.KERNELS for m in methods):
+        return jsonify({"error": f"methods must be from {list(mcda.KERNELS)}"}), 400
+    top_n = request.args.get('top', 5, type=int)
+    try:
+        return jsonify(mcda_payload(site, methods=tuple(methods), top_n=max(1, top_n)))
+    except Exception as e:
+        logging.error(f"Error computing MCDA rankings for {site}: {e}")
+        return jsonify({"error": "Failed to compute MCDA rankings"}), 500
+
+# 행정동 경계 GeoJSON (단순화 단계별, 내용 해시 URL → 장기 캐시)
+@app.route('/geo/<site>/<int:level>/<digest>.geojson', methods=['GET'])
+def topsis_geojson(site, level, digest):
+    if site not in power_plants or level not in GEOMETRY_LEVELS:
+        abort(404)
+    current, body = plant_geojson(site, level)
+    if digest != current:
+        return redirect(url_for('topsis_geojson', site=site, level=level, digest=current))
+    resp = Response(body, mimetype='application/geo+json')
+    resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    resp.set_etag(current)
+    return resp.make_conditional(request)
+
+# 가장 가까운 구호소 k곳 (exclude_sector=<발전소>면 그 발전소의 현재 풍하 섹터 안 구호소는 건너뜀)
+@app.route('/api/shelters/nearest', methods=['GET'])
+def nearest_shelters_api():
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    if lat is None or lng is None:
+        return jsonify({"error": "lat and lng are required"}), 400
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+    site = request.args.get('exclude_sector')
+    if site and site not in power_plants:
+        return jsonify({"error": f"Unsupported plant '{site}'"}), 404
+    try:
+        exclude = shelters.sector_mask(current_sector(site)) if site else None
+        return jsonify({
+            'lat': lat, 'lng': lng, 'k': k, 'exclude_sector': site,
+            'shelters': shelters.nearest(lat, lng, k, exclude),
+        })
+    except Exception as e:
+        logging.error(f"Error finding nearest shelters for ({lat}, {lng}): {e}")
+        return jsonify({"error": "Failed to find nearest shelters"}), 500
+
+# 풍하 섹터 안 행정동 인구 → 섹터 밖 구호소 배정 (수용인원 제약 수송 LP)
+@app.route('/api/evacuation/<site>', methods=['GET'])
+def evacuation_api(site):
+    if site not in power_plants:
+        return jsonify({"error": f"Unsupported plant '{site}'"}), 404
+    try:
+        return jsonify(evacuation_payload(site))
+    except Exception as e:
+        logging.error(f"Error computing evacuation plan for {site}: {e}")
+        return jsonify({"error": "Failed to compute evacuation plan"}), 500
+
+# 현재 풍하 섹터 안 노출 인구·구호소 수용인원 (행정동 면적 가중, 반경 10/30/60/100km)
+@app.route('/api/exposure/<site>', methods=['GET'])
+def exposure_api(site):
+    if site not in power_plants:
+        return jsonify({"error": f"Unsupported plant '{site}'"}), 404
+    try:
+        return jsonify(exposure_payload(site))
+    except Exception as e:
+        logging.error(f"Error computing sector exposure for {site}: {e}")
+        return jsonify({"error": "Failed to compute sector exposure"}), 500
+
+# 여러 발전소 동시 사고 시나리오 점수
+# ?plants=고리,새울&combine=max|sum&weather=고리:225,3.5,중립 (weather는 발전소별로 반복, 없으면 최신 기상)
+@app.route('/api/scenario', methods=['GET'])
+def scenario_api():
+    plants = [p for p in request.args.get('plants', '').split(',') if p]
+    unknown = [p for p in plants if p not in power_plants]
+    if not plants or unknown:
+        return jsonify({"error": f"Unsupported plant(s) {unknown or plants}"}), 404
+    combine = request.args.get('combine', 'max')
+    if combine not in COMBINE:
+        return jsonify({"error": f"combine must be one of {sorted(COMBINE)}"}), 400
+    # weather=<plant>:<wd>,<ws>,<안정도> — 안정도는 한글 라벨, A~G 등급, 또는 가중치 숫자
+    weathers = {}
+    try:
+        for spec in request.args.getlist('weather'):
+            plant, values = spec.split(':', 1)
+            wd, ws, stab = values.split(',')
+            stab = korean_to_category.get(stab.strip(), stab.strip().upper())
+            sw = stab_map[stab] if stab in stab_map else float(stab)
+            weathers[plant] = (float(wd), float(ws), sw)
+    except (ValueError, KeyError):
+        return jsonify({"error": "weather must look like <plant>:<wd>,<ws>,<stability> "
+                                 "(stability: Korean label, A-G, or weight)"}), 400
+    stray = [p for p in weathers if p not in plants]
+    if stray:
+        return jsonify({"error": f"weather given for plant(s) not in plants: {stray}"}), 400
+    top_n = request.args.get('top', 5, type=int)
+    try:
+        return jsonify(scenario_payload(plants, weathers, combine, top_n=max(1, top_n)))
+    except Exception as e:
+        logging.error(f"Error computing scenario for {plants}: {e}")
+        return jsonify({"error": "Failed to compute scenario scores"}), 500
+
 # ---------------------------------------------------------------------
 # 바람 장미
 # ---------------------------------------------------------------------
@@ -1064,7 +1327,9 @@ def accident_result_page(genName):
                 "rainfall": rainfall  # 강우량 추가
             }
         logging.info(f"Result: {result}")
-        return render_template('accident_result.html', genName=genName, result=result)
+        # 노출 인구는 페이지가 /api/exposure/<발전소>로 따로 받아옴 (TOPSIS 대상 발전소만)
+        site = next((p for p, code in mapping_codes.items() if code == genName.upper()), None)
+        return render_template('accident_result.html', genName=genName, result=result, site=site)
 
     except PyMongoError as pe:
         logging.error(f"Database error for {genName}: {pe}")
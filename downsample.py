@@ -0,0 +1,102 @@
+# downsample.py
+# 방사선/기상 이력 차트용 서버 측 다운샘플링입니다. 기간이 길어도 응답 점 수를 N개 이하로 묶어 둡니다.
+#
+#  - lttb:   Largest-Triangle-Three-Buckets — 버킷마다 (이전 선택점, 현재 후보, 다음 버킷 평균)의 삼각형 면적이
+#            가장 큰 점을 고름 (버킷 사이만 순차, 버킷 안은 배열 연산)
+#  - minmax: 버킷마다 최솟값·최댓값 두 점 (완전 벡터화, 스파이크 보존)
+#
+# 결과는 (컬렉션, 발전소, 측정 지점, 기간, N, 방식)별로 TTL_SECONDS 동안 메모리에 캐시합니다.
+
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+TTL_SECONDS = 60
+CACHE_SIZE = 256
+MAX_POINTS = 10000
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def lttb(x, y, n):
+    """x, y: (m,) 시간순 배열 → 선택한 점의 위치 배열 (첫/마지막 점 포함, 최대 n개)"""
+    m = len(x)
+    if n >= m:
+        return np.arange(m)
+    if n < 3:
+        raise ValueError("lttb needs at least 3 points")
+    edges = np.linspace(1, m - 1, n - 1).astype(int)      # 가운데 n-2개 버킷 경계
+    # 다음 버킷 평균 (마지막 버킷 다음은 끝점)
+    csx, csy = np.concatenate([[0], np.cumsum(x)]), np.concatenate([[0], np.cumsum(y)])
+    lo, hi = edges[:-1], edges[1:]
+    nlo, nhi = np.append(lo[1:], m - 1), np.append(hi[1:], m)
+    avg_x = (csx[nhi] - csx[nlo]) / (nhi - nlo)
+    avg_y = (csy[nhi] - csy[nlo]) / (nhi - nlo)
+
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, m - 1
+    a = 0
+    for i in range(n - 2):
+        bx, by = x[lo[i]:hi[i]], y[lo[i]:hi[i]]
+        area = np.abs((x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a]))
+        a = lo[i] + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax(x, y, n):
+    """버킷(n/2개)마다 최솟값·최댓값 위치 (시간순, 중복 제거)"""
+    m = len(y)
+    buckets = max(n // 2, 1)
+    if n >= m:
+        return np.arange(m)
+    edges = np.linspace(0, m, buckets + 1).astype(int)
+    ids = np.repeat(np.arange(buckets), np.diff(edges))
+    order_min = np.lexsort((y, ids))                       # 버킷별 y 오름차순
+    first = edges[:-1]
+    last = edges[1:] - 1
+    keep = np.diff(edges) > 0
+    idx = np.concatenate([order_min[first[keep]], order_min[last[keep]]])
+    return np.unique(idx)
+
+
+METHODS = {'lttb': lttb, 'minmax': minmax}
+
+
+def downsample(docs, n, method='lttb'):
+    """
+    docs: 시간순 [{'time': 'YYYY-MM-DD HH:MM', 'value': ...}, ...]
+    반환: 최대 n개 점으로 줄인 같은 형식의 목록 (값이 숫자가 아닌 문서는 제외)
+    """
+    if not docs:
+        return []
+    df = pd.DataFrame(docs, columns=['time', 'value'])
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df['t'] = pd.to_datetime(df['time'], errors='coerce')
+    df = df.dropna(subset=['value', 't']).reset_index(drop=True)
+    if len(df) <= n:
+        return df[['time', 'value']].to_dict('records')
+    x = df['t'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+    x = (x - x[0]).astype(float)
+    idx = METHODS[method](x, df['value'].to_numpy(dtype=float), n)
+    return df.loc[idx, ['time', 'value']].to_dict('records')
+
+
+def cached(key, compute):
+    """key별 결과를 TTL_SECONDS 동안 재사용 (LRU, 최대 CACHE_SIZE개)"""
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and now - hit[0] < TTL_SECONDS:
+            _cache.move_to_end(key)
+            return hit[1]
+    value = compute()
+    with _lock:
+        _cache[key] = (now, value)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
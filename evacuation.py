@@ -0,0 +1,155 @@
+# evacuation.py
+# 풍하 섹터 안 행정동의 인구를 섹터 밖 구호소에 수용인원 한도 안에서 배정합니다 (수송 문제 LP).
+#
+#   최소화  Σ 거리(km)·인원 + PENALTY_KM·미배정 인원
+#   조건    행정동 i: Σ_j x_ij + u_i = 인구_i,   구호소 j: Σ_i x_ij ≤ 수용인원_j,   x, u ≥ 0
+#
+# 후보 간선은 행정동 중심점마다 cKDTree로 찾은 가장 가까운 섹터 밖 구호소 N곳으로 제한합니다.
+# 후보가 모두 차서 미배정이 남은 행정동은 후보를 넓혀(N×4) 다시 풉니다.
+# 공급/용량이 정수인 수송 문제라 HiGHS 단체법 해는 정수입니다.
+
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import shapely
+from scipy import sparse
+from scipy.optimize import linprog
+import shelters
+
+N_CANDIDATES = 30
+MAX_ROUNDS = 3
+PENALTY_KM = 1000    # 미배정 1명당 비용 (어떤 실제 이동보다 큼)
+
+Assignment = namedtuple('Assignment', ['zones', 'shelters', 'flows', 'summary'])
+
+
+def affected_zones(gdf, population, sector):
+    """
+    gdf: 행정동 (adm_nm, centroid_lat, centroid_lon), population: 행정동별 인구 배열
+    sector: ((lat, lon), ...) 풍하 섹터 꼭짓점
+    반환: 중심점이 섹터 안에 있는 행정동 DataFrame (adm_nm, lat, lon, population)
+    """
+    poly = shapely.Polygon([(lon, lat) for lat, lon in sector])
+    lat, lon = gdf['centroid_lat'].to_numpy(), gdf['centroid_lon'].to_numpy()
+    inside = shapely.contains_xy(poly, lon, lat)
+    pop = np.nan_to_num(np.asarray(population, dtype=float))
+    zones = pd.DataFrame({'adm_nm': gdf['adm_nm'].to_numpy(), 'lat': lat, 'lon': lon,
+                          'population': np.round(pop).astype(int)}, index=gdf.index)
+    return zones[inside & (zones['population'] > 0)]
+
+
+def candidate_edges(idx, zx, zy, n, exclude):
+    """
+    행정동(투영 좌표 zx, zy)마다 exclude가 아닌 가까운 구호소 n곳 → (행정동 위치, 구호소 위치, 거리 km)
+    모든 행정동을 cKDTree 한 번으로 조회하고, 제외된 구호소 때문에 n곳이 안 찬 행정동만 k를 4배로 늘려 다시 조회
+    """
+    total = len(idx.xy)
+    pts = np.c_[zx, zy]
+    rows, cols, dist = [np.empty(0, dtype=int)], [np.empty(0, dtype=int)], [np.empty(0)]
+    todo, kk = np.arange(len(pts)), n
+    while len(todo) and total:
+        k = min(kk, total)
+        d, p = idx.tree.query(pts[todo], k=k)
+        d, p = d.reshape(len(todo), k), p.reshape(len(todo), k)
+        keep = np.ones(p.shape, dtype=bool) if exclude is None else ~exclude[p]
+        rank = np.cumsum(keep, axis=1)
+        done = (rank[:, -1] >= n) | (k >= total)
+        r, c = np.nonzero(keep & (rank <= n) & done[:, None])
+        rows.append(todo[r])
+        cols.append(p[r, c])
+        dist.append(d[r, c] / 1000)
+        todo, kk = todo[~done], kk * 4
+    rows, cols, dist = np.concatenate(rows), np.concatenate(cols), np.concatenate(dist)
+    order = np.argsort(rows, kind='stable')   # 행정동 순서, 행정동 안에서는 가까운 순
+    return rows[order], cols[order], dist[order]
+
+
+def solve_transport(supply, capacity, rows, cols, cost, penalty=PENALTY_KM):
+    """
+    supply: (m,) 행정동 인구, capacity: (k,) 구호소 수용인원
+    rows, cols, cost: 후보 간선 (행정동 위치, 구호소 위치, 1명당 비용)
+    반환: (간선별 배정 인원, 행정동별 미배정 인원)
+    """
+    m, k, e = len(supply), len(capacity), len(rows)
+    c = np.concatenate([cost, np.full(m, penalty)])
+    a_eq = sparse.hstack([sparse.csr_matrix((np.ones(e), (rows, np.arange(e))), shape=(m, e)),
+                          sparse.identity(m, format='csr')], format='csr')
+    a_ub = sparse.hstack([sparse.csr_matrix((np.ones(e), (cols, np.arange(e))), shape=(k, e)),
+                          sparse.csr_matrix((k, m))], format='csr')
+    res = linprog(c, A_ub=a_ub, b_ub=capacity, A_eq=a_eq, b_eq=supply, bounds=(0, None), method='highs')
+    if res.status != 0:
+        raise RuntimeError(f"Assignment LP failed: {res.message}")
+    x = np.round(res.x).astype(int)
+    return x[:e], x[e:]
+
+
+def _empty(zones):
+    flows = pd.DataFrame(columns=['adm_nm', 'zone_lat', 'zone_lon', 'shelter', 'people', 'distance_km',
+                                  'shelter_name', 'shelter_lat', 'shelter_lon'])
+    used = pd.DataFrame(columns=['name', 'address', 'capacity', 'lat', 'lon', 'load'])
+    summary = {'zones': 0, 'shelters_used': 0, 'population': 0, 'assigned': 0, 'unassigned': 0,
+               'mean_distance_km': 0.0, 'max_distance_km': 0.0, 'candidates_per_zone': 0}
+    return Assignment(zones.assign(unassigned=0, assigned=0), used, flows, summary)
+
+
+def assign(gdf, population, sector, n_candidates=N_CANDIDATES, max_rounds=MAX_ROUNDS):
+    """
+    섹터 안 행정동 → 섹터 밖 구호소 배정
+    반환: Assignment(zones, shelters, flows, summary)
+      zones: 행정동별 population, assigned, unassigned
+      shelters: 배정받은 구호소별 name, capacity, load
+      flows: 간선별 adm_nm → shelter, people, distance_km
+    """
+    idx = shelters.shelter_index()
+    zones = affected_zones(gdf, population, sector)
+    exclude = shelters.sector_mask(tuple(sector))
+    zx, zy = idx.transformer.transform(zones['lon'].to_numpy(), zones['lat'].to_numpy())
+    supply = zones['population'].to_numpy()
+    if len(zones) == 0:
+        return _empty(zones)
+
+    n = n_candidates
+    todo = np.arange(len(zones))
+    edges = None
+    for _ in range(max_rounds):
+        r, c, d = candidate_edges(idx, zx[todo], zy[todo], n, exclude)
+        new = np.column_stack([todo[r], c, d])
+        edges = new if edges is None else np.unique(np.vstack([edges, new]), axis=0)
+        rows, cols, dist = edges[:, 0].astype(int), edges[:, 1].astype(int), edges[:, 2]
+        used, col_pos = np.unique(cols, return_inverse=True)
+        flow, unassigned = solve_transport(supply, idx.df['capacity'].to_numpy()[used], rows, col_pos, dist)
+        todo = np.flatnonzero(unassigned > 0)
+        if len(todo) == 0 or n >= len(idx.xy):
+            break
+        n *= 4
+
+    keep = flow > 0
+    flows = pd.DataFrame({
+        'adm_nm':      zones['adm_nm'].to_numpy()[rows[keep]],
+        'zone_lat':    zones['lat'].to_numpy()[rows[keep]],
+        'zone_lon':    zones['lon'].to_numpy()[rows[keep]],
+        'shelter':     cols[keep],
+        'people':      flow[keep],
+        'distance_km': dist[keep],
+    })
+    load = flows.groupby('shelter')['people'].sum()
+    used_df = idx.df.loc[load.index, ['구호소명', '도로명주소', 'capacity', 'latitude', 'longitude']]
+    used_df = used_df.rename(columns={'구호소명': 'name', '도로명주소': 'address', 'latitude': 'lat', 'longitude': 'lon'})
+    used_df['load'] = load
+    flows['shelter_name'] = idx.df['구호소명'].to_numpy()[flows['shelter']]
+    flows['shelter_lat'] = idx.lat[flows['shelter']]
+    flows['shelter_lon'] = idx.lon[flows['shelter']]
+
+    zones = zones.assign(unassigned=unassigned, assigned=supply - unassigned)
+    total = int(supply.sum())
+    summary = {
+        'zones': len(zones),
+        'shelters_used': len(used_df),
+        'population': total,
+        'assigned': int(total - unassigned.sum()),
+        'unassigned': int(unassigned.sum()),
+        'mean_distance_km': round(float((flows['people'] * flows['distance_km']).sum() / max(flows['people'].sum(), 1)), 2),
+        'max_distance_km': round(float(flows['distance_km'].max()), 2) if len(flows) else 0.0,
+        'candidates_per_zone': n,
+    }
+    return Assignment(zones, used_df.reset_index(drop=True), flows, summary)
@@ -0,0 +1,57 @@
+# exposure.py
+# 풍하 섹터와 행정동 폴리곤의 교차 면적 비율로 섹터 안 인구·구호소 수용인원을 추정합니다.
+#
+#   추정 인구 = Σ 인구_i · 면적(행정동_i ∩ 섹터 ∩ 반경 r) / 면적(행정동_i)
+#
+# 행정동 폴리곤은 발전소별로 EPSG:5179(m)로 한 번 투영해 STRtree로 색인하고,
+# 섹터와 교차할 수 있는 행정동만 골라 shapely 벡터 연산으로 교차 면적을 구합니다.
+# 반경 고리(10/30/60/100km)는 섹터 교차 결과를 발전소 중심 원으로 한 번 더 잘라 얻습니다.
+
+from collections import namedtuple
+import numpy as np
+import shapely
+from pyproj import Transformer
+
+PROJ_CRS = 'EPSG:5179'
+RADII_KM = (10, 30, 60, 100)   # topsis_upgrade 지도에 그리는 반경 고리와 같음
+
+ExposureIndex = namedtuple('ExposureIndex', ['geoms', 'area', 'tree', 'transformer'])
+
+
+def build_index(gdf):
+    """gdf: 행정동 GeoDataFrame (EPSG:4326) → 투영 폴리곤, 면적(m²), STRtree"""
+    geoms = gdf.geometry.to_crs(PROJ_CRS).to_numpy()
+    transformer = Transformer.from_crs('EPSG:4326', PROJ_CRS, always_xy=True)
+    return ExposureIndex(geoms, shapely.area(geoms), shapely.STRtree(geoms), transformer)
+
+
+def sector_polygon(idx, sector):
+    """sector: ((lat, lon), ...) 첫 꼭짓점이 발전소 → (투영 폴리곤, 발전소 투영 Point)"""
+    lat, lon = np.array(sector, dtype=float).T
+    x, y = idx.transformer.transform(lon, lat)
+    return shapely.polygons(np.column_stack([x, y])), shapely.points(x[0], y[0])
+
+
+def sector_exposure(idx, population, capacity, sector, radii=RADII_KM):
+    """
+    population, capacity: 행정동별 인구, 구호소 수용인원 합 (idx와 같은 순서)
+    반환: 반경별 [{'radius_km', 'population', 'capacity', 'zones'}, ...] (반경 오름차순, 누적)
+      zones: 섹터·반경과 겹치는 행정동 수
+    """
+    poly, origin = sector_polygon(idx, sector)
+    cand = idx.tree.query(poly, predicate='intersects')
+    pop = np.nan_to_num(np.asarray(population, dtype=float))[cand]
+    cap = np.nan_to_num(np.asarray(capacity, dtype=float))[cand]
+    area = np.where(idx.area[cand] > 0, idx.area[cand], np.inf)
+    clipped = shapely.intersection(idx.geoms[cand], poly)
+
+    out = []
+    for r in sorted(radii):
+        frac = shapely.area(shapely.intersection(clipped, shapely.buffer(origin, r * 1000, quad_segs=32))) / area
+        out.append({
+            'radius_km': r,
+            'population': int(round(float(pop @ frac))),
+            'capacity': int(round(float(cap @ frac))),
+            'zones': int(np.count_nonzero(frac > 0)),
+        })
+    return out
@@ -0,0 +1,239 @@
+# geodata.py
+# 행정동 GeoJSON, 인구(population2.xlsx), 구호소(shelter.xlsx)를 병합한 GeoDataFrame을 만들고
+# GeoParquet 스냅샷으로 저장/로드합니다. 원본 파일 해시가 바뀌면 스냅샷을 자동으로 다시 만듭니다.
+# 광역지자체별 샤드와 bbox 인덱스도 함께 저장해, 발전소 반경에 걸리는 샤드만 읽을 수 있습니다.
+#
+# 스냅샷 미리 만들기(배포 시):  python geodata.py
+
+import os
+import json
+import math
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 데이터 파일 경로
+REGIONS = {
+    '부산광역시':  os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_부산광역시.geojson'),
+    '울산광역시':  os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_울산광역시.geojson'),
+    '경상북도':    os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_경상북도.geojson'),
+    '전라남도':    os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_전라남도.geojson'),
+    '전라북도':    os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_전라북도.geojson'),
+    '경상남도':    os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_경상남도.geojson'),
+    '대구광역시':  os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_대구광역시.geojson'),
+    '광주광역시':  os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_광주광역시.geojson'),
+    '강원특별자치도': os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_강원도.geojson'),
+}
+POP_PATH  = os.path.join(BASE_DIR, 'data', 'population2.xlsx')
+SHEL_PATH = os.path.join(BASE_DIR, 'data', 'shelter.xlsx')
+
+# 스냅샷 경로
+CACHE_DIR     = os.path.join(BASE_DIR, 'data', 'cache')
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, 'geodata.parquet')
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'geodata.manifest.json')
+SHARD_DIR     = os.path.join(CACHE_DIR, 'shards')
+SHARD_CACHE_SIZE = 4   # 프로세스당 메모리에 올려둘 샤드 수
+
+# 지도 출력용 단순화 단계: level → (허용오차 m, 좌표 소수 자릿수, 최소 줌)
+GEOMETRY_LEVELS = {
+    0: (0,   6, 12),   # 원본 (좌표만 양자화)
+    1: (30,  5, 10),
+    2: (120, 4, 8),
+    3: (500, 4, 0),
+}
+
+
+# ----------------------------
+# 원본 파일 병합 (느림: GeoJSON 파싱 + sjoin + 재투영)
+# ----------------------------
+def build_geodata():
+    gdfs = [gpd.read_file(p).assign(region=name) for name, p in REGIONS.items()]
+    gdf = pd.concat(gdfs, ignore_index=True)
+
+    pop_df = pd.read_excel(POP_PATH)
+    pop_df['sido_full'] = pop_df['광역지자체'].map({k:k for k in REGIONS})
+    pop_df['adm_nm_full'] = pop_df['sido_full'] + ' ' + pop_df['행정구역'] + ' ' + pop_df['adm_cd']
+    gdf = gdf.merge(pop_df[['adm_nm_full','population']],
+                    left_on='adm_nm', right_on='adm_nm_full', how='left')
+    gdf.drop(columns=['adm_nm_full'], inplace=True)
+
+    shel_df = pd.read_excel(SHEL_PATH)
+    sg = gpd.GeoDataFrame(shel_df,
+        geometry=gpd.points_from_xy(shel_df.longitude, shel_df.latitude),
+        crs='EPSG:4326')
+    sg = gpd.sjoin(sg, gdf[['adm_nm','geometry']],
+                   how='left', predicate='within')
+    cap_sum = sg.groupby('adm_nm')['capacity'].sum().reset_index().rename(columns={'capacity':'capacity_sum'})
+    gdf = gdf.merge(cap_sum, on='adm_nm', how='left').fillna({'capacity_sum':0})
+
+    # 면적 중심은 투영 좌표(EPSG:5179)에서 구하고 한 번만 경위도로 되돌림
+    centroid = gdf.to_crs('EPSG:5179').geometry.centroid.to_crs('EPSG:4326')
+    gdf['centroid_lat'] = centroid.y
+    gdf['centroid_lon'] = centroid.x
+
+    return gdf
+
+
+# ----------------------------
+# 스냅샷 저장/로드
+# ----------------------------
+def source_files():
+    return list(REGIONS.values()) + [POP_PATH, SHEL_PATH]
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def source_hashes():
+    return {os.path.relpath(p, BASE_DIR): _file_hash(p) for p in source_files()}
+
+def _read_manifest(hashes):
+    """원본 해시가 일치하고 스냅샷 파일이 모두 있으면 manifest, 아니면 None"""
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('sources') != hashes or not os.path.exists(SNAPSHOT_PATH):
+        return None
+    for shard in manifest.get('shards', {}).values():
+        if not os.path.exists(os.path.join(SHARD_DIR, shard['file'])):
+            return None
+    return manifest
+
+def _to_parquet(gdf, path):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    gdf.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+def write_snapshot(gdf, hashes=None):
+    """
+    전체 GeoParquet, 광역지자체별 샤드, 원본 해시·샤드 bbox manifest 저장
+    (임시 파일 → os.replace로 원자적 교체, manifest를 마지막에 기록)
+    """
+    hashes = hashes or source_hashes()
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    _to_parquet(gdf, SNAPSHOT_PATH)
+
+    shards = {}
+    for i, (name, part) in enumerate(gdf.groupby('region', sort=False)):
+        fname = f"shard_{i:02d}.parquet"
+        _to_parquet(part, os.path.join(SHARD_DIR, fname))
+        shards[name] = {'file': fname, 'rows': len(part),
+                        'bbox': [float(v) for v in part.total_bounds]}
+
+    manifest = {'sources': hashes, 'rows': len(gdf), 'shards': shards}
+    tmp = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+    return manifest
+
+def ensure_snapshot():
+    """원본이 바뀌었거나 스냅샷이 없으면 다시 만들고 manifest 반환"""
+    hashes = source_hashes()
+    manifest = _read_manifest(hashes)
+    if manifest is None:
+        manifest = write_snapshot(build_geodata(), hashes)
+    return manifest
+
+def load_geodata():
+    """
+    스냅샷이 최신이면 GeoParquet에서 바로 읽고,
+    원본 해시가 다르거나 스냅샷이 없으면 다시 병합해 저장.
+    """
+    hashes = source_hashes()
+    if _read_manifest(hashes) is not None:
+        try:
+            return gpd.read_parquet(SNAPSHOT_PATH)
+        except Exception as e:
+            logging.warning(f"geodata 스냅샷 읽기 실패, 다시 생성합니다: {e}")
+
+    gdf = build_geodata()
+    try:
+        write_snapshot(gdf, hashes)
+    except (ImportError, OSError) as e:
+        # pyarrow 미설치 또는 쓰기 권한 없음 → 스냅샷 없이 계속
+        logging.warning(f"geodata 스냅샷 저장 실패: {e}")
+    return gdf
+
+
+# ----------------------------
+# 샤드 지연 로드 (발전소 반경 기준)
+# ----------------------------
+_manifest = None
+_manifest_lock = threading.Lock()
+
+def shard_index():
+    """{광역지자체: {'file', 'rows', 'bbox'}} (프로세스당 한 번 해시 확인)"""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = ensure_snapshot()
+    return _manifest['shards']
+
+@lru_cache(maxsize=SHARD_CACHE_SIZE)
+def load_shard(name):
+    return gpd.read_parquet(os.path.join(SHARD_DIR, shard_index()[name]['file']))
+
+def shards_within(lat, lon, radius_km):
+    """반경 원의 bbox와 겹치는 샤드 이름 목록"""
+    dlat = radius_km / 111.195
+    dlon = radius_km / (111.195 * math.cos(math.radians(lat)))
+    return [
+        name for name, shard in shard_index().items()
+        if not (shard['bbox'][2] < lon - dlon or shard['bbox'][0] > lon + dlon or
+                shard['bbox'][3] < lat - dlat or shard['bbox'][1] > lat + dlat)
+    ]
+
+def load_within(lat, lon, radius_km):
+    """반경에 걸리는 샤드만 읽어 합친 GeoDataFrame"""
+    names = shards_within(lat, lon, radius_km)
+    if not names:
+        raise ValueError(f"No geodata shard within {radius_km}km of ({lat}, {lon})")
+    return pd.concat([load_shard(n) for n in names], ignore_index=True)
+
+
+# ----------------------------
+# 지도 출력용 단순화 geometry
+# ----------------------------
+def level_for_zoom(zoom):
+    """지도 줌에 맞는 가장 정밀한 단계 중 가장 가벼운 것"""
+    for level in sorted(GEOMETRY_LEVELS, key=lambda l: -GEOMETRY_LEVELS[l][2]):
+        if zoom >= GEOMETRY_LEVELS[level][2]:
+            return level
+    return max(GEOMETRY_LEVELS)
+
+def simplify_geometry(geoms, level):
+    """
+    geoms: EPSG:4326 GeoSeries
+    EPSG:5179(m)에서 경계 공유를 유지하는 coverage 단순화 후 좌표를 격자에 양자화
+    """
+    tol_m, digits, _ = GEOMETRY_LEVELS[level]
+    out = geoms
+    if tol_m:
+        proj = geoms.to_crs('EPSG:5179')
+        try:
+            arr = shapely.coverage_simplify(proj.values, tol_m)
+        except (AttributeError, shapely.errors.GEOSException):
+            # GEOS < 3.12 → 폴리곤 단위 단순화 (인접 경계는 조금 어긋날 수 있음)
+            arr = proj.simplify(tol_m, preserve_topology=True).values
+        out = gpd.GeoSeries(arr, index=geoms.index, crs='EPSG:5179').to_crs('EPSG:4326')
+    return gpd.GeoSeries(shapely.set_precision(out.values, 10 ** -digits),
+                         index=geoms.index, crs='EPSG:4326')
+
+
+if __name__ == '__main__':
+    manifest = write_snapshot(build_geodata())
+    print(f"Saved {manifest['rows']} rows → {SNAPSHOT_PATH}")
+    for name, shard in manifest['shards'].items():
+        print(f"  {name}: {shard['rows']} rows, bbox={shard['bbox']}")
@@ -0,0 +1,26 @@
+# geometry_benchmark.py
+# 행정동 경계 단순화 단계(geodata.GEOMETRY_LEVELS)별 GeoJSON 크기·좌표 수·생성 시간을 발전소마다 출력합니다.
+#
+# 실행: python geometry_benchmark.py
+
+import gzip
+import time
+import shapely
+import geodata
+from map_utils import power_plants, plant_geometry, plant_geojson
+
+
+def main():
+    print(f"{'발전소':<6}{'level':>6}{'tol(m)':>8}{'coords':>10}{'bytes':>12}{'gzip':>10}{'sec':>8}")
+    for plant in power_plants:
+        for level, (tol_m, _, _) in sorted(geodata.GEOMETRY_LEVELS.items()):
+            t = time.perf_counter()
+            _, body = plant_geojson(plant, level)
+            sec = time.perf_counter() - t
+            coords = int(shapely.get_num_coordinates(plant_geometry(plant, level).values).sum())
+            print(f"{plant:<6}{level:>6}{tol_m:>8}{coords:>10}{len(body):>12}"
+                  f"{len(gzip.compress(body)):>10}{sec:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
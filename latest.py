@@ -0,0 +1,186 @@
+# latest.py
+# 측정소/발전소별 "최신값" 문서를 별도 컬렉션에 유지해 실시간 지도 API를 O(측정소 수) 조회로 만듭니다.
+#
+#  - nuclear_radiation      → nuclear_radiation_latest   (genName별, _id = genName)
+#  - Busan_radiation        → Busan_radiation_latest     (locNm별, _id = locNm)
+#  - NPP_weather_backup     → NPP_weather_latest         (genName별, _id = genName)
+#
+# 갱신은 두 가지입니다.
+#  - 수집기(이 저장소 밖의 수집 스크립트): 문서를 넣은 뒤 record(db, 원본, docs) — 더 새 time일 때만 교체
+#  - 갱신기: refresh(db, 원본) — 최신값 컬렉션의 최대 time(high-water mark)에서 LOOKBACK_HOURS 앞선 시각 이후
+#            원본만 읽어 키별 마지막 문서를 $merge (조금 늦게 들어오는 측정소도 놓치지 않도록 여유를 둠)
+# 두 경로 모두 "time이 같거나 더 새로우면 교체"라 순서가 뒤섞여도 최신값은 뒤로 가지 않습니다.
+# 웹 요청은 REFRESH_SECONDS마다 백그라운드 스레드로 증분 갱신을 시작합니다. 최신값 컬렉션이 아직 비어 있으면
+# (첫 배포, 삭제 후) 원본에서 키별 최신 문서를 직접 집계해 돌려주고, 처음 만들기는 python latest.py에 맡깁니다.
+#
+# 예) 한 번 갱신:       python latest.py
+# 예) 30초마다 갱신:    python latest.py --interval 30
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from datetime import timedelta
+from collections import namedtuple
+from dateutil import parser as dateparser
+from pymongo import MongoClient, UpdateOne
+
+DB_NAME = 'Data'
+REFRESH_SECONDS = int(os.getenv('LATEST_REFRESH_SECONDS', '30'))   # 요청 경로 갱신 최소 간격
+LOOKBACK_HOURS = 24
+
+# 원본 컬렉션 → 최신값 컬렉션, 키 필드
+Source = namedtuple('Source', ['into', 'key'])
+
+SOURCES = {
+    'nuclear_radiation':  Source('nuclear_radiation_latest', 'genName'),
+    'Busan_radiation':    Source('Busan_radiation_latest', 'locNm'),
+    'NPP_weather_backup': Source('NPP_weather_latest', 'genName'),
+}
+
+_last_refresh = {}
+_running = set()
+_lock = threading.Lock()
+
+
+# 기존 문서보다 time이 같거나 새로울 때만 new로 교체 ($merge / 파이프라인 업데이트 공용)
+def _newer(new, new_time):
+    return {'$replaceWith': {'$cond': [{'$gte': [new_time, {'$ifNull': ['$time', '']}]}, new, '$$ROOT']}}
+
+
+# ----------------------------
+# 갱신
+# ----------------------------
+def high_water_mark(db, source):
+    """최신값 컬렉션의 최대 time (비어 있으면 None)"""
+    doc = db[SOURCES[source].into].find_one({}, {'_id': 0, 'time': 1}, sort=[('time', -1)])
+    return doc['time'] if doc else None
+
+
+def refresh(db, source):
+    """high-water mark 이후 원본 문서에서 키별 마지막 문서를 최신값 컬렉션에 반영 (반영 전 mark 반환)"""
+    src = SOURCES[source]
+    hwm = high_water_mark(db, source)
+    if hwm:
+        since = (dateparser.parse(hwm) - timedelta(hours=LOOKBACK_HOURS)).strftime('%Y-%m-%d %H:%M')
+        match = {'time': {'$gte': since}}
+    else:
+        match = {'time': {'$type': 'string'}}   # time이 없는 문서는 최신값 후보에서 제외
+    db[source].aggregate([
+        {'$match': {**match, src.key: {'$ne': None}}},
+        {'$sort': {'time': 1}},
+        {'$group': {'_id': f'${src.key}', 'doc': {'$last': '$$ROOT'}}},
+        {'$replaceWith': {'$mergeObjects': ['$doc', {'_id': '$_id'}]}},
+        {'$merge': {'into': src.into, 'whenMatched': [_newer('$$new', '$$new.time')], 'whenNotMatched': 'insert'}},
+    ], allowDiskUse=True)
+    return hwm
+
+
+def refresh_all(db):
+    return {name: refresh(db, name) for name in SOURCES}
+
+
+def refresh_if_stale(db, source):
+    """
+    요청 경로용: 마지막 갱신 후 REFRESH_SECONDS가 지났고 같은 원본 갱신이 돌고 있지 않으면
+    백그라운드 스레드로 증분 갱신을 시작하고 바로 반환 (시작했으면 True)
+    최신값 컬렉션이 비어 있으면 원본 전체를 훑어야 하므로 시작하지 않음 (처음 만들기는 python latest.py)
+    """
+    now = time.monotonic()
+    with _lock:
+        if source in _running or now - _last_refresh.get(source, float('-inf')) < REFRESH_SECONDS:
+            return False
+        _last_refresh[source] = now
+        _running.add(source)
+    threading.Thread(target=_refresh_worker, args=(db, source), name=f"latest-{source}", daemon=True).start()
+    return True
+
+def _refresh_worker(db, source):
+    try:
+        if high_water_mark(db, source) is None:
+            logging.warning(f"{SOURCES[source].into}가 비어 있어 원본에서 직접 조회합니다 — python latest.py로 만드세요")
+            return
+        refresh(db, source)
+    except Exception as e:
+        logging.warning(f"{source} 최신값 갱신 실패: {e}")
+    finally:
+        with _lock:
+            _running.discard(source)
+
+
+def record(db, source, docs):
+    """수집 직후 호출: docs 중 키별로 더 새로운 문서만 최신값 컬렉션에 반영"""
+    src = SOURCES[source]
+    ops = []
+    for doc in docs:
+        if doc.get(src.key) is None or not doc.get('time'):
+            continue
+        new = {k: v for k, v in doc.items() if k != '_id'}
+        new['_id'] = doc[src.key]
+        ops.append(UpdateOne({'_id': new['_id']}, [_newer({'$literal': new}, new['time'])], upsert=True))
+    if ops:
+        db[src.into].bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+# ----------------------------
+# 조회
+# ----------------------------
+def from_source(db, source, projection=None):
+    """최신값 컬렉션 없이 원본에서 키별 최신 문서를 직접 집계 (최신값 컬렉션 도입 전 조회와 같은 비용, 키 순서)"""
+    src = SOURCES[source]
+    pipeline = [
+        {'$match': {'time': {'$type': 'string'}, src.key: {'$ne': None}}},
+        {'$sort': {'time': -1}},
+        {'$group': {'_id': f'${src.key}', 'doc': {'$first': '$$ROOT'}}},
+        {'$replaceWith': {'$mergeObjects': ['$doc', {'_id': '$_id'}]}},
+        {'$sort': {'_id': 1}},
+    ]
+    if projection:
+        pipeline.append({'$project': projection})
+    return list(db[source].aggregate(pipeline, allowDiskUse=True))
+
+
+def read(db, source, projection=None):
+    """최신값 문서 전체 (키 순서) — 최신값 컬렉션이 비어 있으면 from_source()"""
+    docs = list(db[SOURCES[source].into].find({}, projection).sort('_id', 1))
+    return docs or from_source(db, source, projection)
+
+
+def read_one(db, source, key, projection=None):
+    """키 하나의 최신값 — 최신값 컬렉션에 없으면 원본에서 직접 조회 (없으면 None)"""
+    src = SOURCES[source]
+    doc = db[src.into].find_one({'_id': key}, projection)
+    if doc is None:
+        doc = db[source].find_one({src.key: key, 'time': {'$type': 'string'}}, projection, sort=[('time', -1)])
+    return doc
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='측정소/발전소별 최신값 컬렉션 갱신')
+    p.add_argument('--uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+    p.add_argument('--db', default=DB_NAME)
+    p.add_argument('--interval', type=int, default=0, help='갱신 주기 (초, 0이면 한 번만)')
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    db = MongoClient(args.uri)[args.db]
+    while True:
+        t = time.perf_counter()
+        for name in SOURCES:
+            refresh(db, name)
+            print(f"{name:<20} → {SOURCES[name].into:<26} {high_water_mark(db, name) or '-'}")
+        print(f"({time.perf_counter() - t:.1f}s)")
+        if not args.interval:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,21 @@
 import os
-import math
-import geopandas as gpd
+import time
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-import folium
-from folium.plugins import MarkerCluster
-from folium.features import GeoJsonTooltip, DivIcon
-import branca.colormap as cm
-import geopy.distance
 from pymongo import MongoClient
-from sklearn.preprocessing import MinMaxScaler, StandardScaler
-from sklearn.decomposition import PCA
+import topsis_engine
+import topsis_lut
+import geodata
+import poi_context
+import plume
+import evacuation
+import exposure
+import mcda
+import popgrid
 
 # ----------------------------
 # 설정 및 데이터 로드
@@ -21,33 +27,20 @@ power_plants = {
     '고리': (35.321499, 129.291612),
     '월성': (35.713058, 129.475347),
     '한빛': (35.415534, 126.416692),
-    '한울': (37.085932, 129.390857)
+    '한울': (37.085932, 129.390857),
+    '새울': (35.326500, 129.301300)
 }
 mapping_codes = {
     '고리': 'KR',
     '월성': 'WS',
     '한빛': 'YK',
-    '한울': 'UJ'
+    '한울': 'UJ',
+    '새울': 'SU'
 }
 client = MongoClient('mongodb://localhost:27017')
 db = client['Data']
 col = db['NPP_weather']
 
-# 데이터 파일 경로
-REGIONS = {
-    '부산광역시':  os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_부산광역시.geojson'),
-    '울산광역시':  os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_울산광역시.geojson'),
-    '경상북도':    os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_경상북도.geojson'),
-    '전라남도':    os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_전라남도.geojson'),
-    '전라북도':    os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_전라북도.geojson'),
-    '경상남도':    os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_경상남도.geojson'),
-    '대구광역시':  os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_대구광역시.geojson'),
-    '광주광역시':  os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_광주광역시.geojson'),
-    '강원특별자치도': os.path.join(BASE_DIR, 'data', 'geojson', 'hangjeongdong_강원도.geojson'),
-}
-POP_PATH  = os.path.join(BASE_DIR, 'data', 'population2.xlsx')
-SHEL_PATH = os.path.join(BASE_DIR, 'data', 'shelter.xlsx')
-
 # 안정도 카테고리 및 가중치
 korean_to_category = {
     '심한 불안정':'A','불안정':'B','약간 불안정':'C','중립':'D',
@@ -55,239 +48,453 @@ korean_to_category = {
 }
 stab_map = {'A':0.2,'B':0.4,'C':0.6,'D':0.8,'E':1.0,'F':1.2,'G':1.5}
 
+# 발전소별 프레임과 그 파생물(플룸 희소 행렬, 인구 격자 셀, STRtree, 단순화 경계, 풍향 1°별 점수 표 (361 × 행정동))은
+# 경계 geometry까지 담아 크므로 전 발전소를 붙잡아 두지 않고 최근 PLANT_CACHE_SIZE개 발전소만 유지합니다.
+# 밀려난 발전소는 geodata 샤드 캐시(SHARD_CACHE_SIZE)에서 다시 잘라 만들며, 같은 샤드를 같은 순서로 합치므로
+# plant_geodata 행 순서는 다시 만들어도 같습니다. 여러 발전소를 번갈아 자주 보는 배포는 PLANT_CACHE_SIZE를
+# 발전소 수(5)까지 올려 메모리 대신 재계산을 줄일 수 있습니다.
+PLANT_CACHE_SIZE = int(os.getenv('PLANT_CACHE_SIZE', '2'))
+
 # ----------------------------
-# GeoDataFrame 로드 및 전처리
+# GeoDataFrame 로드 (발전소 반경에 걸리는 광역지자체 샤드만 지연 로드)
 # ----------------------------
-def _load_geodata():
-    gdfs = [gpd.read_file(p) for p in REGIONS.values()]
-    gdf = pd.concat(gdfs, ignore_index=True)
-
-    pop_df = pd.read_excel(POP_PATH)
-    pop_df['sido_full'] = pop_df['광역지자체'].map({k:k for k in REGIONS})
-    pop_df['adm_nm_full'] = pop_df['sido_full'] + ' ' + pop_df['행정구역'] + ' ' + pop_df['adm_cd']
-    gdf = gdf.merge(pop_df[['adm_nm_full','population']],
-                    left_on='adm_nm', right_on='adm_nm_full', how='left')
-    gdf.drop(columns=['adm_nm_full'], inplace=True)
-
-    shel_df = pd.read_excel(SHEL_PATH)
-    sg = gpd.GeoDataFrame(shel_df,
-        geometry=gpd.points_from_xy(shel_df.longitude, shel_df.latitude),
-        crs='EPSG:4326')
-    sg = gpd.sjoin(sg, gdf[['adm_nm','geometry']],
-                   how='left', predicate='within')
-    cap_sum = sg.groupby('adm_nm')['capacity'].sum().reset_index().rename(columns={'capacity':'capacity_sum'})
-    gdf = gdf.merge(cap_sum, on='adm_nm', how='left').fillna({'capacity_sum':0})
-
-    proj = gdf.to_crs('EPSG:5179')
-    proj['centroid'] = proj.geometry.centroid
-    gdf['centroid_lat'] = proj['centroid'].to_crs('EPSG:4326').y
-    gdf['centroid_lon'] = proj['centroid'].to_crs('EPSG:4326').x
-
-    return gdf
-
-_GDF = _load_geodata()
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def plant_geodata(plant):
+    """plant 반경 120km 내 중심점을 가진 행정동만 담은 GeoDataFrame (요청 간 공유, 수정 금지)"""
+    lat, lon = power_plants[plant]
+    gdf = geodata.load_within(lat, lon, topsis_engine.MAX_DIST_KM)
+    dist = topsis_engine.haversine_km(lat, lon, gdf['centroid_lat'].to_numpy(), gdf['centroid_lon'].to_numpy())
+    return gdf[dist <= topsis_engine.MAX_DIST_KM].reset_index(drop=True)
 
 # ----------------------------
 # 기상 데이터 조회 및 유틸
 # ----------------------------
-def fetch_weather(plant):
+# 최신/이력 기상 문서 공용 투영과 (풍향, 풍속, 안정도 가중치) 변환 — replay.py도 사용
+WEATHER_FIELDS = {'_id':0, 'time':1, 'winddirection':1, 'wind_direction':1,
+                  'windspeed':1, 'wind_speed':1, 'stability':1}
+
+def _latest_weather_doc(plant):
     code = mapping_codes.get(plant)
     if not code: raise KeyError(f"Unknown plant '{plant}'")
-    doc = col.find_one({'genName':code}, sort=[('time',-1)])
+    doc = col.find_one({'genName':code}, WEATHER_FIELDS, sort=[('time',-1)])
     if not doc: raise ValueError(f"No data for '{plant}'")
-    wd = doc.get('winddirection') or doc.get('wind_direction')
-    ws = doc.get('windspeed') or doc.get('wind_speed')
+    return doc
+
+def weather_from_doc(doc):
+    # 0(북풍, 무풍)도 유효한 값이므로 `or`가 아니라 None일 때만 다른 필드명으로 대체
+    wd = doc.get('winddirection')
+    wd = doc.get('wind_direction') if wd is None else wd
+    ws = doc.get('windspeed')
+    ws = doc.get('wind_speed') if ws is None else ws
     sw = stab_map[korean_to_category.get(doc.get('stability',''), 'D')]
     return wd, ws, sw
 
-def _distance(lat1,lon1,lat2,lon2):
-    R=6371.0;phi1,phi2=math.radians(lat1),math.radians(lat2)
-    dphi,dl=math.radians(lat2-lat1),math.radians(lon2-lon1)
-    a=math.sin(dphi/2)**2+math.cos(phi1)*math.cos(phi2)*math.sin(dl/2)**2
-    return R*2*math.atan2(math.sqrt(a),math.sqrt(1-a))
-
-def _bearing(lat1,lon1,lat2,lon2):
-    lat1r,lat2r=math.radians(lat1),math.radians(lat2)
-    dl=math.radians(lon2-lon1)
-    x,y=math.sin(dl)*math.cos(lat2r), math.cos(lat1r)*math.sin(lat2r)-math.sin(lat1r)*math.cos(lat2r)*math.cos(dl)
-    return (math.degrees(math.atan2(x,y))+360)%360
-
-def _wind_risk(wd,ws,bearing,sw,dist):
-    adj=(wd+180)%360;rel=abs(adj-bearing)
-    if rel>180: rel=360-rel
-    return max(ws*math.cos(math.radians(rel))/(1+0.05*dist)*(1/sw),0)
+def fetch_weather(plant):
+    return weather_from_doc(_latest_weather_doc(plant))
 
 def generate_sector(lat, lon, bearing, width, radius_km=100, points=50):
-    """부채꼴 좌표 생성(풍향 섹터)"""
-    start = bearing - width/2
-    angs = [start + i*(width/points) for i in range(points+1)]
-    coords = [(lat, lon)]
-    for ang in angs:
-        dest = geopy.distance.distance(kilometers=radius_km).destination((lat, lon), ang)
-        coords.append((dest.latitude, dest.longitude))
-    return coords
+    """부채꼴 좌표 생성(풍향 섹터) — topsis_engine.sector의 메모이즈된 tuple (수정 금지)"""
+    return topsis_engine.sector(lat, lon, bearing, width, radius_km, points)
 
 def get_angle_width(stability_weight):
     """안정도 가중치→부채꼴 폭(°) 환산"""
     min_w, max_w = 30, 60
     return max(min_w, min(max_w, max_w - (stability_weight-0.2)*(max_w-min_w)/(1.5-0.2)))
 
+SECTOR_TTL = 60   # 초, 최신 기상 섹터 재사용 시간
+_sectors = {}
+
+def current_sector(plant):
+    """최신 기상 기준 풍하 섹터 꼭짓점 ((lat, lon), ...) — SECTOR_TTL 동안은 MongoDB 조회 없이 재사용"""
+    now = time.monotonic()
+    hit = _sectors.get(plant)
+    if hit is not None and now - hit[0] < SECTOR_TTL:
+        return hit[1]
+    lat, lon = power_plants[plant]
+    wd, ws, sw = fetch_weather(plant)
+    sector = generate_sector(lat, lon, (wd + 180) % 360, get_angle_width(sw))
+    _sectors[plant] = (now, sector)
+    return sector
+
 # ----------------------------
-# TOPSIS 맵 HTML 생성
+# TOPSIS 점수 계산 (벡터화 엔진)
 # ----------------------------
-def generate_topsis_map_html(plant):
+# 풍향 1°별 정확한 점수 표(topsis_lut) — 정확한 계산과 결과가 같으므로 기본 사용, USE_TOPSIS_LUT=0이면 끔
+USE_TOPSIS_LUT = os.getenv('USE_TOPSIS_LUT', '1') != '0'
+# 풍위험 계산 방식: 'cosine'(기본, ws·cos/(1+αd)/sw), 'plume'(가우시안 플룸 격자의 행정동 평균 χ/Q)
+# 또는 'grid'(250m 인구 격자 셀마다 cosine 식을 계산해 행정동별 인구 가중 평균)
+WIND_RISK_BACKEND = os.getenv('WIND_RISK_BACKEND', 'cosine')
+
+def time_context():
+    """현재 시간 맥락 (시간대, 요일 구분) — POI 파일이 없으면 None (정적 인구 사용)"""
+    if poi_context.web_table() is None:
+        return None
+    return poi_context.current_context()
+
+def plant_population(plant, context=None):
+    """context의 동적인구(POI 가중), context가 None이거나 표에 없는 행정동은 정적 인구"""
+    return zone_population(plant_geodata(plant), context)
+
+def zone_population(gdf, context=None):
+    """gdf 행정동 순서의 인구 배열 (plant_population과 같은 규칙)"""
+    population = gdf['population'].to_numpy(dtype=float)
+    if context is None:
+        return population
+    dynamic = poi_context.dynamic_population(gdf[GEO_KEY].to_numpy(), context)
+    if dynamic is None:
+        return population
+    return np.where(np.isnan(dynamic), population, dynamic)
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE * 2)   # 발전소별 현재 맥락 + 바뀌기 직전 맥락
+def plant_static(plant, context=None):
+    """기상과 무관한 항목(거리, 방위, cap_pc1)은 발전소·시간 맥락별로 계산해 캐시"""
+    lat, lon = power_plants[plant]
+    gdf = plant_geodata(plant)
+    return topsis_engine.static_criteria(
+        lat, lon,
+        gdf['centroid_lat'].to_numpy(), gdf['centroid_lon'].to_numpy(),
+        gdf['capacity_sum'].to_numpy(), plant_population(plant, context)
+    )
+
+def lut_path(plant, context=None):
+    if context is None:
+        return os.path.join(topsis_lut.LUT_DIR, f"{mapping_codes[plant]}.npz")
+    slot, day_type = context
+    return os.path.join(topsis_lut.LUT_DIR, f"{mapping_codes[plant]}_{poi_context.SLOT_LABELS[slot]}_{day_type}.npz")
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE * 2)
+def plant_lut(plant, context=None):
+    """python topsis_lut.py로 만든 풍향 1°별 점수 표 (없거나 행정동 데이터와 안 맞으면 None)"""
+    if not USE_TOPSIS_LUT or WIND_RISK_BACKEND != 'cosine':
+        return None
+    return topsis_lut.load_table(lut_path(plant, context), topsis_lut.static_digest(plant_static(plant, context)))
+
+_STAB_CATEGORY = {w: c for c, w in stab_map.items()}
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def plant_zones(plant):
+    """행정동 → 플룸 격자 셀 희소 행렬 (PLANT_CACHE_SIZE개 발전소까지 캐시)"""
+    lat, lon = power_plants[plant]
+    return plume.zonal_matrix(plant_geodata(plant).geometry, lat, lon)
+
+@lru_cache(maxsize=256)
+def plume_risk(plant, wd, ws, category):
+    """(발전소, 풍향 1°, 풍속 0.1m/s, 안정도 등급)별 plant_geodata 행 순서의 평균 χ/Q (공유, 수정 금지)"""
+    risk = plume.zonal_risk(plant_zones(plant), wd, ws, category)
+    risk.flags.writeable = False
+    return risk
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def plant_cells(plant):
+    """반경 내 인구 격자 셀 위치와 셀별 plant_geodata 행 번호(-1 = 반경 밖 행정동) (PLANT_CACHE_SIZE개 발전소까지 캐시)"""
+    lat, lon = power_plants[plant]
+    grid = popgrid.load_grid()
+    cells = popgrid.cells_within(grid, lat, lon, topsis_engine.MAX_DIST_KM)
+    rows = {k: i for i, k in enumerate(plant_geodata(plant)[GEO_KEY].astype(str))}
+    to_row = np.array([rows.get(k, -1) for k in grid.keys], dtype=np.int64)
+    zone = np.asarray(grid.zone).ravel()[cells]
+    return cells, np.where(zone >= 0, to_row[np.maximum(zone, 0)], -1)
+
+@lru_cache(maxsize=256)
+def grid_risk(plant, wd, ws, sw):
+    """(발전소, 풍향 1°, 풍속 0.1m/s, 안정도 가중치)별 plant_geodata 행 순서의 셀 인구 가중 평균 위험 (공유, 수정 금지)
+    셀이 없는 행정동은 중심점 기준 기본 식"""
+    lat, lon = power_plants[plant]
+    gdf = plant_geodata(plant)
+    cells, rows = plant_cells(plant)
+    crit = popgrid.cell_criteria(popgrid.load_grid(), cells, lat, lon, (wd, ws, sw))
+    risk = popgrid.zonal_mean(rows, crit['wind_risk'].astype(float), crit['population'].astype(float), len(gdf))
+    clat, clon = gdf['centroid_lat'].to_numpy(), gdf['centroid_lon'].to_numpy()
+    fallback = topsis_engine.wind_risk(wd, ws, sw, topsis_engine.bearing_deg(lat, lon, clat, clon),
+                                       topsis_engine.haversine_km(lat, lon, clat, clon))
+    risk = np.where(np.isnan(risk), fallback, risk)
+    risk.flags.writeable = False
+    return risk
+
+def wind_risk_override(plant, weather, index):
+    """WIND_RISK_BACKEND가 'plume'/'grid'면 index 행정동의 해당 위험도, 아니면 None(기본 식)"""
+    wd, ws, sw = weather
+    if WIND_RISK_BACKEND == 'plume':
+        return plume_risk(plant, round(float(wd)) % 360, round(float(ws), 1), _STAB_CATEGORY.get(sw, 'D'))[index]
+    if WIND_RISK_BACKEND == 'grid':
+        return grid_risk(plant, round(float(wd)) % 360, round(float(ws), 1), float(sw))[index]
+    return None
+
+def score_plant(plant, weather, context=None):
     """
     plant: '고리','월성','한빛','한울'
-    반환: folium.Map._repr_html_() 형식의 HTML 문자열
-    """
-    if plant not in power_plants:
-        raise KeyError(f"Unsupported plant '{plant}'")
-    lat, lon = power_plants[plant]
-    # MongoDB에서 최신 풍향/풍속/안정도 가중치 가져오기
-    wd, ws, sw = fetch_weather(plant)
-
-    # 1) 지도 초기화 (CartoDB Positron 스타일)
-    m = folium.Map(location=[36.0, 127.5], zoom_start=8, tiles='cartodbpositron')
-    MarkerCluster(name='구호소').add_to(m)
-
-    # 2) 발전소 아이콘 대신 풍향 화살표 추가
-    bearing = (wd + 180) % 360
-    angle_css = bearing
-
-    arrow_html = f"""
-      <div style="
-        display: inline-block;
-        transform-origin: center center;
-        /* ① 회전 먼저 → ② 중앙 이동 */
-        transform: rotate({angle_css}deg) translate(-50%, -50%);
-        font-size: 36px;
-        color: blue;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
-      ">
-        <i class="fa fa-arrow-up"></i>
-      </div>
+    weather: fetch_weather() 결과 (풍향, 풍속, 안정도 가중치)
+    context: (시간대, 요일 구분) — 수용능력 지표에 해당 맥락의 동적인구 사용 (None이면 정적 인구)
+    반환: 반경 120km 내 행정동의 점수 DataFrame (plant_geodata 인덱스, geometry 제외)
+    풍향 표가 있고 풍향이 정수(°)면 TOPSIS 점수는 표의 한 행으로 대신함 (같은 값)
     """
+    gdf = plant_geodata(plant)
+    lut = plant_lut(plant, context)
+    hit = topsis_lut.lookup(lut, weather) if lut is not None else None
+    static = plant_static(plant, context)
+    res = topsis_engine.apply_weather(static, weather, with_topsis=hit is None,
+                                      risk=wind_risk_override(plant, weather, static['index']))
+    if hit is not None:
+        res['topsis'] = hit
+    idx = res.pop('index')
+    df = pd.DataFrame(res, index=gdf.index[idx])
+    return df.join(gdf[['adm_nm', 'capacity_sum', 'population', 'centroid_lat', 'centroid_lon']])
 
-    folium.Marker(
-        [lat, lon],
-        icon=DivIcon(
-            html=arrow_html,
-            icon_size=(50, 50),
-            icon_anchor=(25, 25)
-        ),
-        popup=f"{plant} 발전소 풍향: {wd}°",
-        z_index_offset=1000  # 폴리곤 위에 표시
-    ).add_to(m)
-
-    # 3) sector 그리기
-    width = get_angle_width(sw)
-    coords = generate_sector(lat, lon, bearing, width)
-    folium.Polygon(
-        locations=coords,
-        color='red',
-        weight=2,
-        fill=True,
-        fill_color='red',
-        fill_opacity=0.4,
-        popup=f"풍향: {wd}° / 안정도 가중치: {sw}"
-    ).add_to(m)
-
-
-    # 4) TOPSIS 계산
-    df = _GDF.copy()
-    df['dist']       = df.apply(lambda r: _distance(lat, lon, r['centroid_lat'], r['centroid_lon']), axis=1)
-    df = df[df['dist']<=120]
-    df['dist_score'] = df['dist'].apply(lambda d: d if d<=60 else max(0,120-2*d))
-    df['bearing']    = df.apply(lambda r: _bearing(lat, lon, r['centroid_lat'], r['centroid_lon']), axis=1)
-    df['wind_risk']  = df.apply(lambda r: _wind_risk(wd, ws, r['bearing'], sw, r['dist']), axis=1)
-
-    cap = df[['capacity_sum','population']].fillna(0)
-    df['cap_pc1'] = PCA(n_components=1).fit_transform(StandardScaler().fit_transform(cap)).flatten()
-
-    crit   = df[['dist_score','cap_pc1','wind_risk']].values
-    norm   = MinMaxScaler().fit_transform(crit)
-    w_norm = norm * [0.34,0.33,0.33]
-    best   = [w_norm[:,0].max(), w_norm[:,1].max(), w_norm[:,2].min()]
-    worst  = [w_norm[:,0].min(), w_norm[:,1].min(), w_norm[:,2].max()]
-    df['topsis'] = [
-        (math.sqrt(sum((row[i]-worst[i])**2 for i in range(3))) /
-         (math.sqrt(sum((row[i]-best[i])**2 for i in range(3))) +
-          math.sqrt(sum((row[i]-worst[i])**2 for i in range(3)))))
-        if (sum((row[i]-best[i])**2 for i in range(3)) + sum((row[i]-worst[i])**2 for i in range(3))) > 0
-        else 0
-        for row in w_norm
-    ]
-
-    # 5) 컬러맵 & GeoJson
-    cm_top = cm.LinearColormap(['#313695', 'white', '#a50026'], index=[0, 0.5, 1],
-                               vmin=0, vmax=1, caption='TOPSIS Score')
-    folium.GeoJson(
-        df,
-        style_function=lambda feat: {
-            'fillColor': cm_top(feat['properties']['topsis']),
-            'color': 'black', 'weight': 1, 'fillOpacity': 0.7
-        },
-        tooltip=GeoJsonTooltip(
-            fields=['adm_nm','population','topsis'],
-            aliases=['행정동','인구','TOPSIS'],
-            localize=True
-        )
-    ).add_to(m)
-    cm_top.add_to(m)
-
-    # 6) TOP5 마커
-    for _, row in df.nlargest(5,'topsis').iterrows():
-        folium.Marker(
-            [row['centroid_lat'], row['centroid_lon']],
-            popup=f"{row['adm_nm']} ({row['topsis']:.3f})",
-            icon=folium.Icon(color='darkred', icon='hospital')
-        ).add_to(m)
+# ----------------------------
+# 점수 결과 캐시 (발전소, 최신 NPP_weather 시각) 기준
+# ----------------------------
+ScoreResult = namedtuple('ScoreResult', ['plant', 'time', 'weather', 'scores', 'context'])
 
-    return m._repr_html_()
+_SCORE_CACHE = OrderedDict()
+_SCORE_CACHE_SIZE = 16
+_SCORE_LOCK = threading.Lock()
 
+def get_scores(plant):
+    """
+    최신 기상 문서 시각과 시간 맥락이 같으면 캐시된 ScoreResult를 그대로 반환.
+    더 새로운 문서가 들어오면 다시 계산해 해당 발전소의 이전(시각이 같거나 이른) 결과를 교체하고,
+    이미 더 새로운 결과가 캐시에 있으면 계산한 결과를 돌려주기만 하고 캐시는 그대로 둠.
+    scores DataFrame은 여러 요청이 공유하므로 수정하지 말 것.
+    """
+    if plant not in power_plants:
+        raise KeyError(f"Unsupported plant '{plant}'")
+    doc = _latest_weather_doc(plant)
+    context = time_context()
+    key = (plant, doc.get('time'), context)
+    with _SCORE_LOCK:
+        hit = _SCORE_CACHE.get(key)
+        if hit is not None:
+            _SCORE_CACHE.move_to_end(key)
+            return hit
+
+    weather = weather_from_doc(doc)
+    result = ScoreResult(plant, key[1], weather, score_plant(plant, weather, context), context)
+    with _SCORE_LOCK:
+        # 느린 요청이 오래된 문서로 늦게 끝나도 더 새로운 결과를 밀어내지 않도록 문서 시각을 비교
+        mine = [k for k in _SCORE_CACHE if k[0] == plant]
+        if all((k[1] or '') <= (key[1] or '') for k in mine):
+            for k in mine:
+                del _SCORE_CACHE[k]
+            _SCORE_CACHE[key] = result
+        while len(_SCORE_CACHE) > _SCORE_CACHE_SIZE:
+            _SCORE_CACHE.popitem(last=False)
+    return result
 
 # ----------------------------
 # TOP5 구호소 계산 함수
 # ----------------------------
-def compute_top5_for(plant):
-    """
-    plant: '고리','월성','한빛','한울'
-    반환: 최상위 5개 행정동 정보 리스트
-    """
-    lat, lon = power_plants[plant]
-    wd, ws, sw = fetch_weather(plant)
-    df = _GDF.copy()
-    df['dist']       = df.apply(lambda r: _distance(lat, lon, r['centroid_lat'], r['centroid_lon']), axis=1)
-    df = df[df['dist']<=120]
-    df['dist_score'] = df['dist'].apply(lambda d: d if d<=60 else max(0,120-2*d))
-    df['bearing']    = df.apply(lambda r: _bearing(lat, lon, r['centroid_lat'], r['centroid_lon']), axis=1)
-    df['wind_risk']  = df.apply(lambda r: _wind_risk(wd, ws, r['bearing'], sw, r['dist']), axis=1)
-    cap = df[['capacity_sum','population']].fillna(0)
-    df['cap_pc1'] = PCA(n_components=1).fit_transform(StandardScaler().fit_transform(cap)).flatten()
-
-    crit   = df[['dist_score','cap_pc1','wind_risk']].values
-    norm   = MinMaxScaler().fit_transform(crit)
-    w_norm = norm * [0.34,0.33,0.33]
-    best   = [w_norm[:,0].max(), w_norm[:,1].max(), w_norm[:,2].min()]
-    worst  = [w_norm[:,0].min(), w_norm[:,1].min(), w_norm[:,2].max()]
-    df['topsis_score'] = [
-        (math.sqrt(sum((row[i]-worst[i])**2 for i in range(3))) /
-         (math.sqrt(sum((row[i]-best[i])**2 for i in range(3))) +
-          math.sqrt(sum((row[i]-worst[i])**2 for i in range(3)))))
-        if (sum((row[i]-best[i])**2 for i in range(3))+sum((row[i]-worst[i])**2 for i in range(3)))>0
-        else 0
-        for row in w_norm
-    ]
-
-    top5 = df.nlargest(5, 'topsis_score')
+def top_shelters(result, n=5):
+    """result: get_scores() 결과 → 점수 상위 n개 행정동 정보 리스트"""
     return [
         {
             'name': row['adm_nm'],
             'address': row['adm_nm'],  # 필요시 실제 주소 컬럼으로 수정
             'capacity': int(row['capacity_sum']),
-            'topsis_score': round(float(row['topsis_score']), 3),
+            'topsis_score': round(float(row['topsis']), 3),
             'lat': float(row['centroid_lat']),
             'lon': float(row['centroid_lon'])
         }
-        for _, row in top5.iterrows()
+        for _, row in result.scores.nlargest(n, 'topsis').iterrows()
     ]
+
+def compute_top5_for(plant, result=None):
+    """
+    plant: '고리','월성','한빛','한울'
+    result: get_scores() 결과 (없으면 새로 조회)
+    반환: 최상위 5개 행정동 정보 리스트
+    """
+    return top_shelters(result or get_scores(plant), 5)
+
+
+# ----------------------------
+# 점수 JSON + 정적 행정동 GeoJSON (브라우저에서 GEO_KEY로 조인)
+# ----------------------------
+GEO_KEY = 'adm_cd2'
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE * len(geodata.GEOMETRY_LEVELS))
+def plant_geometry(plant, level):
+    """plant_geodata 경계를 단계별로 단순화·양자화한 GeoSeries (PLANT_CACHE_SIZE개 발전소까지 캐시)"""
+    return geodata.simplify_geometry(plant_geodata(plant).geometry, level)
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE * len(geodata.GEOMETRY_LEVELS))
+def plant_geojson(plant, level=0):
+    """
+    반환: (내용 해시, GeoJSON bytes)
+    행정동 경계는 기상과 무관하므로 발전소·단순화 단계별로 한 번만 직렬화하고,
+    해시가 들어간 URL로 장기 캐시해 제공
+    """
+    gdf = plant_geodata(plant)[[GEO_KEY, 'adm_nm', 'population', 'geometry']]
+    gdf = gdf.set_geometry(plant_geometry(plant, level))
+    body = gdf.to_json(drop_id=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(body).hexdigest()[:16], body
+
+def topsis_payload(plant, result=None, top_n=5):
+    """
+    지도 없이 점수만 담은 dict
+    scores: {GEO_KEY 값: TOPSIS 점수}, top: 상위 top_n 행정동
+    """
+    result = result or get_scores(plant)
+    lat, lon = power_plants[plant]
+    wd, ws, sw = result.weather
+    df = result.scores
+    keys = plant_geodata(plant).loc[df.index, GEO_KEY].astype(str)
+    return {
+        'plant': plant,
+        'time': result.time,
+        'location': [lat, lon],
+        'weather': {'wind_direction': wd, 'wind_speed': ws, 'stability_weight': sw},
+        'context': list(result.context) if result.context else None,
+        'sector': generate_sector(lat, lon, (wd + 180) % 360, get_angle_width(sw)),
+        'key': GEO_KEY,
+        'scores': dict(zip(keys, df['topsis'].round(4).tolist())),
+        'top': top_shelters(result, top_n),
+    }
+
+# ----------------------------
+# 대피 인구 → 구호소 배정 (수용인원 제약)
+# ----------------------------
+@lru_cache(maxsize=16)
+def evacuation_plan(plant, sector, context=None):
+    """(발전소, 섹터, 시간 맥락)별 evacuation.assign() 결과 (공유, 수정 금지)"""
+    return evacuation.assign(plant_geodata(plant), plant_population(plant, context), sector)
+
+def evacuation_payload(plant):
+    """현재 풍하 섹터 기준 배정 결과 dict (요약, 구호소별 부하, 행정동 → 구호소 이동)"""
+    plan = evacuation_plan(plant, current_sector(plant), time_context())
+    zones = plan.zones[['adm_nm', 'population', 'assigned', 'unassigned']]
+    return {
+        'plant': plant,
+        'summary': plan.summary,
+        'zones': zones.sort_values('population', ascending=False).to_dict('records'),
+        'shelters': plan.shelters.sort_values('load', ascending=False).to_dict('records'),
+        'flows': plan.flows[['adm_nm', 'zone_lat', 'zone_lon', 'shelter_name', 'shelter_lat',
+                             'shelter_lon', 'people', 'distance_km']].round({'distance_km': 2}).to_dict('records'),
+    }
+
+# ----------------------------
+# 풍하 섹터 노출 인구 (면적 가중)
+# ----------------------------
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def plant_exposure_index(plant):
+    """plant_geodata 행정동 폴리곤의 투영 좌표 + STRtree (공유, 수정 금지)"""
+    return exposure.build_index(plant_geodata(plant))
+
+@lru_cache(maxsize=64)
+def sector_exposure(plant, sector, context=None):
+    """섹터 모양(꼭짓점 tuple)·시간 맥락별 반경 고리 노출 인구/수용인원 (공유, 수정 금지)"""
+    return tuple(exposure.sector_exposure(
+        plant_exposure_index(plant), plant_population(plant, context),
+        plant_geodata(plant)['capacity_sum'].to_numpy(), sector
+    ))
+
+def exposure_payload(plant):
+    """현재 풍하 섹터 기준 반경별 노출 인구 dict"""
+    return {'plant': plant, 'rings': list(sector_exposure(plant, current_sector(plant), time_context()))}
+
+# ----------------------------
+# 여러 발전소 동시 사고 시나리오 (발전소 × 행정동 한 번에)
+# ----------------------------
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def scenario_geodata(plants):
+    """plants(tuple)의 plant_geodata 합집합 (행정동 중복 제거, 공유, 수정 금지)"""
+    gdf = pd.concat([plant_geodata(p) for p in plants], ignore_index=True)
+    return gdf.drop_duplicates(subset=GEO_KEY).reset_index(drop=True)
+
+def score_scenario(plants, weathers=None, combine='max', context=None):
+    """
+    plants: 발전소 이름 목록, weathers: {발전소: (풍향, 풍속, 안정도 가중치)} (없는 발전소는 최신 기상)
+    combine: topsis_engine.COMBINE ('max' 최악 발전소 / 'sum' 위험 합)
+    반환: (weathers, 점수 DataFrame — 발전소별 risk_<발전소> 열과 가장 가까운 발전소 nearest_plant 포함)
+    """
+    plants = tuple(dict.fromkeys(plants))
+    unknown = [p for p in plants if p not in power_plants]
+    if not plants or unknown:
+        raise KeyError(f"Unsupported plant(s) {unknown or list(plants)}")
+    weathers = {p: tuple((weathers or {}).get(p) or fetch_weather(p)) for p in plants}
+    gdf = scenario_geodata(plants)
+    res = topsis_engine.score_compound(
+        [power_plants[p] for p in plants], [weathers[p] for p in plants],
+        gdf['centroid_lat'].to_numpy(), gdf['centroid_lon'].to_numpy(),
+        gdf['capacity_sum'].to_numpy(), zone_population(gdf, context), combine
+    )
+    idx = res['index']
+    df = pd.DataFrame({k: res[k] for k in ('dist', 'dist_score', 'cap_pc1', 'wind_risk', 'topsis')},
+                      index=gdf.index[idx])
+    for i, p in enumerate(plants):
+        df[f'risk_{p}'] = res['plant_risk'][i]
+    df['nearest_plant'] = np.asarray(plants)[res['nearest']]
+    return weathers, df.join(gdf[[GEO_KEY, 'adm_nm', 'capacity_sum', 'population', 'centroid_lat', 'centroid_lon']])
+
+def scenario_payload(plants, weathers=None, combine='max', top_n=5):
+    """동시 사고 시나리오 점수 dict (scores: {GEO_KEY 값: TOPSIS 점수}, 발전소별 기상·섹터, top)"""
+    context = time_context()
+    weathers, df = score_scenario(plants, weathers, combine, context)
+    top = df.nlargest(top_n, 'topsis')
+    return {
+        'plants': [
+            {'plant': p, 'location': list(power_plants[p]),
+             'weather': {'wind_direction': wd, 'wind_speed': ws, 'stability_weight': sw},
+             'sector': generate_sector(*power_plants[p], (wd + 180) % 360, get_angle_width(sw))}
+            for p, (wd, ws, sw) in weathers.items()
+        ],
+        'combine': combine,
+        'context': list(context) if context else None,
+        'key': GEO_KEY,
+        'scores': dict(zip(df[GEO_KEY].astype(str), df['topsis'].round(4).tolist())),
+        'top': [
+            {'name': r.adm_nm, 'capacity': int(r.capacity_sum), 'topsis_score': round(float(r.topsis), 3),
+             'lat': float(r.centroid_lat), 'lon': float(r.centroid_lon), 'nearest_plant': r.nearest_plant}
+            for r in top.itertuples()
+        ],
+    }
+
+# ----------------------------
+# 다기준 의사결정 비교 (TOPSIS / VIKOR / PROMETHEE II)
+# ----------------------------
+# commercial_index(유동인구지수, 작을수록 좋음)는 POI 맥락 캐시가 있을 때만 — 가중치는 topsis_upgrade의 4기준과 같음
+MCDA_CRITERIA = ['dist_score', 'cap_pc1', 'wind_risk', 'commercial_index']
+MCDA_WEIGHTS = (0.28, 0.28, 0.22, 0.22)
+MCDA_BENEFIT = (True, True, False, False)
+
+def mcda_criteria(plant, result):
+    """
+    result.scores 행 순서의 (기준 이름, (n, k) 행렬, 가중치, 방향)
+    현재 시간 맥락의 유동인구지수가 없으면(POI 파일/캐시 없음) commercial_index를 빼고 웹 3기준
+    """
+    df = result.scores
+    base = MCDA_CRITERIA[:3]
+    ci = None
+    if result.context is not None:
+        ci = poi_context.commercial_index(plant_geodata(plant).loc[df.index, GEO_KEY].to_numpy(), result.context)
+    if ci is None:
+        return base, df[base].to_numpy(), topsis_engine.DEFAULT_WEIGHTS, topsis_engine.DEFAULT_BENEFIT
+    return MCDA_CRITERIA, np.column_stack([df[base].to_numpy(), ci]), MCDA_WEIGHTS, MCDA_BENEFIT
+
+def mcda_payload(plant, result=None, methods=mcda.METHODS, top_n=5):
+    """
+    get_scores() 기준 행렬(+ 유동인구지수) 하나로 methods 순위를 모두 매긴 dict
+    scores: {방법: {GEO_KEY 값: 점수}}, top: {방법: 상위 top_n}, agreement: 방법 쌍별 Spearman/TOP n 겹침
+    """
+    result = result or get_scores(plant)
+    df = result.scores
+    criteria, crit, weights, benefit = mcda_criteria(plant, result)
+    ranking = mcda.evaluate(crit, weights, benefit, methods=methods, top_k=top_n)
+    keys = plant_geodata(plant).loc[df.index, GEO_KEY].astype(str).tolist()
+    names = df['adm_nm'].to_numpy()
+    return {
+        'plant': plant,
+        'time': result.time,
+        'methods': list(ranking.methods),
+        'criteria': criteria,
+        'key': GEO_KEY,
+        'scores': {m: dict(zip(keys, np.round(s, 4).tolist())) for m, s in ranking.scores.items()},
+        'top': {
+            m: [{'name': names[i], 'score': round(float(ranking.scores[m][i]), 3)}
+                for i in np.argsort(ranking.ranks[m])[:top_n]]
+            for m in ranking.methods
+        },
+        'agreement': {
+            'spearman': np.round(ranking.spearman, 4).tolist(),
+            f'top{top_n}_overlap': np.round(ranking.overlap, 4).tolist(),
+        },
+    }
@@ -0,0 +1,117 @@
+# mcda.py
+# 하나의 기준 행렬(dist_score, cap_pc1, wind_risk[, commercial_index])을 한 번만 정규화하고
+# TOPSIS, VIKOR, PROMETHEE II 세 방법으로 행정동 순위를 매겨 방법 간 일치도를 함께 돌려줍니다.
+#
+# 정규화 행렬은 열마다 Min-Max 후 비용 기준을 뒤집어 "1 = 가장 좋음"으로 맞춥니다.
+# PROMETHEE II의 쌍대 비교는 (행 블록 × n × k) 단위로 나눠 메모리를 블록 크기로 묶어 둡니다.
+
+from collections import namedtuple
+import numpy as np
+import topsis_engine
+
+METHODS = ('topsis', 'vikor', 'promethee')
+PROMETHEE_BLOCK_ELEMS = 4_000_000   # 블록당 (행 × n × k) 원소 수 상한 (float64 약 32MB)
+
+# scores: {방법: (n,) 점수, 클수록 좋음}, ranks: {방법: (n,) 순위, 1 = 최고}
+# spearman: (방법 × 방법) 순위 상관, overlap: (방법 × 방법) TOP k 겹침 비율
+Ranking = namedtuple('Ranking', ['methods', 'scores', 'ranks', 'spearman', 'overlap'])
+
+
+def normalize(crit, benefit):
+    """crit: (n, k) → 열별 Min-Max 후 비용 기준(benefit=False)은 1 - x, 모든 열이 클수록 좋음"""
+    x = topsis_engine.minmax(np.nan_to_num(np.asarray(crit, dtype=float)))
+    return np.where(np.asarray(benefit, dtype=bool), x, 1 - x)
+
+
+def _weights(weights, k):
+    w = np.asarray(weights, dtype=float)
+    if w.shape != (k,):
+        raise ValueError(f"Expected {k} weights, got {w.shape}")
+    return w / w.sum()
+
+
+# ----------------------------
+# 방법별 커널 (정규화 행렬 x: (n, k), 클수록 좋음)
+# ----------------------------
+def topsis(x, weights):
+    """근접도 d_worst / (d_best + d_worst)"""
+    return topsis_engine.topsis(x, weights, np.ones(x.shape[1], dtype=bool))
+
+
+def vikor(x, weights, v=0.5):
+    """1 - Q (Q: 집단 효용 S와 개별 후회 R의 가중 결합, 작을수록 좋음)"""
+    best, worst = x.max(axis=0), x.min(axis=0)
+    rng = np.where(best - worst == 0, 1.0, best - worst)
+    gap = weights * (best - x) / rng
+    s, r = gap.sum(axis=1), gap.max(axis=1)
+
+    def scaled(a):
+        span = a.max() - a.min()
+        return (a - a.min()) / span if span > 0 else np.zeros_like(a)
+
+    return 1 - (v * scaled(s) + (1 - v) * scaled(r))
+
+
+def promethee(x, weights, p=1.0, q=0.0, block=None):
+    """
+    PROMETHEE II 순흐름 φ = φ+ - φ- (선형 선호함수: 차이 ≤ q → 0, ≥ p → 1)
+    (행 블록, n, k) 차이 텐서만 만들어 메모리는 블록 크기에 비례
+    """
+    n, k = x.shape
+    if n < 2:
+        return np.zeros(n)
+    p, q = np.broadcast_to(p, (k,)), np.broadcast_to(q, (k,))
+    span = np.where(p - q > 0, p - q, 1.0)
+    block = block or max(1, PROMETHEE_BLOCK_ELEMS // (n * k))
+    phi = np.empty(n)
+    for s in range(0, n, block):
+        d = x[s:s + block, None, :] - x[None, :, :]
+        pos = np.clip((d - q) / span, 0, 1) @ weights
+        neg = np.clip((-d - q) / span, 0, 1) @ weights
+        phi[s:s + block] = (pos - neg).sum(axis=1)
+    return phi / (n - 1)
+
+
+KERNELS = {'topsis': topsis, 'vikor': vikor, 'promethee': promethee}
+
+
+# ----------------------------
+# 순위 / 일치도
+# ----------------------------
+def ranks_of(scores):
+    """(n,) 점수 → 순위 (1 = 최고)"""
+    ranks = np.empty(len(scores), dtype=np.int32)
+    ranks[np.argsort(-scores, kind='stable')] = np.arange(1, len(scores) + 1)
+    return ranks
+
+
+def agreement(ranks, methods, top_k=5):
+    """방법 쌍별 Spearman 순위 상관과 TOP k 겹침 비율 (방법 × 방법 배열)"""
+    m = len(methods)
+    r = np.array([ranks[a] for a in methods], dtype=float)
+    n = r.shape[1]
+    if n < 2:
+        return np.ones((m, m)), np.ones((m, m))
+    d2 = ((r[:, None, :] - r[None, :, :]) ** 2).sum(axis=-1)
+    spearman = 1 - 6 * d2 / (n * (n ** 2 - 1))
+    top = r <= top_k
+    overlap = (top[:, None, :] & top[None, :, :]).sum(axis=-1) / max(min(top_k, n), 1)
+    return spearman, overlap
+
+
+def evaluate(crit, weights=topsis_engine.DEFAULT_WEIGHTS, benefit=topsis_engine.DEFAULT_BENEFIT,
+             methods=METHODS, top_k=5, vikor_v=0.5, promethee_p=1.0, promethee_q=0.0):
+    """
+    crit: (n, k) 원 기준 행렬, weights/benefit: (k,)
+    반환: Ranking — 정규화는 한 번만 하고 methods 순서대로 각 커널 적용
+    """
+    unknown = [m for m in methods if m not in KERNELS]
+    if unknown:
+        raise ValueError(f"Unknown MCDA method(s) {unknown} (expected {list(KERNELS)})")
+    x = normalize(crit, benefit)
+    w = _weights(weights, x.shape[1])
+    options = {'vikor': {'v': vikor_v}, 'promethee': {'p': promethee_p, 'q': promethee_q}}
+    scores = {m: KERNELS[m](x, w, **options.get(m, {})) for m in methods}
+    ranks = {m: ranks_of(s) for m, s in scores.items()}
+    spearman, overlap = agreement(ranks, methods, top_k)
+    return Ranking(tuple(methods), scores, ranks, spearman, overlap)
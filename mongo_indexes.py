@@ -0,0 +1,219 @@
+# mongo_indexes.py
+# 라우트가 자주 쓰는 MongoDB 조회(필터 + 정렬)에 필요한 인덱스를 한곳에 선언하고,
+# 앱 시작 시 create_indexes로 보장합니다 (이미 있으면 아무 일도 하지 않음).
+# 각 라우트의 조회 모양을 explain()으로 확인해 COLLSCAN이나 메모리 정렬(SORT)로 떨어지면 실패합니다.
+#
+# 배포 시 인덱스는 CLI로 만듭니다 (큰 컬렉션은 빌드가 오래 걸려 앱 기동 경로에 두지 않음).
+# 앱 기동 시에도 보장하려면 ENSURE_MONGO_INDEXES=1.
+#
+# 예) 인덱스 보장 + 조회 계획 점검 (실패한 조회가 있으면 종료 코드 1):
+#     python mongo_indexes.py --ensure
+# 예) 점검만, 실행 통계 포함:
+#     python mongo_indexes.py --stats
+
+import os
+import sys
+import time
+import logging
+import argparse
+from collections import namedtuple
+from pymongo import MongoClient, ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+import rollups
+
+DB_NAME = 'Data'
+
+# 컬렉션 → 인덱스 (이름을 고정해 두면 다시 만들어도 같은 인덱스로 인식)
+INDEXES = {
+    'NPP_weather': [
+        IndexModel([('genName', ASCENDING), ('time', DESCENDING)], name='genName_time'),
+        IndexModel([('region', ASCENDING), ('time', DESCENDING)], name='region_time'),
+    ],
+    'NPP_weather_backup': [
+        IndexModel([('genName', ASCENDING), ('time', DESCENDING), ('_id', DESCENDING)], name='genName_time_id'),
+        IndexModel([('time', DESCENDING)], name='time'),
+    ],
+    'nuclear_radiation': [
+        IndexModel([('genName', ASCENDING), ('expl', ASCENDING), ('time', ASCENDING)], name='genName_expl_time'),
+        IndexModel([('genName', ASCENDING), ('value', DESCENDING)], name='genName_value'),
+        IndexModel([('genName', ASCENDING), ('time', DESCENDING), ('_id', DESCENDING)], name='genName_time_id'),
+        IndexModel([('time', DESCENDING), ('_id', DESCENDING)], name='time_id'),
+    ],
+    'nuclear_radiation_backup': [
+        IndexModel([('genName', ASCENDING), ('expl', ASCENDING), ('time', ASCENDING), ('_id', ASCENDING)],
+                   name='genName_expl_time_id'),
+        IndexModel([('time', DESCENDING)], name='time'),
+    ],
+    'Busan_radiation': [
+        IndexModel([('time', DESCENDING)], name='time'),
+    ],
+    'Busan_radiation_backup': [
+        IndexModel([('locNm', ASCENDING), ('time', DESCENDING), ('_id', DESCENDING)], name='locNm_time_id'),
+        IndexModel([('time', DESCENDING)], name='time'),
+    ],
+    'radiation_stats': [
+        IndexModel([('date', DESCENDING)], name='date'),
+    ],
+}
+
+# 키셋 페이지네이션에서 _id를 붙이며 대체된 이전 인덱스 (남아 있으면 중복 접두 인덱스라 ensure_indexes에서 삭제)
+SUPERSEDED = {
+    'NPP_weather_backup': ['genName_time'],
+    'nuclear_radiation': ['time'],
+    'nuclear_radiation_backup': ['genName_expl_time'],
+    'Busan_radiation_backup': ['locNm_time'],
+}
+
+# 시간별/일별 집계 컬렉션 (rollups.SOURCES에서 생성)
+INDEXES.update(rollups.rollup_indexes())
+
+# 라우트별 조회 모양 (필터 값은 대표 예시)
+# 목록 API는 (time, _id) 키셋 페이지네이션이라 정렬에 _id가 붙음 (utils.keyset_page)
+QueryShape = namedtuple('QueryShape', ['route', 'collection', 'filter', 'sort', 'limit'])
+
+QUERY_SHAPES = [
+    QueryShape('/weather/<genName> (latest)', 'NPP_weather_backup', {'genName': 'KR'}, [('time', -1)], 1),
+    QueryShape('/api/data/<genName>/filtered', 'NPP_weather_backup',
+               {'genName': 'KR', 'time': {'$gte': '2024-01-01 00:00', '$lt': '2024-02-01 00:00'}},
+               [('time', -1), ('_id', -1)], 0),
+    QueryShape('map_utils latest weather', 'NPP_weather', {'genName': 'KR'}, [('time', -1)], 1),
+    QueryShape('/api/get_recent_plant_data', 'NPP_weather', {'region': 'KR'}, [('time', -1)], 1),
+    QueryShape('/api/nuclear_radiation/history', 'nuclear_radiation', {'genName': 'KR', 'expl': 'x'}, [('time', 1)], 0),
+    QueryShape('/api/nuclear_radiation/backup', 'nuclear_radiation_backup', {'genName': 'KR', 'expl': 'x'},
+               [('time', 1), ('_id', 1)], 0),
+    QueryShape('/api/nuclear_radiation/highest_by_plant', 'nuclear_radiation', {'genName': 'KR'}, [('value', -1)], 1),
+    QueryShape('/api/nuclear_radiation (date)', 'nuclear_radiation',
+               {'time': {'$gte': '2024-01-01 00:00', '$lt': '2024-01-02 00:00'}}, [('time', -1), ('_id', -1)], 0),
+    QueryShape('/api/nuclear_radiation (genName)', 'nuclear_radiation', {'genName': 'KR'}, [('time', -1), ('_id', -1)], 0),
+    QueryShape('latest refresh (NPP_weather_backup)', 'NPP_weather_backup',
+               {'time': {'$gte': '2024-01-01 00:00'}}, [('time', 1)], 0),
+    QueryShape('/api/busan_radiation/history', 'Busan_radiation_backup', {'locNm': 'x'}, [('time', -1), ('_id', -1)], 0),
+    QueryShape('rollups incremental (nuclear_radiation_backup)', 'nuclear_radiation_backup',
+               {'time': {'$gte': '2024-01-01 00:00'}}, [('time', -1)], 1),
+    QueryShape('/api/nuclear_radiation/history (rollup)', 'nuclear_radiation_hour',
+               {'genName': 'KR', 'expl': 'x', 'time': {'$gte': '2024-01-01 00:00', '$lt': '2024-02-01 00:00'}},
+               [('time', 1)], 0),
+    QueryShape('/api/busan_radiation/history (rollup)', 'Busan_radiation_backup_day', {'locNm': 'x'}, [('time', 1)], 0),
+    QueryShape('/api/data/<genName>/filtered (rollup)', 'NPP_weather_backup_day', {'genName': 'KR'}, [('time', 1)], 0),
+    QueryShape('/radiation_summary', 'radiation_stats', {}, [('date', -1)], 35),
+]
+
+# 실패로 보는 실행 단계: 전체 스캔, 인덱스 없이 메모리에서 정렬
+BAD_STAGES = {'COLLSCAN', 'SORT'}
+
+
+# ----------------------------
+# 인덱스 보장
+# ----------------------------
+def ensure_indexes(db, indexes=INDEXES):
+    """
+    컬렉션마다 따로 인덱스를 만들고 SUPERSEDED 인덱스를 지운 뒤 {컬렉션: 인덱스 이름 목록 또는 PyMongoError} 반환
+    한 컬렉션이 실패해도(예: 같은 키의 인덱스가 다른 이름으로 이미 있음) 나머지는 계속 보장
+    """
+    result = {}
+    for name, models in indexes.items():
+        try:
+            result[name] = db[name].create_indexes(models)
+            declared = {m.document['name'] for m in models}
+            existing = db[name].index_information()
+            for old in SUPERSEDED.get(name, []):
+                if old in existing and old not in declared:
+                    db[name].drop_index(old)
+                    logging.info(f"{name}: dropped superseded index {old}")
+        except PyMongoError as e:
+            logging.warning(f"{name} 인덱스 보장 실패: {e}")
+            result[name] = e
+    return result
+
+
+def ensure_indexes_on_startup(db):
+    """ENSURE_MONGO_INDEXES=1일 때만 앱 기동 시 인덱스 보장 (기본은 python mongo_indexes.py --ensure)"""
+    if os.getenv('ENSURE_MONGO_INDEXES', '0') != '1':
+        return None
+    t = time.perf_counter()
+    result = ensure_indexes(db)
+    failed = sum(isinstance(r, PyMongoError) for r in result.values())
+    logging.info(f"MongoDB indexes ensured on {len(result) - failed}/{len(result)} collections "
+                 f"({time.perf_counter() - t:.2f}s)")
+    return result
+
+
+# ----------------------------
+# 조회 계획 점검
+# ----------------------------
+def _walk(plan):
+    """explain() 계획 트리(고전/SBE 형식 모두)의 모든 dict 노드"""
+    if isinstance(plan, dict):
+        yield plan
+        for v in plan.values():
+            yield from _walk(v)
+    elif isinstance(plan, list):
+        for v in plan:
+            yield from _walk(v)
+
+
+def plan_stages(plan):
+    """winningPlan에 나오는 stage 이름 목록 (위에서 아래 순서)"""
+    return [node['stage'] for node in _walk(plan) if 'stage' in node]
+
+
+def explain_shape(db, shape):
+    """반환: {'route', 'collection', 'stages', 'index', 'ok', 실행 통계...}"""
+    cursor = db[shape.collection].find(shape.filter).sort(shape.sort)
+    if shape.limit:
+        cursor = cursor.limit(shape.limit)
+    explain = cursor.explain()
+    plan = explain.get('queryPlanner', {}).get('winningPlan', {})
+    stages = plan_stages(plan)
+    stats = explain.get('executionStats', {})
+    return {
+        'route': shape.route,
+        'collection': shape.collection,
+        'stages': stages,
+        'index': next((node['indexName'] for node in _walk(plan) if 'indexName' in node), None),
+        'ok': not BAD_STAGES.intersection(stages),
+        'keys_examined': stats.get('totalKeysExamined'),
+        'docs_examined': stats.get('totalDocsExamined'),
+        'returned': stats.get('nReturned'),
+        'millis': stats.get('executionTimeMillis'),
+    }
+
+
+def check_plans(db, shapes=QUERY_SHAPES):
+    """모든 조회 모양의 explain 결과 목록"""
+    return [explain_shape(db, s) for s in shapes]
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='MongoDB 인덱스 보장 및 라우트 조회 계획 점검')
+    p.add_argument('--uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+    p.add_argument('--db', default=DB_NAME)
+    p.add_argument('--ensure', action='store_true', help='점검 전에 선언된 인덱스를 만듦')
+    p.add_argument('--stats', action='store_true', help='키/문서 검사 수와 실행 시간도 출력')
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    db = MongoClient(args.uri)[args.db]
+    if args.ensure:
+        for name, created in ensure_indexes(db).items():
+            print(f"{name}: {created if isinstance(created, PyMongoError) else ', '.join(created)}")
+
+    results = check_plans(db)
+    for r in results:
+        line = f"{'OK  ' if r['ok'] else 'FAIL'} {r['route']:<45} {r['collection']:<26} {r['index'] or '-':<20} {'>'.join(r['stages'])}"
+        if args.stats:
+            line += f"  keys={r['keys_examined']} docs={r['docs_examined']} n={r['returned']} {r['millis']}ms"
+        print(line)
+    failed = [r for r in results if not r['ok']]
+    if failed:
+        print(f"{len(failed)}/{len(results)} 조회가 COLLSCAN 또는 메모리 정렬을 사용합니다")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
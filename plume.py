@@ -0,0 +1,102 @@
+# plume.py
+# Pasquill–Gifford 가우시안 플룸으로 발전소 주변 격자(기본 200×200km, 500m)의 지표 농도(χ/Q, s/m³)를 계산하고
+# 행정동별 면적 가중 평균(격자 셀 중심이 폴리곤 안에 드는 셀의 평균)을 wind_risk 대신 쓸 수 있게 합니다.
+#
+#  - 확산 계수: Briggs(1973) 전원 지역 식, 안정도 A~F. G(심한 안정)는 표에 없어 F 계수의 2/3을 사용
+#  - 방출 높이 RELEASE_HEIGHT_M, 지면 반사 포함, 바람이 불어가는 쪽(x > 0)만 농도 존재
+#  - 풍속 MIN_WIND_SPEED 미만(정온)은 MIN_WIND_SPEED로 계산
+#  - 격자 밖(100km 초과) 행정동은 0
+#
+# 격자 좌표와 행정동 → 셀 희소 행렬은 발전소별로 한 번 만들고, 이후 계산은 배열 연산 + 희소 행렬곱입니다.
+
+from functools import lru_cache
+import numpy as np
+import geopandas as gpd
+import shapely
+from scipy import sparse
+
+GRID_HALF_KM = 100
+GRID_RES_M = 500
+RELEASE_HEIGHT_M = 50
+MIN_WIND_SPEED = 0.5
+PROJ_CRS = 'EPSG:5179'
+
+# Briggs 전원 지역: σy = a·x·(1 + 0.0001x)^-½, σz = b·x·(1 + c·x)^p  (x: m)
+BRIGGS = {
+    'A': (0.22,  0.20,  0.0,    0.0),
+    'B': (0.16,  0.12,  0.0,    0.0),
+    'C': (0.11,  0.08,  0.0002, -0.5),
+    'D': (0.08,  0.06,  0.0015, -0.5),
+    'E': (0.06,  0.03,  0.0003, -1.0),
+    'F': (0.04,  0.016, 0.0003, -1.0),
+    'G': (0.027, 0.011, 0.0003, -1.0),
+}
+
+
+def sigma_yz(x, category):
+    """풍하 거리 x(m)에서 수평/수직 확산 계수 (m)"""
+    a, b, c, p = BRIGGS[category]
+    return a * x / np.sqrt(1 + 0.0001 * x), b * x * (1 + c * x) ** p
+
+
+def ground_concentration(dx, dy, wd, ws, category, height=RELEASE_HEIGHT_M):
+    """
+    dx, dy: 발전소 기준 동/북 방향 오프셋(m) 배열
+    wd: 풍향(바람이 불어오는 방향°), ws: 풍속(m/s), category: 'A'~'G'
+    반환: 지표 χ/Q (s/m³), 풍상측은 0
+    """
+    to = np.radians((wd + 180) % 360)
+    x = dx * np.sin(to) + dy * np.cos(to)       # 풍하 거리
+    y = dx * np.cos(to) - dy * np.sin(to)       # 풍횡 거리
+    u = max(float(ws), MIN_WIND_SPEED)
+    out = np.zeros(np.broadcast(x, y).shape)
+    down = x > 1.0
+    sy, sz = sigma_yz(x[down], category)
+    out[down] = (np.exp(-y[down] ** 2 / (2 * sy ** 2)) * np.exp(-height ** 2 / (2 * sz ** 2))
+                 / (np.pi * u * sy * sz))
+    return out
+
+
+# ----------------------------
+# 격자 / 행정동 구역 통계
+# ----------------------------
+@lru_cache(maxsize=4)
+def grid_offsets(half_km=GRID_HALF_KM, res_m=GRID_RES_M):
+    """격자 셀 중심의 (dx, dy) 오프셋(m), 각 (m, m) 배열"""
+    ax = np.arange(-half_km * 1000 + res_m / 2, half_km * 1000, res_m)
+    return np.meshgrid(ax, ax[::-1])
+
+
+def zonal_matrix(geoms, lat, lon, half_km=GRID_HALF_KM, res_m=GRID_RES_M):
+    """
+    geoms: 행정동 EPSG:4326 GeoSeries (n개)
+    반환: (n, 셀 수) 희소 행렬 — 행마다 폴리곤 안에 중심이 있는 셀의 평균 가중치(합 1).
+    셀 중심이 하나도 없는 작은 행정동은 대표점이 속한 셀 하나 (격자 밖이면 빈 행)
+    """
+    origin = gpd.GeoSeries(gpd.points_from_xy([lon], [lat]), crs='EPSG:4326').to_crs(PROJ_CRS).iloc[0]
+    proj = geoms.to_crs(PROJ_CRS).reset_index(drop=True)
+    dx, dy = grid_offsets(half_km, res_m)
+    px, py = (origin.x + dx).ravel(), (origin.y + dy).ravel()
+
+    cell_idx, geom_idx = shapely.STRtree(proj.values).query(shapely.points(px, py), predicate='within')
+    rows, cols = [geom_idx], [cell_idx]
+
+    missing = np.setdiff1d(np.arange(len(proj)), geom_idx)
+    if len(missing):
+        rep = shapely.point_on_surface(proj.values[missing])
+        side, n_side = int(round(half_km * 1000 / res_m)), dx.shape[1]
+        col = np.floor((shapely.get_x(rep) - origin.x) / res_m).astype(int) + side
+        row = side - 1 - np.floor((shapely.get_y(rep) - origin.y) / res_m).astype(int)
+        inside = (col >= 0) & (col < n_side) & (row >= 0) & (row < n_side)
+        rows.append(missing[inside])
+        cols.append(row[inside] * n_side + col[inside])
+
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    counts = np.bincount(rows, minlength=len(proj))
+    return sparse.csr_matrix((1.0 / counts[rows], (rows, cols)), shape=(len(proj), px.size))
+
+
+def zonal_risk(zones, wd, ws, category, half_km=GRID_HALF_KM, res_m=GRID_RES_M, height=RELEASE_HEIGHT_M):
+    """zonal_matrix() 결과로 행정동별 평균 χ/Q (n,)"""
+    dx, dy = grid_offsets(half_km, res_m)
+    return zones @ ground_concentration(dx, dy, wd, ws, category, height).ravel()
@@ -0,0 +1,266 @@
+# poi_context.py
+# 시간 맥락(시간대 4 × 평일/주말/방학 3 = 12가지)별 업종 가중치로 행정동 유동인구지수와 동적인구를 계산합니다.
+# POI CSV를 (업종 × 행정동) 점포 수 행렬로 한 번만 집계하고, 12가지 가중치 세트를 (12 × 업종) 행렬로 묶어
+# 행렬곱 한 번으로 모든 맥락의 poi_weighted를 구합니다.
+# topsis_upgrade(배치 분석)와 map_utils(웹 점수)가 같은 계산을 공유합니다.
+#
+# 웹용 맥락 동적인구 캐시 만들기(배포 시/POI·행정동 데이터 변경 시):  python poi_context.py
+
+import os
+import json
+import hashlib
+import time
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import topsis_engine
+import geodata
+
+POI_PATH = os.getenv('POI_PATH', os.path.join(geodata.BASE_DIR, 'data', 'poi_data.csv'))
+CACHE_PATH = os.path.join(geodata.CACHE_DIR, 'poi_context.npz')
+POP_ALPHA = 0.5   # 동적인구 = 인구 × (1 + POP_ALPHA × 유동인구지수)
+ADM_KEYS = ['시도명', '시군구명', '행정동명']
+CATEGORY_COL = '상권업종중분류명'
+
+# ==========================================
+# 시간대/요일/방학 자동 판별 함수
+# ==========================================
+def get_time_context(now=None):
+    now = now or datetime.now()
+    hour, weekday = now.hour, now.weekday()  # 0=월, 6=일
+
+    # 시간대 분류
+    if 6 <= hour < 12:
+        slot = '오전'
+    elif 12 <= hour < 18:
+        slot = '오후'
+    elif 18 <= hour < 24:
+        slot = '야간'
+    else:
+        slot = '심야'
+
+    # 주말 판별
+    is_weekend = (weekday >= 5)
+
+    # 방학(여름/겨울) 예시
+    is_summer_vac = (now.month == 7 and now.day >= 20) or (now.month == 8 and now.day <= 20)
+    is_winter_vac = (now.month == 12 and now.day >= 24) or (now.month == 1 and now.day <= 31)
+    is_vacation = is_summer_vac or is_winter_vac
+
+    return slot, is_weekend, is_vacation
+
+# ==========================================
+# 업종별 시간대별 가중치 세트 (평일/주말/방학)
+# ==========================================
+# --- 평일
+time_weights_weekday = {
+    '오전': {
+        '한식': 0.8, '식료품 소매': 0.6, '의원': 0.5, '이용·미용': 0.4, '주점': 0.2, '일반 숙박': 0.2,
+        '초등학교': 0.8, '중학교': 0.7, '고등학교': 0.9,
+    },
+    '오후': {
+        '한식': 0.6, '식료품 소매': 0.5, '입시·교과학원': 0.7, '카페': 0.6, '주점': 0.3, '일반 숙박': 0.2,
+        '초등학교': 0.5, '중학교': 0.8, '고등학교': 1.0,
+    },
+    '야간': {
+        '주점': 0.9, '한식': 0.5, '일반 숙박': 0.6, '모텔/여관': 0.7,
+        '초등학교': 0.1, '중학교': 0.2, '고등학교': 0.6,
+    },
+    '심야': {
+        '주점': 0.7, '일반 숙박': 0.9,
+        '초등학교': 0.05, '중학교': 0.05, '고등학교': 0.1,
+    }
+}
+# --- 주말(음식/카페/숙박↑, 학교↓)
+time_weights_weekend = {
+    '오전': {
+        '한식': 1.0, '식료품 소매': 0.8, '의원': 0.3, '이용·미용': 0.6, '주점': 0.3, '일반 숙박': 0.4,
+        '초등학교': 0.3, '중학교': 0.2, '고등학교': 0.2,
+    },
+    '오후': {
+        '한식': 1.1, '식료품 소매': 0.7, '입시·교과학원': 0.4, '카페': 0.9, '주점': 0.6, '일반 숙박': 0.5,
+        '초등학교': 0.2, '중학교': 0.2, '고등학교': 0.2,
+    },
+    '야간': {
+        '주점': 1.2, '한식': 0.6, '일반 숙박': 0.8, '모텔/여관': 1.0,
+        '초등학교': 0.05, '중학교': 0.05, '고등학교': 0.1,
+    },
+    '심야': {
+        '주점': 1.0, '일반 숙박': 1.1,
+        '초등학교': 0.01, '중학교': 0.01, '고등학교': 0.05,
+    }
+}
+# --- 방학(학교 대폭↓, 학원도 조정)
+time_weights_vacation = {
+    '오전': {
+        '한식': 0.9, '식료품 소매': 0.7, '의원': 0.4, '이용·미용': 0.5, '주점': 0.2, '일반 숙박': 0.2,
+        '초등학교': 0.2, '중학교': 0.15, '고등학교': 0.25,
+    },
+    '오후': {
+        '한식': 0.7, '식료품 소매': 0.6, '입시·교과학원': 0.6, '카페': 0.7, '주점': 0.4, '일반 숙박': 0.3,
+        '초등학교': 0.1, '중학교': 0.1, '고등학교': 0.2,
+    },
+    '야간': {
+        '주점': 1.0, '한식': 0.6, '일반 숙박': 0.7, '모텔/여관': 0.8,
+        '초등학교': 0.01, '중학교': 0.01, '고등학교': 0.05,
+    },
+    '심야': {
+        '주점': 0.9, '일반 숙박': 1.0,
+        '초등학교': 0.01, '중학교': 0.01, '고등학교': 0.01,
+    }
+}
+default_weight = 0.4
+
+SLOTS = ['오전', '오후', '야간', '심야']
+SLOT_LABELS = {'오전': 'morning', '오후': 'afternoon', '야간': 'evening', '심야': 'night'}  # 이미지 제목용
+DAY_TYPES = {
+    'weekday':  time_weights_weekday,
+    'weekend':  time_weights_weekend,
+    'vacation': time_weights_vacation,
+}
+# 전체 시간 맥락: (시간대, 요일 구분) 12가지
+CONTEXTS = [(slot, day) for day in DAY_TYPES for slot in SLOTS]
+
+def day_type_of(is_weekend, is_vacation):
+    """방학이 주말보다 우선"""
+    if is_vacation:
+        return 'vacation'
+    return 'weekend' if is_weekend else 'weekday'
+
+def select_weights(slot, day_type):
+    return DAY_TYPES[day_type].get(slot, {})
+
+
+# ----------------------------
+# (업종 × 행정동) 행렬 → 12개 맥락 한 번에
+# ----------------------------
+def load_poi(path=POI_PATH):
+    return pd.read_csv(path, encoding='cp949', usecols=ADM_KEYS + [CATEGORY_COL])
+
+def adm_keys(gdf):
+    """adm_nm을 (시도명, 시군구명, 행정동명)으로 분리한 DataFrame"""
+    keys = gdf['adm_nm'].str.split(' ', n=2, expand=True).reindex(columns=range(3))
+    keys.columns = ADM_KEYS
+    return keys
+
+def count_matrix(poi_df, keys):
+    """
+    keys: 행정동별 (시도명, 시군구명, 행정동명) DataFrame (n행)
+    반환: (업종 목록, (업종 수, n) 점포 수 행렬) — 업종명이 비어 있으면 ''(기본 가중치)로 집계
+    """
+    poi_df = poi_df.assign(**{CATEGORY_COL: poi_df[CATEGORY_COL].fillna('')})
+    counts = poi_df.groupby(ADM_KEYS + [CATEGORY_COL]).size().unstack(CATEGORY_COL, fill_value=0)
+    counts = counts.reindex(pd.MultiIndex.from_frame(keys[ADM_KEYS]), fill_value=0)
+    return list(counts.columns), counts.to_numpy(dtype=float).T
+
+def weight_matrix(categories, contexts=CONTEXTS):
+    """(맥락 수, 업종 수) 가중치 행렬, 표에 없는 업종은 default_weight"""
+    return np.array([
+        [select_weights(slot, day).get(c, default_weight) for c in categories]
+        for slot, day in contexts
+    ])
+
+def context_table(keys, population, poi_df, alpha=POP_ALPHA, contexts=CONTEXTS):
+    """
+    반환: {'poi_weighted', 'commercial_index', 'dynamic_population'} 각 (맥락 수, n) 배열
+    commercial_index는 맥락별로 전체 행정동 기준 Min-Max
+    """
+    categories, counts = count_matrix(poi_df, keys)
+    weighted = weight_matrix(categories, contexts) @ counts
+    ci = topsis_engine.minmax(weighted.T).T
+    return {
+        'poi_weighted':       weighted,
+        'commercial_index':   ci,
+        'dynamic_population': np.asarray(population, dtype=float) * (1 + alpha * ci),
+    }
+
+
+# ----------------------------
+# 웹(map_utils)용: adm_cd2별 맥락 동적인구 (디스크 캐시)
+# ----------------------------
+def _digest(poi_path):
+    """POI 파일 + geodata 원본 해시 → 캐시 유효성 키"""
+    h = hashlib.sha256(geodata._file_hash(poi_path).encode())
+    h.update(json.dumps(geodata.source_hashes(), sort_keys=True).encode())
+    return h.hexdigest()
+
+def build_web_table(poi_path=POI_PATH):
+    """
+    전국 행정동 기준 맥락 동적인구와 유동인구지수 (상권지수 Min-Max가 전국 기준이라 전체 geodata 필요 — 오프라인 전용)
+    반환: (adm_cd2, 동적인구 (맥락 수, n), 유동인구지수 (맥락 수, n))
+    """
+    gdf = geodata.load_geodata()
+    table = context_table(adm_keys(gdf), gdf['population'].to_numpy(), load_poi(poi_path))
+    # 인구 병합에서 중복된 행(같은 adm_cd2)은 값이 같으므로 하나만 남김
+    codes = gdf['adm_cd2'].astype(str)
+    keep = ~codes.duplicated().to_numpy()
+    return codes.to_numpy()[keep], table['dynamic_population'][:, keep], table['commercial_index'][:, keep]
+
+def write_web_table(poi_path=POI_PATH):
+    """build_web_table() 결과를 CACHE_PATH에 저장하고 그대로 반환 — python poi_context.py"""
+    codes, dynamic, commercial = build_web_table(poi_path)
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    tmp = f"{CACHE_PATH}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, codes=codes, dynamic=dynamic, commercial=commercial, digest=np.array(_digest(poi_path)))
+    os.replace(tmp, CACHE_PATH)
+    return codes, dynamic, commercial
+
+# 웹 워커는 캐시 파일만 읽음 — 없거나 오래됐으면 RETRY_SECONDS 뒤 다시 확인 (None을 영구히 기억하지 않음)
+RETRY_SECONDS = 60
+_web = {'table': None, 'commercial': None, 'checked': float('-inf')}
+
+def web_table(poi_path=POI_PATH):
+    """
+    index: adm_cd2, 열: CONTEXTS 순서(0~11)의 동적인구 DataFrame
+    POI 파일이나 최신 캐시(python poi_context.py)가 없으면 None (웹은 정적 인구를 그대로 사용)
+    """
+    if _web['table'] is not None:
+        return _web['table']
+    now = time.monotonic()
+    if now - _web['checked'] < RETRY_SECONDS:
+        return None
+    _web['checked'] = now
+    if not os.path.exists(poi_path):
+        return None
+    try:
+        with np.load(CACHE_PATH, allow_pickle=False) as z:
+            if str(z['digest']) != _digest(poi_path):
+                logging.warning("POI 맥락 캐시가 원본과 다릅니다 — python poi_context.py로 다시 만드세요")
+                return None
+            # 유동인구지수가 없는 이전 형식 캐시는 KeyError → 다시 만들도록 안내
+            commercial = pd.DataFrame(z['commercial'].T, index=z['codes'])
+            _web['table'] = pd.DataFrame(z['dynamic'].T, index=z['codes'])
+            _web['commercial'] = commercial
+    except (OSError, KeyError, ValueError):
+        logging.warning(f"POI 맥락 캐시({CACHE_PATH})가 없습니다 — python poi_context.py로 만드세요")
+        return None
+    return _web['table']
+
+def dynamic_population(codes, context):
+    """
+    codes: adm_cd2 배열, context: (시간대, 요일 구분)
+    반환: 동적인구 배열 (POI 파일이 없으면 None, 표에 없는 행정동은 NaN)
+    """
+    table = web_table()
+    if table is None:
+        return None
+    return table[CONTEXTS.index(context)].reindex(np.asarray(codes).astype(str)).to_numpy()
+
+def commercial_index(codes, context):
+    """
+    codes: adm_cd2 배열, context: (시간대, 요일 구분)
+    반환: 유동인구지수 배열 (0~1, 전국 Min-Max — POI 파일이 없으면 None, 표에 없는 행정동은 NaN)
+    """
+    if web_table() is None:
+        return None
+    return _web['commercial'][CONTEXTS.index(context)].reindex(np.asarray(codes).astype(str)).to_numpy()
+
+def current_context(now=None):
+    slot, is_weekend, is_vacation = get_time_context(now)
+    return slot, day_type_of(is_weekend, is_vacation)
+
+
+if __name__ == '__main__':
+    codes, dynamic, _ = write_web_table()
+    print(f"Saved {len(codes)} 행정동 × {dynamic.shape[0]} contexts → {CACHE_PATH}")
@@ -0,0 +1,232 @@
+# popgrid.py
+# population2.xlsx의 행정동 인구를 EPSG:5179 250m 격자로 나눠(dasymetric) 메모리 매핑 NumPy 배열로 저장하고,
+# 격자 셀 단위로 거리/풍위험/TOPSIS를 덩어리(chunk)별 배열 연산으로 계산합니다.
+#
+#  - 셀 중심이 폴리곤 안에 드는 셀에 행정동 인구를 나눔 (weights 격자를 주면 그 비율, 없으면 균등)
+#  - 셀 중심이 하나도 없는 작은 행정동은 대표점이 속한 셀에 인구를 더함 (그 셀의 행정동 번호는 그대로)
+#  - 셀 좌표는 아핀 변환 (a, b, c, d, e, f): x = c + a·(열 + 0.5), y = f + e·(행 + 0.5)  (e < 0, 북쪽이 위)
+#  - geodata 원본 해시가 바뀌면 다시 만듦
+#
+# 격자 미리 만들기(배포 시):  python popgrid.py
+
+import os
+import json
+import logging
+import threading
+from collections import namedtuple
+import numpy as np
+import shapely
+from pyproj import Transformer
+import geodata
+import topsis_engine
+
+PROJ_CRS = 'EPSG:5179'
+CELL_M = 250
+GRID_DIR = os.path.join(geodata.CACHE_DIR, 'popgrid')
+POP_FILE, ZONE_FILE, META_FILE = 'population.npy', 'zone.npy', 'meta.json'
+BUILD_ROWS = 256            # 격자를 만들 때 한 번에 점-폴리곤 판정할 행 수
+CHUNK = 1_000_000           # 셀 단위 계산 덩어리 크기
+GEO_KEY = 'adm_cd2'
+
+# population, zone: (행, 열) memmap (zone은 keys 위치, 없으면 -1), transform: 아핀 6개 값
+PopGrid = namedtuple('PopGrid', ['population', 'zone', 'transform', 'keys', 'to_lonlat', 'from_lonlat'])
+
+_grid = None
+_grid_lock = threading.Lock()
+
+
+# ----------------------------
+# 격자 만들기 / 저장 / 로드
+# ----------------------------
+def build_grid(gdf, cell=CELL_M, weights=None):
+    """
+    gdf: geodata.load_geodata() 결과 (EPSG:4326)
+    weights: 선택, (행, 열) 보조 밀도 격자 — 행정동 안에서 인구를 이 비율로 나눔 (합이 0이면 균등)
+    반환: (population float32 (행, 열), zone int32 (행, 열), transform)
+    """
+    proj = gdf.geometry.to_crs(PROJ_CRS).reset_index(drop=True).values
+    minx, miny, maxx, maxy = shapely.total_bounds(proj)
+    x0, y0 = np.floor(minx / cell) * cell, np.ceil(maxy / cell) * cell
+    n_cols, n_rows = int(np.ceil((maxx - x0) / cell)), int(np.ceil((y0 - miny) / cell))
+    transform = (float(cell), 0.0, float(x0), 0.0, -float(cell), float(y0))
+
+    tree = shapely.STRtree(proj)
+    zone = np.full((n_rows, n_cols), -1, dtype=np.int32)
+    xs = x0 + (np.arange(n_cols) + 0.5) * cell
+    for r0 in range(0, n_rows, BUILD_ROWS):
+        ys = y0 - (np.arange(r0, min(r0 + BUILD_ROWS, n_rows)) + 0.5) * cell
+        px, py = np.meshgrid(xs, ys)
+        cell_idx, geom_idx = tree.query(shapely.points(px.ravel(), py.ravel()), predicate='within')
+        zone.reshape(-1)[r0 * n_cols + cell_idx] = geom_idx
+
+    pop = np.nan_to_num(gdf['population'].to_numpy(dtype=float))
+    flat = zone.ravel()
+    has = flat >= 0
+    zid = flat[has]
+    w = np.ones(zid.size) if weights is None else np.asarray(weights, dtype=float).ravel()[has]
+    w_sum = np.bincount(zid, weights=w, minlength=len(gdf))[zid]
+    count = np.bincount(zid, minlength=len(gdf))
+    share = np.where(w_sum > 0, w / np.where(w_sum > 0, w_sum, 1), 1 / count[zid])
+    population = np.zeros(flat.size)
+    population[has] = pop[zid] * share
+
+    missing = np.flatnonzero(count == 0)
+    if len(missing):
+        rep = shapely.point_on_surface(proj[missing])
+        col = np.clip(np.floor((shapely.get_x(rep) - x0) / cell).astype(int), 0, n_cols - 1)
+        row = np.clip(np.floor((y0 - shapely.get_y(rep)) / cell).astype(int), 0, n_rows - 1)
+        np.add.at(population, row * n_cols + col, pop[missing])
+
+    return population.reshape(n_rows, n_cols).astype(np.float32), zone, transform
+
+
+def _save_npy(path, arr):
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+def write_grid(gdf, hashes=None, cell=CELL_M):
+    """격자 배열 두 개와 meta(원본 해시, 아핀 변환, 행정동 키) 저장 — meta를 마지막에 기록"""
+    hashes = hashes or geodata.source_hashes()
+    population, zone, transform = build_grid(gdf, cell)
+    os.makedirs(GRID_DIR, exist_ok=True)
+    _save_npy(os.path.join(GRID_DIR, POP_FILE), population)
+    _save_npy(os.path.join(GRID_DIR, ZONE_FILE), zone)
+    meta = {'sources': hashes, 'crs': PROJ_CRS, 'cell_m': cell, 'shape': list(population.shape),
+            'transform': list(transform), 'keys': gdf[GEO_KEY].astype(str).tolist(),
+            'population': float(population.sum(dtype=np.float64))}
+    tmp = os.path.join(GRID_DIR, f"{META_FILE}.{os.getpid()}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(GRID_DIR, META_FILE))
+    return meta
+
+def _read_meta(hashes):
+    """원본 해시가 일치하고 배열 파일이 모두 있으면 meta, 아니면 None"""
+    try:
+        with open(os.path.join(GRID_DIR, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('sources') != hashes:
+        return None
+    if not all(os.path.exists(os.path.join(GRID_DIR, n)) for n in (POP_FILE, ZONE_FILE)):
+        return None
+    return meta
+
+def load_grid():
+    """프로세스당 한 번 여는 인구 격자 (memmap, 공유, 수정 금지) — 원본이 바뀌었으면 다시 만듦"""
+    global _grid
+    with _grid_lock:
+        if _grid is None:
+            hashes = geodata.source_hashes()
+            meta = _read_meta(hashes)
+            if meta is None:
+                logging.info("인구 격자가 없거나 오래되어 다시 만듭니다")
+                meta = write_grid(geodata.load_geodata(), hashes)
+            _grid = PopGrid(
+                np.load(os.path.join(GRID_DIR, POP_FILE), mmap_mode='r'),
+                np.load(os.path.join(GRID_DIR, ZONE_FILE), mmap_mode='r'),
+                tuple(meta['transform']), np.array(meta['keys']),
+                Transformer.from_crs(meta['crs'], 'EPSG:4326', always_xy=True),
+                Transformer.from_crs('EPSG:4326', meta['crs'], always_xy=True),
+            )
+    return _grid
+
+
+# ----------------------------
+# 셀 선택 / 좌표
+# ----------------------------
+def cells_within(grid, lat, lon, radius_km):
+    """(lat, lon) 반경 안 인구가 있는 셀의 평면 위치 배열 (행 우선)"""
+    a, _, c, _, e, f = grid.transform
+    x, y = grid.from_lonlat.transform(lon, lat)
+    r = radius_km * 1000
+    n_rows, n_cols = grid.population.shape
+    c0, c1 = max(int((x - r - c) // a), 0), min(int((x + r - c) // a) + 1, n_cols)
+    r0, r1 = max(int((y + r - f) // e), 0), min(int((y - r - f) // e) + 1, n_rows)
+    if c0 >= c1 or r0 >= r1:
+        return np.empty(0, dtype=np.int64)
+    rows, cols = np.nonzero(grid.population[r0:r1, c0:c1] > 0)
+    rows, cols = rows + r0, cols + c0
+    cx, cy = c + a * (cols + 0.5), f + e * (rows + 0.5)
+    keep = (cx - x) ** 2 + (cy - y) ** 2 <= r * r
+    return rows[keep].astype(np.int64) * n_cols + cols[keep]
+
+def cell_lonlat(grid, cells):
+    """셀 평면 위치 → 셀 중심 (lon, lat) 배열"""
+    a, _, c, _, e, f = grid.transform
+    rows, cols = np.divmod(cells, grid.population.shape[1])
+    return grid.to_lonlat.transform(c + a * (cols + 0.5), f + e * (rows + 0.5))
+
+
+# ----------------------------
+# 셀 단위 위험 / TOPSIS (덩어리별)
+# ----------------------------
+def cell_criteria(grid, cells, lat, lon, weather, alpha=0.05, chunk=CHUNK):
+    """
+    weather: (풍향°, 풍속, 안정도 가중치)
+    반환: dict dist, dist_score, wind_risk, population, zone — 각 (셀 수,) float32/int32
+    """
+    wd, ws, sw = weather
+    n = len(cells)
+    out = {k: np.empty(n, dtype=np.float32) for k in ('dist', 'dist_score', 'wind_risk', 'population')}
+    out['zone'] = np.asarray(grid.zone).ravel()[cells]
+    pop = np.asarray(grid.population).ravel()
+    for s in range(0, n, chunk):
+        part = cells[s:s + chunk]
+        clon, clat = cell_lonlat(grid, part)
+        dist = topsis_engine.haversine_km(lat, lon, clat, clon)
+        bearing = topsis_engine.bearing_deg(lat, lon, clat, clon)
+        out['dist'][s:s + chunk] = dist
+        out['dist_score'][s:s + chunk] = topsis_engine.distance_score(dist, decay=2)
+        out['wind_risk'][s:s + chunk] = topsis_engine.wind_risk(wd, ws, sw, bearing, dist, alpha)
+        out['population'][s:s + chunk] = pop[part]
+    return out
+
+def zonal_mean(zone, values, weights, n_zones):
+    """셀 값의 행정동별 가중 평균 (n_zones,), 셀이 없는 행정동은 nan"""
+    has = zone >= 0
+    num = np.bincount(zone[has], weights=values[has] * weights[has], minlength=n_zones)
+    den = np.bincount(zone[has], weights=weights[has], minlength=n_zones)
+    return np.divide(num, den, out=np.full(n_zones, np.nan), where=den > 0)
+
+def topsis_chunked(crit, weights=topsis_engine.DEFAULT_WEIGHTS, benefit=topsis_engine.DEFAULT_BENEFIT, chunk=CHUNK):
+    """
+    crit: (N, k) 셀 기준 행렬 — 열별 최소/최대를 전체에서 한 번 구하고 덩어리별로 근접도 계산
+    topsis_engine.topsis(crit)와 같은 값을 (chunk, k) 메모리로 계산
+    """
+    crit = np.asarray(crit)
+    lo, hi = crit.min(axis=0).astype(float), crit.max(axis=0).astype(float)
+    rng = np.where(hi - lo == 0, 1.0, hi - lo)
+    w = np.asarray(weights, dtype=float)
+    top = (hi - lo) / rng * w                       # 정규화 후 열별 최대 (범위 0인 열은 0)
+    best = np.where(benefit, top, 0.0)
+    worst = np.where(benefit, 0.0, top)
+    out = np.empty(len(crit), dtype=np.float32)
+    for s in range(0, len(crit), chunk):
+        v = (crit[s:s + chunk] - lo) / rng * w
+        d_best = np.sqrt(((v - best) ** 2).sum(axis=1))
+        d_worst = np.sqrt(((v - worst) ** 2).sum(axis=1))
+        denom = d_best + d_worst
+        out[s:s + chunk] = np.divide(d_worst, denom, out=np.zeros_like(denom), where=denom > 0)
+    return out
+
+def score_cells(grid, cells, lat, lon, weather, zone_cap_pc1, weights=topsis_engine.DEFAULT_WEIGHTS, chunk=CHUNK):
+    """
+    셀 단위 3기준 TOPSIS: dist_score·wind_risk는 셀 중심, cap_pc1은 셀이 속한 행정동 값
+    zone_cap_pc1: (len(grid.keys),) 행정동별 cap_pc1 (반경 밖/없는 행정동은 nan → 0)
+    반환: cell_criteria() dict에 cap_pc1, topsis를 더한 것
+    """
+    out = cell_criteria(grid, cells, lat, lon, weather, chunk=chunk)
+    cap = np.nan_to_num(np.asarray(zone_cap_pc1, dtype=float))
+    out['cap_pc1'] = np.where(out['zone'] >= 0, cap[np.maximum(out['zone'], 0)], 0).astype(np.float32)
+    crit = np.column_stack([out['dist_score'], out['cap_pc1'], out['wind_risk']])
+    out['topsis'] = topsis_chunked(crit, weights, chunk=chunk)
+    return out
+
+
+if __name__ == '__main__':
+    meta = write_grid(geodata.load_geodata())
+    rows, cols = meta['shape']
+    print(f"Saved {rows}x{cols} cells ({meta['cell_m']}m), population {meta['population']:,.0f} → {GRID_DIR}")
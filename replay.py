@@ -0,0 +1,192 @@
+# replay.py
+# NPP_weather_backup의 기상 이력을 시간 순으로 읽어 매 시각의 행정동 TOPSIS 순위를 다시 계산합니다.
+# 기상 문서를 block개씩 묶어 (시각 × 행정동 × 기준) 배열로 한 번에 점수를 내고, 블록을 프로세스 풀에 나눠 돌립니다.
+# 시각별로는 TOP N 행정동과 점수 요약만, 행정동별로는 평균/표준편차와 TOP 1·TOP N 빈도만 남깁니다.
+#
+# 예) 고리 2024년 1년치 시간별 기상, TOP 10, 코어 수만큼 병렬:
+#     python replay.py --plant 고리 --start 2024-01-01 --end 2024-12-31 --top-n 10
+# 결과: output/replay/<코드>_<시작>_<끝>.npz (시각별), 같은 이름 .csv (행정동별 강건성)
+
+import os
+import sys
+import time
+import argparse
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from dateutil import parser as dateparser
+import topsis_engine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR = os.path.join(BASE_DIR, 'output', 'replay')
+BACKUP_COLLECTION = 'NPP_weather_backup'
+
+# 블록 결과: 시각별 TOP N(위치·점수)과 점수 최대/평균, 행정동별 점수 합·제곱합·TOP 1/TOP N 횟수
+Block = namedtuple('Block', ['top_idx', 'top_score', 'max_score', 'mean_score',
+                             'score_sum', 'score_sq', 'top1_count', 'topn_count'])
+
+
+# ----------------------------
+# 기상 이력 스트리밍
+# ----------------------------
+def weather_blocks(collection, code, start, end, block=500):
+    """
+    [start, end) 구간 genName=code 문서를 time 오름차순 커서로 읽어
+    (시각 목록, wd, ws, sw) 블록을 차례로 생성 — 풍향/풍속이 없는 문서는 건너뜀
+    """
+    from map_utils import WEATHER_FIELDS, weather_from_doc
+    cursor = collection.find({'genName': code, 'time': {'$gte': start, '$lt': end}},
+                             WEATHER_FIELDS).sort('time', 1).batch_size(block)
+    times, rows = [], []
+    for doc in cursor:
+        wd, ws, sw = weather_from_doc(doc)
+        if wd is None or ws is None:
+            continue
+        times.append(doc['time'])
+        rows.append((float(wd), float(ws), sw))
+        if len(rows) == block:
+            yield times, np.array(rows)
+            times, rows = [], []
+    if rows:
+        yield times, np.array(rows)
+
+
+# ----------------------------
+# 블록 계산 (프로세스 풀)
+# ----------------------------
+_worker_static = None
+_worker_top_n = 5
+
+def _init_worker(static, top_n):
+    global _worker_static, _worker_top_n
+    _worker_static, _worker_top_n = static, top_n
+
+def score_block(static, weather, top_n):
+    """weather: (S, 3) 풍향/풍속/안정도 가중치 → Block"""
+    scores = topsis_engine.score_scenarios(static, weather[:, 0], weather[:, 1], weather[:, 2])
+    n = scores.shape[1]
+    k = min(top_n, n)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    top_idx = np.take_along_axis(part, order, axis=1)
+    top_score = np.take_along_axis(scores, top_idx, axis=1)
+    return Block(
+        top_idx.astype(np.int32), top_score.astype(np.float32),
+        scores.max(axis=1).astype(np.float32), scores.mean(axis=1).astype(np.float32),
+        scores.sum(axis=0), (scores ** 2).sum(axis=0),
+        np.bincount(top_idx[:, 0], minlength=n), np.bincount(top_idx.ravel(), minlength=n),
+    )
+
+def _score_block(weather):
+    return score_block(_worker_static, weather, _worker_top_n)
+
+
+def _bounded_map(ex, fn, items, window):
+    """ex.map과 같지만 제출한 작업을 window개까지만 두어 입력 반복자를 미리 다 읽지 않음 (결과 순서 유지)"""
+    pending = deque()
+    for item in items:
+        pending.append(ex.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def replay(static, blocks, top_n=5, workers=None):
+    """
+    blocks: weather_blocks() 결과 (시각 목록, (S, 3) 기상) 반복자
+    반환: (시각 배열, 합친 Block) — 블록 순서 = 시간 순서
+    커서는 진행 중인 블록이 프로세스 수의 2배를 넘지 않게 읽음
+    """
+    times = []
+    def feed():
+        for t, w in blocks:
+            times.extend(t)
+            yield w
+
+    if workers == 1:
+        _init_worker(static, top_n)
+        results = [_score_block(w) for w in feed()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(static, top_n)) as ex:
+            results = list(_bounded_map(ex, _score_block, feed(), 2 * (workers or os.cpu_count() or 1)))
+    if not results:
+        raise ValueError('No weather documents in the requested range')
+    merged = Block(*(np.concatenate([getattr(r, f) for r in results]) for f in Block._fields[:4]),
+                   *(sum(getattr(r, f) for r in results) for f in Block._fields[4:]))
+    return np.array(times), merged
+
+
+# ----------------------------
+# 행정동별 강건성
+# ----------------------------
+def robustness(labels, result, top_n):
+    """전체 시각에 걸친 행정동별 평균/표준편차 점수와 TOP 1/TOP N 빈도 (TOP N 빈도 내림차순)"""
+    t = len(result.max_score)
+    mean = result.score_sum / t
+    df = pd.DataFrame({
+        'adm_nm':         labels,
+        'mean_score':     mean,
+        'std_score':      np.sqrt(np.maximum(result.score_sq / t - mean ** 2, 0)),
+        'p_top1':         result.top1_count / t,
+        f'p_top{top_n}':  result.topn_count / t,
+    })
+    return df.sort_values([f'p_top{top_n}', 'mean_score'], ascending=False).reset_index(drop=True)
+
+
+def save_result(path, times, labels, result):
+    """시각별 TOP N 위치/점수와 점수 요약을 압축 npz로 저장 (위치는 labels 기준)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez_compressed(path, times=times.astype(str), labels=np.asarray(labels, dtype=str),
+                        top_idx=result.top_idx, top_score=result.top_score,
+                        max_score=result.max_score, mean_score=result.mean_score)
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='기상 이력 재생: 시각별 TOPSIS 순위와 행정동 강건성')
+    p.add_argument('--plant', required=True)
+    p.add_argument('--start', required=True, help='시작 날짜 (포함, 예: 2024-01-01)')
+    p.add_argument('--end', required=True, help='끝 날짜 (포함, 예: 2024-12-31)')
+    p.add_argument('--context', help='시간 맥락 "시간대,요일 구분" (기본: 정적 인구)')
+    p.add_argument('--top-n', type=int, default=5)
+    p.add_argument('--block', type=int, default=500, help='블록당 시각 수')
+    p.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본: CPU 코어 수, 1이면 단일 프로세스)')
+    p.add_argument('--output', help='결과 npz (기본: output/replay/<코드>_<시작>_<끝>.npz, 강건성 CSV는 같은 이름)')
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    import map_utils
+    import poi_context
+    if args.plant not in map_utils.power_plants:
+        raise SystemExit(f"Unknown plant {args.plant!r}")
+    context = tuple(args.context.split(',')) if args.context else None
+    if context is not None and context not in poi_context.CONTEXTS:
+        raise SystemExit(f"Unknown context {args.context!r}")
+
+    code = map_utils.mapping_codes[args.plant]
+    start = f"{args.start} 00:00"
+    end = (dateparser.parse(args.end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d 00:00')
+    output = args.output or os.path.join(OUT_DIR, f"{code}_{args.start}_{args.end}.npz")
+
+    static = map_utils.plant_static(args.plant, context)
+    labels = map_utils.plant_geodata(args.plant)['adm_nm'].to_numpy()[static['index']]
+    blocks = weather_blocks(map_utils.db[BACKUP_COLLECTION], code, start, end, args.block)
+
+    t = time.perf_counter()
+    times, result = replay(static, blocks, args.top_n, args.workers)
+    save_result(output, times, labels, result)
+    stats = robustness(labels, result, args.top_n)
+    stats.to_csv(os.path.splitext(output)[0] + '.csv', index=False, encoding='utf-8-sig')
+
+    print(f"{args.plant} {times[0]} ~ {times[-1]}: 시각 {len(times)}개, 행정동 {len(labels)}개 "
+          f"({time.perf_counter() - t:.1f}s) → {output}")
+    print(stats.head(args.top_n).to_string(index=False))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
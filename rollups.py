@@ -0,0 +1,252 @@
+# rollups.py
+# 방사선·기상 이력의 시간별/일별 집계(min/max/mean/count)를 별도 컬렉션에 유지합니다.
+#
+#  - 원본: nuclear_radiation, nuclear_radiation_backup (genName, expl별), Busan_radiation_backup (locNm별),
+#          NPP_weather_backup (genName별 기온/습도/강수/풍속 — 풍향은 원형 값이라 평균하지 않음)
+#  - 집계: <원본>_hour, <원본>_day — _id = {키..., time: 버킷 시작 'YYYY-MM-DD HH:00' / 'YYYY-MM-DD 00:00'}
+#          값 필드가 하나면 min/max/sum/count/mean, 여럿이면 필드마다 <필드>_min, <필드>_mean, ...
+#  - 증분: rollup_state에 원본별 최고 time(high-water mark)을 두고, 그 날의 0시부터만 다시 집계해 $merge
+#          (마지막 버킷은 부분 집계였을 수 있으므로 그 날 전체를 다시 계산, 시간별 → 일별 순)
+#
+# time은 'YYYY-MM-DD HH:MM' 문자열이라 버킷은 앞부분 자르기로 만들고, 값은 숫자로 변환되지 않으면 집계에서 제외합니다.
+# high-water mark보다 과거 시각으로 늦게 들어온 문서는 반영되지 않으므로 필요하면 --rebuild로 다시 만듭니다.
+# 웹 요청은 REFRESH_SECONDS마다 백그라운드 스레드로 증분 갱신을 시작하고 기다리지 않습니다.
+#
+# 예) 한 번 갱신:            python rollups.py
+# 예) 5분마다 갱신:          python rollups.py --interval 300
+# 예) 처음부터 다시 만들기:  python rollups.py --rebuild
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime
+from collections import namedtuple
+from pymongo import MongoClient, ASCENDING, IndexModel
+
+DB_NAME = 'Data'
+STATE_COLLECTION = 'rollup_state'
+REFRESH_SECONDS = int(os.getenv('ROLLUP_REFRESH_SECONDS', '60'))   # 요청 경로 갱신 최소 간격
+
+# 원본 컬렉션 → 그룹 키, 값 필드 (첫 필드의 평균이 read()의 value)
+Source = namedtuple('Source', ['keys', 'values'])
+
+SOURCES = {
+    'nuclear_radiation':        Source(('genName', 'expl'), ('value',)),
+    'nuclear_radiation_backup': Source(('genName', 'expl'), ('value',)),
+    'Busan_radiation_backup':   Source(('locNm',), ('data',)),
+    'NPP_weather_backup':       Source(('genName',), ('temperature', 'humidity', 'rainfall', 'windspeed')),
+}
+
+STATS = ('min', 'max', 'sum', 'count', 'mean')
+
+# 해상도 → (time 앞부분 길이, 버킷 시작 접미사, 버킷 길이 초) — 굵은 것부터
+RESOLUTIONS = {
+    'day':  (10, ' 00:00', 86400),
+    'hour': (13, ':00', 3600),
+}
+
+_last_refresh = {}
+_running = set()
+_lock = threading.Lock()
+
+
+def rollup_name(source, resolution):
+    return f"{source}_{resolution}"
+
+
+def stat_name(source, field, stat):
+    """집계 문서의 필드 이름: 값 필드가 하나면 stat 그대로(min, mean, ...), 여럿이면 '<필드>_<stat>'"""
+    return stat if len(SOURCES[source].values) == 1 else f"{field}_{stat}"
+
+
+def rollup_indexes():
+    """집계 컬렉션 조회용 인덱스 (mongo_indexes.INDEXES에 합쳐짐)"""
+    return {
+        rollup_name(name, res): [IndexModel([*((k, ASCENDING) for k in src.keys), ('time', ASCENDING)],
+                                            name='_'.join(src.keys) + '_time')]
+        for name, src in SOURCES.items() for res in RESOLUTIONS
+    }
+
+
+# ----------------------------
+# 집계 파이프라인
+# ----------------------------
+def _bucket(res):
+    length, suffix, _ = RESOLUTIONS[res]
+    return {'$concat': [{'$substrCP': ['$time', 0, length]}, suffix]}
+
+
+def _finish(source, into):
+    """그룹 결과를 평평한 필드로 풀고 필드별 mean 계산 후 집계 컬렉션에 $merge"""
+    src = SOURCES[source]
+    means = {}
+    for f in src.values:
+        total, count = f"${stat_name(source, f, 'sum')}", f"${stat_name(source, f, 'count')}"
+        means[stat_name(source, f, 'mean')] = {'$cond': [{'$gt': [count, 0]}, {'$divide': [total, count]}, None]}
+    return [
+        {'$set': {**{k: f'$_id.{k}' for k in src.keys}, 'time': '$_id.time', **means}},
+        {'$merge': {'into': into, 'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+    ]
+
+
+def hour_pipeline(source, since=None):
+    """원본 → 시간별 집계 (since 이후 문서만)"""
+    src = SOURCES[source]
+    values = {f'v{i}': {'$convert': {'input': f'${f}', 'to': 'double', 'onError': None, 'onNull': None}}
+              for i, f in enumerate(src.values)}
+    stats = {}
+    for i, f in enumerate(src.values):
+        v = f'$v{i}'
+        stats[stat_name(source, f, 'min')] = {'$min': v}
+        stats[stat_name(source, f, 'max')] = {'$max': v}
+        stats[stat_name(source, f, 'sum')] = {'$sum': v}
+        stats[stat_name(source, f, 'count')] = {'$sum': {'$cond': [{'$eq': [{'$type': v}, 'double']}, 1, 0]}}
+    # time이 문자열이 아닌(없는) 문서는 버킷을 만들 수 없으므로 제외
+    time_match = {'$type': 'string', '$gte': since} if since else {'$type': 'string'}
+    return [
+        {'$match': {'time': time_match}},
+        {'$project': {**{k: 1 for k in src.keys}, 'time': 1, **values}},
+        {'$group': {'_id': {**{k: f'${k}' for k in src.keys}, 'time': _bucket('hour')}, **stats}},
+    ] + _finish(source, rollup_name(source, 'hour'))
+
+
+def day_pipeline(source, since=None):
+    """시간별 집계 → 일별 집계 (원본을 다시 읽지 않음)"""
+    src = SOURCES[source]
+    stats = {}
+    for f in src.values:
+        for stat, op in (('min', '$min'), ('max', '$max'), ('sum', '$sum'), ('count', '$sum')):
+            name = stat_name(source, f, stat)
+            stats[name] = {op: f'${name}'}
+    match = [{'$match': {'time': {'$gte': since}}}] if since else []
+    return match + [
+        {'$group': {'_id': {**{k: f'${k}' for k in src.keys}, 'time': _bucket('day')}, **stats}},
+    ] + _finish(source, rollup_name(source, 'day'))
+
+
+# ----------------------------
+# 증분 갱신
+# ----------------------------
+def refresh(db, source, rebuild=False):
+    """
+    high-water mark 이후 원본을 집계에 반영하고 새 mark 반환 (새 문서가 없으면 None)
+    mark를 먼저 읽어 두므로 집계 중 들어온 문서는 다음 갱신에서 그 날부터 다시 잡힘
+    """
+    state = db[STATE_COLLECTION]
+    hwm = None if rebuild else (state.find_one({'_id': source}) or {}).get('hwm')
+    latest = db[source].find_one({'time': {'$type': 'string'}}, {'_id': 0, 'time': 1}, sort=[('time', -1)])
+    if not latest or (hwm and latest['time'] <= hwm):
+        return None
+    since = f"{hwm[:10]} 00:00" if hwm else None
+    if rebuild:
+        for res in RESOLUTIONS:
+            db[rollup_name(source, res)].delete_many({})
+
+    db[source].aggregate(hour_pipeline(source, since), allowDiskUse=True)
+    db[rollup_name(source, 'hour')].aggregate(day_pipeline(source, since), allowDiskUse=True)
+    state.update_one({'_id': source}, {'$set': {'hwm': latest['time'], 'updated': datetime.now()}}, upsert=True)
+    return latest['time']
+
+
+def refresh_all(db, rebuild=False):
+    return {name: refresh(db, name, rebuild) for name in SOURCES}
+
+
+def available(db, source):
+    """한 번이라도 집계가 만들어졌으면 True — 요청 경로에서는 처음부터 만들지 않음"""
+    return db[STATE_COLLECTION].find_one({'_id': source}, {'_id': 1}) is not None
+
+
+def refresh_if_stale(db, source):
+    """
+    요청 경로용: 마지막 갱신 후 REFRESH_SECONDS가 지났고 같은 원본 갱신이 돌고 있지 않으면
+    백그라운드 스레드로 증분 갱신을 시작하고 바로 반환 (시작했으면 True)
+    """
+    now = time.monotonic()
+    with _lock:
+        if source in _running or now - _last_refresh.get(source, float('-inf')) < REFRESH_SECONDS:
+            return False
+        _last_refresh[source] = now
+        _running.add(source)
+    threading.Thread(target=_refresh_worker, args=(db, source), name=f"rollups-{source}", daemon=True).start()
+    return True
+
+def _refresh_worker(db, source):
+    try:
+        refresh(db, source)
+    except Exception as e:
+        logging.warning(f"{source} 집계 갱신 실패: {e}")
+    finally:
+        with _lock:
+            _running.discard(source)
+
+
+# ----------------------------
+# 조회
+# ----------------------------
+def pick_resolution(start, end, points):
+    """
+    [start, end) 구간에서 버킷이 points개 이상 나오는 가장 굵은 해상도 (없으면 None = 원본)
+    start/end: datetime
+    """
+    span = (end - start).total_seconds()
+    for res, (_, _, seconds) in RESOLUTIONS.items():
+        if span / seconds >= points:
+            return res
+    return None
+
+
+def read(db, source, resolution, match, start=None, end=None):
+    """
+    집계 컬렉션에서 시간순 [{time, <통계>..., value}] — value = 첫 값 필드의 mean (기존 차트 호환)
+    match: 그룹 키 조건 (예: {'genName': 'KR', 'expl': '...'}), start/end: 'YYYY-MM-DD HH:MM' 문자열
+    """
+    src = SOURCES[source]
+    query = dict(match)
+    if start or end:
+        query['time'] = {}
+        if start:
+            query['time']['$gte'] = start
+        if end:
+            query['time']['$lt'] = end
+    projection = {'_id': 0, 'time': 1,
+                  **{stat_name(source, f, s): 1 for f in src.values for s in STATS if s != 'sum'}}
+    docs = db[rollup_name(source, resolution)].find(query, projection).sort('time', 1)
+    primary = stat_name(source, src.values[0], 'mean')
+    return [{**d, 'value': d.get(primary)} for d in docs]
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='방사선/기상 이력 시간별/일별 집계 증분 갱신')
+    p.add_argument('--uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+    p.add_argument('--db', default=DB_NAME)
+    p.add_argument('--rebuild', action='store_true', help='집계를 지우고 원본 전체에서 다시 만듦')
+    p.add_argument('--interval', type=int, default=0, help='갱신 주기 (초, 0이면 한 번만)')
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    db = MongoClient(args.uri)[args.db]
+    for name, models in rollup_indexes().items():
+        db[name].create_indexes(models)
+
+    rebuild = args.rebuild
+    while True:
+        t = time.perf_counter()
+        for name, hwm in refresh_all(db, rebuild).items():
+            print(f"{name:<26} {hwm or '변경 없음'}")
+        print(f"({time.perf_counter() - t:.1f}s)")
+        rebuild = False
+        if not args.interval:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# sensitivity.py
+# TOPSIS 가중치와 기상 입력을 무작위로 흔들어 행정동 순위가 얼마나 안정적인지 분석합니다.
+# 표본 수천 개를 (표본 × 행정동 × 기준) 배열로 한 번에 계산하고, 표본 블록을 프로세스 풀에 나눠 돌립니다.
+#
+#  - 가중치: 기본 가중치를 평균으로 하는 Dirichlet(concentration × w) 표본
+#  - 풍향: 기본값 + N(0, wd_sigma°)
+#
+# 풍속·안정도는 흔들지 않습니다. 풍속 > 0이면 wind_risk = (ws / sw) × g(풍향, 방위, 거리)라 양의 배율만 달라지고,
+# TOPSIS의 열별 Min-Max가 그 배율을 지우므로 두 모델(web, upgrade) 모두 순위가 바뀌지 않습니다(topsis_lut 참고).
+#
+# 예) 웹 지도 모델(3기준), 최신 기상, 5000표본:
+#     python sensitivity.py --plant 고리 --samples 5000
+# 예) topsis_upgrade 모델(4기준, 유동인구 포함), 기상 직접 지정, 가중치만 흔들기:
+#     python sensitivity.py --plant 한빛 --model upgrade --context 오후,weekday --weather 270,2.5,중립 --vary weights
+
+import os
+import sys
+import time
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import topsis_engine
+import poi_context
+import map_utils
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR = os.path.join(BASE_DIR, 'output', 'sensitivity')
+
+# labels: 행정동 이름, fixed: 기상과 무관한 기준 열 (wind_risk는 마지막 기준으로 붙음)
+Model = namedtuple('Model', ['labels', 'fixed', 'bearing', 'dist', 'weights', 'benefit', 'alpha', 'criteria'])
+
+
+# ----------------------------
+# 모델 구성
+# ----------------------------
+def web_model(plant, context=None):
+    """map_utils(웹 지도) 3기준 모델: dist_score, cap_pc1, wind_risk"""
+    static = map_utils.plant_static(plant, context)
+    labels = map_utils.plant_geodata(plant)['adm_nm'].to_numpy()[static['index']]
+    return Model(
+        labels, np.column_stack([static['dist_score'], static['cap_pc1']]),
+        static['bearing'], static['dist'],
+        np.asarray(topsis_engine.DEFAULT_WEIGHTS), np.asarray(topsis_engine.DEFAULT_BENEFIT),
+        0.05, ['dist_score', 'cap_pc1', 'wind_risk'],
+    )
+
+def upgrade_model(plant, context, paths=None):
+    """topsis_upgrade 4기준 모델 (유동인구지수 포함), wind_risk를 마지막 열로 재배치"""
+    import topsis_upgrade as tu
+    paths = paths or tu.default_paths()
+    base = tu.load_base_data(paths)
+    dynamic = tu.dynamic_columns(base, tu.load_poi(paths['poi']), [context])
+    gdf = tu.run_topsis(tu.apply_dynamic_population(base, dynamic[context]), plant, tu.make_weather(0, 0, 'D'))
+    order = [tu.CRITERIA.index(c) for c in ('distance_score', 'cap_pc1', 'commercial_index', 'wind_risk')]
+    return Model(
+        gdf['adm_nm'].to_numpy(),
+        np.nan_to_num(gdf[['distance_score', 'cap_pc1', 'commercial_index']].to_numpy(dtype=float)),
+        gdf['bearing'].to_numpy(), gdf['distance_to_nearest_plant'].to_numpy(),
+        np.asarray(tu.WEIGHTS)[order], np.asarray(tu.BENEFIT)[order],
+        tu.WIND_ALPHA, [tu.CRITERIA[i] for i in order],
+    )
+
+
+# ----------------------------
+# 표본 추출 / 배치 계산
+# ----------------------------
+def sample_inputs(weights, weather, n, rng, vary=('weights', 'weather'), concentration=50, wd_sigma=15):
+    """
+    weather: (풍향°, 풍속, 안정도 가중치)
+    반환: (W (n, k), wd (n,), ws (n,), sw (n,)) — 기상은 풍향만 흔들고 풍속·안정도는 기본값 그대로
+    """
+    wd, ws, sw = weather
+    weights = np.asarray(weights, dtype=float)
+    W = rng.dirichlet(concentration * weights / weights.sum(), n) if 'weights' in vary else np.tile(weights, (n, 1))
+    wds = (wd + rng.normal(0, wd_sigma, n)) % 360 if 'weather' in vary else np.full(n, float(wd))
+    return W, wds, np.full(n, float(ws)), np.full(n, float(sw))
+
+def ranks_of(scores):
+    """(S, n) 점수 → 표본별 순위 (1 = 최고)"""
+    S, n = scores.shape
+    ranks = np.empty((S, n), dtype=np.int32)
+    ranks[np.arange(S)[:, None], np.argsort(-scores, axis=1)] = np.arange(1, n + 1)
+    return ranks
+
+def score_model(model, W, wd, ws, sw):
+    return topsis_engine.score_samples(model.fixed, model.bearing, model.dist, wd, ws, sw,
+                                       W, model.benefit, model.alpha)
+
+_worker_model = None
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+def _score_block(block):
+    scores = score_model(_worker_model, *block)
+    return ranks_of(scores).astype(np.int16), scores.astype(np.float32)
+
+def run_samples(model, W, wd, ws, sw, workers=None, block=1000):
+    """표본을 block개씩 나눠 프로세스 풀에서 계산, (순위, 점수) (S, n) 배열 반환"""
+    blocks = [(W[s:s + block], wd[s:s + block], ws[s:s + block], sw[s:s + block])
+              for s in range(0, len(wd), block)]
+    if workers == 1:
+        _init_worker(model)
+        results = [_score_block(b) for b in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,)) as ex:
+            results = list(ex.map(_score_block, blocks))
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+# ----------------------------
+# 순위 안정성 통계
+# ----------------------------
+def rank_stats(model, base_scores, ranks, scores, top_k=5):
+    """행정동별 기본 순위, 순위 분포(평균/표준편차/5·50·95 백분위), TOP1/TOP k 확률, 점수 평균/표준편차"""
+    base_rank = ranks_of(base_scores[None, :])[0]
+    p05, p50, p95 = np.percentile(ranks, [5, 50, 95], axis=0)
+    df = pd.DataFrame({
+        'adm_nm':          model.labels,
+        'base_score':      base_scores,
+        'base_rank':       base_rank,
+        'mean_rank':       ranks.mean(axis=0),
+        'std_rank':        ranks.std(axis=0),
+        'p05_rank':        p05,
+        'median_rank':     p50,
+        'p95_rank':        p95,
+        'p_top1':          (ranks == 1).mean(axis=0),
+        f'p_top{top_k}':   (ranks <= top_k).mean(axis=0),
+        'mean_score':      scores.mean(axis=0),
+        'std_score':       scores.std(axis=0),
+    })
+    return df.sort_values('base_rank').reset_index(drop=True)
+
+def spearman_to_base(ranks, base_rank):
+    """표본별 기본 순위와의 Spearman 상관 (S,)"""
+    n = ranks.shape[1]
+    d2 = ((ranks - base_rank).astype(float) ** 2).sum(axis=1)
+    return 1 - 6 * d2 / (n * (n ** 2 - 1))
+
+
+def analyze(model, weather, samples=5000, seed=0, vary=('weights', 'weather'), top_k=5,
+            workers=None, **sample_kw):
+    """반환: (행정동별 통계 DataFrame, 표본별 Spearman 배열)"""
+    rng = np.random.default_rng(seed)
+    W, wd, ws, sw = sample_inputs(model.weights, weather, samples, rng, vary, **sample_kw)
+    base_scores = score_model(model, model.weights, *([v] for v in weather))[0]
+    ranks, scores = run_samples(model, W, wd, ws, sw, workers)
+    stats = rank_stats(model, base_scores, ranks, scores, top_k)
+    return stats, spearman_to_base(ranks, ranks_of(base_scores[None, :])[0])
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def parse_weather(text):
+    """'풍향,풍속,안정도' (안정도는 A~G 또는 한글 등급) → (wd, ws, sw)"""
+    from topsis_upgrade import make_weather
+    wd, ws, stab = text.split(',')
+    w = make_weather(wd, ws, stab.strip())
+    return w['wind_direction'], w['wind_speed'], w['stability_weight']
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='TOPSIS 가중치/기상 민감도 및 몬테카를로 순위 안정성 분석')
+    p.add_argument('--plant', required=True, choices=list(map_utils.power_plants))
+    p.add_argument('--model', choices=['web', 'upgrade'], default='web')
+    p.add_argument('--context', help='시간 맥락 "시간대,요일 구분" (예: 오전,weekday, upgrade 모델은 필수)')
+    p.add_argument('--weather', help='풍향,풍속,안정도 (기본: MongoDB 최신 기상)')
+    p.add_argument('--samples', type=int, default=5000)
+    p.add_argument('--vary', choices=['weights', 'weather', 'both'], default='both')
+    p.add_argument('--concentration', type=float, default=50, help='Dirichlet 집중도 (클수록 기본 가중치 근처)')
+    p.add_argument('--wd-sigma', type=float, default=15, help='풍향 표준편차(°)')
+    p.add_argument('--top-k', type=int, default=5)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본: CPU 코어 수, 1이면 단일 프로세스)')
+    p.add_argument('--output', help='결과 CSV (기본: output/sensitivity/<코드>_<모델>.csv)')
+    return p.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    context = tuple(args.context.split(',')) if args.context else None
+    if context is not None and context not in poi_context.CONTEXTS:
+        raise SystemExit(f"Unknown context {args.context!r}")
+
+    if args.model == 'upgrade':
+        if context is None:
+            raise SystemExit('--model upgrade requires --context')
+        model = upgrade_model(args.plant, context)
+    else:
+        model = web_model(args.plant, context)
+
+    weather = parse_weather(args.weather) if args.weather else map_utils.fetch_weather(args.plant)
+    output = args.output or os.path.join(OUT_DIR, f"{map_utils.mapping_codes[args.plant]}_{args.model}.csv")
+    vary = ('weights', 'weather') if args.vary == 'both' else (args.vary,)
+
+    t = time.perf_counter()
+    stats, rho = analyze(model, weather, args.samples, args.seed, vary, args.top_k, args.workers,
+                         concentration=args.concentration, wd_sigma=args.wd_sigma)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    stats.to_csv(output, index=False, encoding='utf-8-sig')
+
+    print(f"{args.plant} {args.model} 모델, 기준 {model.criteria}, 표본 {args.samples}개, "
+          f"행정동 {len(model.labels)}개 ({time.perf_counter() - t:.1f}s) → {output}")
+    print(f"기본 순위와의 Spearman: 평균 {rho.mean():.3f}, 5% {np.percentile(rho, 5):.3f}")
+    cols = ['adm_nm', 'base_score', 'base_rank', 'median_rank', 'p05_rank', 'p95_rank', 'p_top1', f'p_top{args.top_k}']
+    print(stats.head(args.top_k)[cols].to_string(index=False))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# shelters.py
+# shelter.xlsx의 구호소 지점 전체를 EPSG:5179(m) 좌표의 cKDTree로 한 번만 색인하고,
+# 임의 위치에서 가장 가까운 구호소 k곳(수용인원 포함)을 조회합니다.
+# 풍하 섹터 안 구호소를 건너뛰는 마스크는 섹터별로 한 번 계산해 재사용합니다.
+
+import threading
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
+from scipy.spatial import cKDTree
+from geodata import SHEL_PATH
+
+PROJ_CRS = 'EPSG:5179'
+
+# records: 응답용 구호소 dict 목록 (DataFrame 조회 비용을 요청마다 치르지 않도록 미리 만듦)
+ShelterIndex = namedtuple('ShelterIndex', ['df', 'records', 'lat', 'lon', 'xy', 'tree', 'transformer'])
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def load_shelters(path=SHEL_PATH):
+    df = pd.read_excel(path, usecols=['광역지자체', '행정구역', '구호소명', '도로명주소', 'capacity', 'latitude', 'longitude'])
+    df = df.dropna(subset=['latitude', 'longitude']).reset_index(drop=True)
+    df['capacity'] = df['capacity'].fillna(0).astype(int)
+    return df
+
+
+def build_index(df):
+    transformer = Transformer.from_crs('EPSG:4326', PROJ_CRS, always_xy=True)
+    lat, lon = df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float)
+    xy = np.column_stack(transformer.transform(lon, lat))
+    records = [
+        {'name': r.구호소명, 'address': r.도로명주소, 'region': f"{r.광역지자체} {r.행정구역}",
+         'capacity': int(r.capacity), 'lat': float(r.latitude), 'lng': float(r.longitude)}
+        for r in df.itertuples()
+    ]
+    return ShelterIndex(df, records, lat, lon, xy, cKDTree(xy), transformer)
+
+
+def shelter_index():
+    """프로세스당 한 번 만드는 구호소 색인 (요청 간 공유, 수정 금지)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = build_index(load_shelters())
+    return _index
+
+
+@lru_cache(maxsize=64)
+def sector_mask(sector):
+    """
+    sector: ((lat, lon), ...) 풍하 섹터 꼭짓점 (generate_sector 결과를 tuple로)
+    반환: 구호소별 섹터 내부 여부 bool 배열 (공유, 수정 금지)
+    """
+    idx = shelter_index()
+    poly = shapely.Polygon([(lon, lat) for lat, lon in sector])
+    mask = shapely.contains_xy(poly, idx.lon, idx.lat)
+    mask.flags.writeable = False
+    return mask
+
+
+def nearest_positions(idx, x, y, k, exclude=None):
+    """투영 좌표 (x, y)에서 exclude가 아닌 가장 가까운 k개 구호소의 (거리 m, 위치) 배열"""
+    n = len(idx.xy)
+    kk = k
+    while True:
+        dist, pos = idx.tree.query((x, y), k=min(kk, n))
+        dist, pos = np.atleast_1d(dist), np.atleast_1d(pos)
+        if exclude is not None:
+            keep = ~exclude[pos]
+            dist, pos = dist[keep], pos[keep]
+        if len(pos) >= k or kk >= n:
+            return dist[:k], pos[:k]
+        kk *= 4
+
+
+def nearest(lat, lon, k=5, exclude=None):
+    """
+    (lat, lon)에서 가장 가까운 구호소 k곳
+    exclude: 건너뛸 구호소 bool 마스크 (예: sector_mask(섹터))
+    반환: [{'name', 'address', 'region', 'capacity', 'lat', 'lng', 'distance_km'}, ...]
+    """
+    idx = shelter_index()
+    x, y = idx.transformer.transform(lon, lat)
+    dist, pos = nearest_positions(idx, x, y, k, exclude)
+    return [dict(idx.records[p], distance_km=round(d / 1000, 3)) for d, p in zip(dist.tolist(), pos.tolist())]
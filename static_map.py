@@ -0,0 +1,106 @@
+# static_map.py
+# TOPSIS 결과 GeoDataFrame을 브라우저 없이 matplotlib(Agg)로 바로 PNG/TIFF 파일에 그립니다.
+# 행정동 점수 색칠, 풍향 섹터, 거리 링(10/30/60/100km), 풍향 화살표, TOP N 마커를 포함합니다.
+# pyplot 전역 상태를 쓰지 않으므로 여러 프로세스/스레드에서 동시에 호출해도 됩니다.
+
+import os
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LinearSegmentedColormap, Normalize
+from matplotlib.collections import PolyCollection
+from matplotlib.cm import ScalarMappable
+from matplotlib import font_manager
+from topsis_engine import destination
+
+RINGS_KM = (10, 30, 60, 100)
+TOPSIS_CMAP = LinearSegmentedColormap.from_list('topsis', ['blue', 'white', 'red'])
+KOREAN_FONTS = ('Malgun Gothic', 'NanumGothic', 'AppleGothic', 'Noto Sans CJK KR', 'Noto Sans KR')
+
+
+def _korean_font():
+    """설치된 한글 글꼴 이름 (없으면 None → 라벨은 영문/숫자만 사용)"""
+    installed = {f.name for f in font_manager.fontManager.ttflist}
+    return next((name for name in KOREAN_FONTS if name in installed), None)
+
+_FONT = _korean_font()
+
+
+def _polygon_rings(geoms):
+    """(Multi)Polygon 시리즈 → 외곽선 좌표 배열 목록과 각 링의 행 번호"""
+    rings, owner = [], []
+    for i, geom in enumerate(geoms):
+        if geom is None or geom.is_empty:
+            continue
+        for poly in getattr(geom, 'geoms', [geom]):
+            rings.append(np.asarray(poly.exterior.coords)[:, :2])
+            owner.append(i)
+    return rings, np.asarray(owner, dtype=int)
+
+
+def render_static_map(gdf, plant_lat, plant_lon, path, weather=None, sector=None,
+                      top_n=5, score_col='topsis_score', rings_km=RINGS_KM,
+                      title=None, dpi=200, size=(8, 8)):
+    """
+    gdf: EPSG:4326 geometry + score_col(0~1), centroid_lat, centroid_lon 열
+    weather: {'wind_direction': ...} (풍향 화살표용, 없으면 생략)
+    sector: [(lat, lon), ...] 풍향 섹터 폴리곤 (generate_sector 결과)
+    path: 확장자(.png/.tif/.tiff/.jpg)로 형식 결정
+    """
+    fig = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0.08, 0.05, 0.78, 0.88])
+    norm = Normalize(0, 1)
+
+    # 행정동 점수
+    scores = gdf[score_col].to_numpy(dtype=float)
+    rings, owner = _polygon_rings(gdf.geometry.values)
+    colors = TOPSIS_CMAP(norm(np.nan_to_num(scores[owner], nan=0)))
+    colors[:, 3] = 0.7
+    ax.add_collection(PolyCollection(rings, facecolors=colors, edgecolors='black', linewidths=0.2))
+
+    # 풍향 섹터
+    if sector:
+        lat_s, lon_s = np.asarray(sector).T
+        ax.fill(lon_s, lat_s, facecolor='orange', edgecolor='orange', alpha=0.4, linewidth=1.5)
+
+    # 거리 링
+    angles = np.linspace(0, 360, 181)
+    for r in rings_km:
+        lat_r, lon_r = destination(plant_lat, plant_lon, angles, r)
+        ax.plot(lon_r, lat_r, color='black', linestyle='--', linewidth=0.8)
+        ax.annotate(f"{r}km", (lon_r[0], lat_r[0]), fontsize=7, ha='center', va='bottom')
+
+    # 발전소 + 풍향 화살표 (바람이 불어가는 방향)
+    ax.plot(plant_lon, plant_lat, marker='^', color='red', markersize=10, markeredgecolor='black')
+    if weather is not None:
+        to_dir = (weather['wind_direction'] + 180) % 360
+        lat_a, lon_a = destination(plant_lat, plant_lon, to_dir, 15)
+        ax.annotate('', xy=(lon_a, lat_a), xytext=(plant_lon, plant_lat),
+                    arrowprops=dict(arrowstyle='-|>', color='blue', linewidth=2))
+
+    # TOP N 마커
+    top = gdf.nlargest(top_n, score_col)
+    ax.scatter(top['centroid_lon'], top['centroid_lat'], s=60, c='darkred',
+               edgecolors='white', linewidths=1, zorder=5)
+    for rank, (lon, lat) in enumerate(zip(top['centroid_lon'], top['centroid_lat']), 1):
+        ax.annotate(str(rank), (lon, lat), xytext=(4, 4), textcoords='offset points',
+                    fontsize=9, fontweight='bold', color='darkred', zorder=6)
+
+    # 범위: 가장 바깥 링 기준, 위도에 맞춘 종횡비
+    lat_b, lon_b = destination(plant_lat, plant_lon, angles, max(rings_km) * 1.1)
+    ax.set_xlim(lon_b.min(), lon_b.max())
+    ax.set_ylim(lat_b.min(), lat_b.max())
+    ax.set_aspect(1 / np.cos(np.radians(plant_lat)))
+    ax.tick_params(labelsize=7)
+
+    cax = fig.add_axes([0.88, 0.2, 0.03, 0.6])
+    fig.colorbar(ScalarMappable(norm=norm, cmap=TOPSIS_CMAP), cax=cax, label='TOPSIS Score')
+    if title:
+        ax.set_title(title, fontsize=11, fontfamily=_FONT or 'sans-serif')
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ext = os.path.splitext(path)[1].lower()
+    pil_kwargs = {'compression': 'tiff_lzw'} if ext in ('.tif', '.tiff') else None
+    fig.savefig(path, dpi=dpi, pil_kwargs=pil_kwargs)
+    return path
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# 저장소 루트 모듈(topsis_engine, mcda, ...)을 그대로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import topsis_engine
+
+
+@pytest.fixture
+def static():
+    """고리 주변 무작위 행정동 200개의 static_criteria() 결과"""
+    rng = np.random.default_rng(0)
+    lat, lon = 35.321499, 129.291612
+    clat = lat + rng.uniform(-1, 1, 200)
+    clon = lon + rng.uniform(-1, 1, 200)
+    return topsis_engine.static_criteria(lat, lon, clat, clon, rng.integers(0, 5000, 200),
+                                         rng.integers(100, 50000, 200))
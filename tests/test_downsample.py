@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import downsample
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    x = np.arange(5000, dtype=float)
+    y = np.sin(x / 200) + rng.normal(0, 0.05, len(x))
+    y[1234] = 10.0   # 스파이크
+    y[3210] = -10.0
+    return x, y
+
+
+def test_lttb_keeps_endpoints_and_count(series):
+    x, y = series
+    idx = downsample.lttb(x, y, 200)
+    assert len(idx) == 200
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert {1234, 3210} <= set(idx.tolist())
+
+
+def test_lttb_short_series_and_small_n(series):
+    x, y = series
+    np.testing.assert_array_equal(downsample.lttb(x[:10], y[:10], 20), np.arange(10))
+    with pytest.raises(ValueError):
+        downsample.lttb(x, y, 2)
+
+
+def test_minmax_keeps_bucket_extremes(series):
+    x, y = series
+    idx = downsample.minmax(x, y, 100)
+    assert len(idx) <= 100
+    assert np.all(np.diff(idx) > 0)
+    assert {int(y.argmax()), int(y.argmin())} <= set(idx.tolist())
+    edges = np.linspace(0, len(y), 51).astype(int)
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        inside = idx[(idx >= lo) & (idx < hi)]
+        assert y[inside].max() == y[lo:hi].max() and y[inside].min() == y[lo:hi].min()
+
+
+def test_downsample_docs_drop_bad_values():
+    docs = [{'time': f'2024-01-01 {h:02d}:00', 'value': str(h)} for h in range(24)]
+    docs[5]['value'] = 'N/A'
+    docs[6]['time'] = None
+    out = downsample.downsample(docs, 10, 'minmax')
+    assert len(out) <= 10
+    assert all(isinstance(d['value'], float) for d in out)
+    assert out[0]['time'] == '2024-01-01 00:00' and out[-1]['time'] == '2024-01-01 23:00'
+    assert downsample.downsample([], 10) == []
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from scipy.spatial import cKDTree
+
+import evacuation
+import shelters
+
+
+def reference_edges(idx, zx, zy, n, exclude):
+    rows, cols, dist = [], [], []
+    for i, (x, y) in enumerate(zip(zx, zy)):
+        d, p = shelters.nearest_positions(idx, x, y, n, exclude)
+        rows.append(np.full(len(p), i))
+        cols.append(p)
+        dist.append(d / 1000)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(dist)
+
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(3)
+    xy = rng.uniform(0, 100_000, (400, 2))
+    return shelters.ShelterIndex(None, None, None, None, xy, cKDTree(xy), None)
+
+
+@pytest.mark.parametrize('n', [1, 5, 30])
+def test_batched_edges_match_per_zone_queries(index, n):
+    rng = np.random.default_rng(4)
+    zx, zy = rng.uniform(0, 100_000, (2, 60))
+    # 한쪽 절반을 제외해 일부 행정동은 k를 늘려 다시 조회하게 함
+    exclude = index.xy[:, 0] < 50_000
+    for ex in (None, exclude):
+        got, want = evacuation.candidate_edges(index, zx, zy, n, ex), reference_edges(index, zx, zy, n, ex)
+        for g, w in zip(got, want):
+            np.testing.assert_allclose(g, w)
+
+
+def test_more_candidates_than_available(index):
+    exclude = np.ones(len(index.xy), dtype=bool)
+    exclude[:3] = False
+    rows, cols, _ = evacuation.candidate_edges(index, np.array([1.0, 2.0]), np.array([1.0, 2.0]), 10, exclude)
+    assert rows.tolist() == [0, 0, 0, 1, 1, 1]
+    assert set(cols.tolist()) == {0, 1, 2}
+
+
+def test_no_zones(index):
+    rows, cols, dist = evacuation.candidate_edges(index, np.empty(0), np.empty(0), 5, None)
+    assert len(rows) == len(cols) == len(dist) == 0
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import map_utils
+import mcda
+
+
+@pytest.fixture
+def crit():
+    rng = np.random.default_rng(2)
+    return rng.uniform(0, 1, (40, 4))
+
+
+def test_vikor_dominant_row_wins():
+    x = np.array([[1.0, 1.0, 1.0], [0.5, 0.2, 0.9], [0.0, 0.0, 0.0]])
+    w = np.full(3, 1 / 3)
+    scores = mcda.vikor(x, w)
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[2] == pytest.approx(0.0)
+    assert scores[0] > scores[1] > scores[2]
+
+
+def test_promethee_net_flows_sum_to_zero(crit):
+    x = mcda.normalize(crit, (True, True, False, False))
+    w = np.full(4, 0.25)
+    phi = mcda.promethee(x, w)
+    assert phi.sum() == pytest.approx(0.0, abs=1e-12)
+    assert np.all(np.abs(phi) <= 1)
+
+
+def test_promethee_blocks_match_single_pass(crit):
+    x = mcda.normalize(crit, (True, True, False, False))
+    w = np.array([0.28, 0.28, 0.22, 0.22])
+    np.testing.assert_allclose(mcda.promethee(x, w, p=0.5, q=0.1, block=3),
+                               mcda.promethee(x, w, p=0.5, q=0.1, block=len(x)), atol=1e-12)
+
+
+def test_evaluate_four_criteria(crit):
+    ranking = mcda.evaluate(crit, map_utils.MCDA_WEIGHTS, map_utils.MCDA_BENEFIT, top_k=5)
+    assert ranking.methods == mcda.METHODS
+    for m in ranking.methods:
+        assert sorted(ranking.ranks[m]) == list(range(1, len(crit) + 1))
+    np.testing.assert_allclose(np.diag(ranking.spearman), 1)
+
+
+def test_evaluate_rejects_weight_mismatch(crit):
+    with pytest.raises(ValueError):
+        mcda.evaluate(crit)
+
+
+def test_mcda_criteria_adds_commercial_index(monkeypatch):
+    scores = pd.DataFrame({'dist_score': [1.0, 0.5], 'cap_pc1': [0.1, 0.2], 'wind_risk': [0.0, 0.3]}, index=[7, 3])
+    gdf = pd.DataFrame({map_utils.GEO_KEY: ['a', 'b', 'c']}, index=[3, 7, 9])
+    monkeypatch.setattr(map_utils, 'plant_geodata', lambda plant: gdf)
+    monkeypatch.setattr(map_utils.poi_context, 'commercial_index',
+                        lambda codes, context: np.array([{'a': 0.9, 'b': 0.4}[c] for c in codes]))
+
+    result = map_utils.ScoreResult('고리', '2024-01-01 00:00', (0, 1, 0.8), scores, ('오전', 'weekday'))
+    names, x, weights, benefit = map_utils.mcda_criteria('고리', result)
+    assert names == map_utils.MCDA_CRITERIA
+    np.testing.assert_array_equal(x[:, 3], [0.4, 0.9])
+    assert len(weights) == len(benefit) == 4
+
+    names, x, _, _ = map_utils.mcda_criteria('고리', result._replace(context=None))
+    assert names == map_utils.MCDA_CRITERIA[:3] and x.shape == (2, 3)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import plume
+
+
+def test_briggs_sigmas_at_one_km():
+    sy, sz = plume.sigma_yz(np.array([1000.0]), 'D')
+    assert sy[0] == pytest.approx(0.08 * 1000 / np.sqrt(1.1))
+    assert sz[0] == pytest.approx(0.06 * 1000 / np.sqrt(1 + 0.0015 * 1000))
+    sy, sz = plume.sigma_yz(np.array([1000.0]), 'A')
+    assert (sy[0], sz[0]) == pytest.approx((0.22 * 1000 / np.sqrt(1.1), 200.0))
+
+
+def test_sigmas_grow_with_distance_and_shrink_with_stability():
+    x = np.array([100.0, 1000.0, 10000.0, 50000.0])
+    prev = None
+    for category in 'ABCDEFG':
+        sy, sz = plume.sigma_yz(x, category)
+        assert np.all(np.diff(sy) > 0) and np.all(np.diff(sz) > 0)
+        if prev is not None:
+            assert np.all(sy < prev[0]) and np.all(sz < prev[1])
+        prev = sy, sz
+
+
+def test_ground_concentration_downwind_and_symmetric():
+    # 서풍(270°)이면 동쪽(dx > 0)이 풍하
+    dx = np.array([5000.0, -5000.0, 5000.0, 5000.0])
+    dy = np.array([0.0, 0.0, 300.0, -300.0])
+    chi = plume.ground_concentration(dx, dy, 270.0, 3.0, 'D')
+    assert chi[0] > 0 and chi[1] == 0
+    assert chi[2] == pytest.approx(chi[3]) and chi[2] < chi[0]
+
+
+def test_calm_uses_minimum_wind_speed():
+    dx, dy = np.array([2000.0]), np.array([0.0])
+    calm = plume.ground_concentration(dx, dy, 0.0, 0.0, 'F')
+    floor = plume.ground_concentration(dx, dy, 0.0, plume.MIN_WIND_SPEED, 'F')
+    np.testing.assert_allclose(calm, floor)
+    assert calm[0] == 0   # 북풍이면 북쪽은 풍상
+    assert plume.ground_concentration(np.array([0.0]), np.array([-2000.0]), 0.0, 0.0, 'F')[0] > 0
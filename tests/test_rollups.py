@@ -0,0 +1,42 @@
+import threading
+
+import rollups
+
+
+def test_single_value_sources_keep_plain_stat_names():
+    group = rollups.hour_pipeline('nuclear_radiation')[2]['$group']
+    assert {'min', 'max', 'sum', 'count'} <= set(group)
+    assert '$mean' not in str(group)
+    assert 'mean' in rollups._finish('nuclear_radiation', 'x')[0]['$set']
+
+
+def test_weather_source_has_stats_per_field():
+    src = rollups.SOURCES['NPP_weather_backup']
+    hour = rollups.hour_pipeline('NPP_weather_backup', '2024-01-01 00:00')
+    day = rollups.day_pipeline('NPP_weather_backup', '2024-01-01 00:00')
+    for f in src.values:
+        for stat in ('min', 'max', 'sum', 'count'):
+            assert f"{f}_{stat}" in hour[2]['$group']
+            assert f"{f}_{stat}" in day[1]['$group']
+        assert f"{f}_mean" in hour[3]['$set']
+    assert 'winddirection' not in src.values
+
+
+def test_refresh_if_stale_runs_once_in_background(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_refresh(db, source):
+        calls.append(source)
+        started.set()
+        release.wait(5)
+
+    monkeypatch.setattr(rollups, 'refresh', slow_refresh)
+    monkeypatch.setattr(rollups, '_last_refresh', {})
+    monkeypatch.setattr(rollups, 'REFRESH_SECONDS', 0)
+    assert rollups.refresh_if_stale(None, 'NPP_weather_backup') is True
+    assert started.wait(5)
+    # 같은 원본 갱신이 도는 동안에는 다시 시작하지 않음
+    assert rollups.refresh_if_stale(None, 'NPP_weather_backup') is False
+    release.set()
+    assert calls == ['NPP_weather_backup']
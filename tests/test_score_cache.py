@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+import map_utils
+
+
+@pytest.fixture
+def scoring(monkeypatch):
+    docs = {}
+    monkeypatch.setattr(map_utils, '_SCORE_CACHE', type(map_utils._SCORE_CACHE)())
+    monkeypatch.setattr(map_utils, '_latest_weather_doc', lambda plant: docs[plant])
+    monkeypatch.setattr(map_utils, 'time_context', lambda: None)
+    monkeypatch.setattr(map_utils, 'score_plant', lambda plant, weather, context: pd.DataFrame({'wd': [weather[0]]}))
+    return docs
+
+
+def cached_times(plant):
+    return [k[1] for k in map_utils._SCORE_CACHE if k[0] == plant]
+
+
+def test_newer_document_replaces_older(scoring):
+    scoring['고리'] = {'time': '2024-01-01 10:00', 'winddirection': 10, 'windspeed': 1}
+    map_utils.get_scores('고리')
+    scoring['고리'] = {'time': '2024-01-01 11:00', 'winddirection': 20, 'windspeed': 1}
+    assert map_utils.get_scores('고리').time == '2024-01-01 11:00'
+    assert cached_times('고리') == ['2024-01-01 11:00']
+
+
+def test_late_older_result_does_not_evict_newer(scoring):
+    scoring['고리'] = {'time': '2024-01-01 11:00', 'winddirection': 20, 'windspeed': 1}
+    map_utils.get_scores('고리')
+    # 오래된 문서를 읽은 느린 요청이 뒤늦게 끝나는 경우
+    scoring['고리'] = {'time': '2024-01-01 10:00', 'winddirection': 10, 'windspeed': 1}
+    result = map_utils.get_scores('고리')
+    assert result.time == '2024-01-01 10:00'
+    assert cached_times('고리') == ['2024-01-01 11:00']
+
+
+def test_other_plants_are_kept(scoring):
+    scoring['고리'] = {'time': '2024-01-01 10:00', 'winddirection': 0, 'windspeed': 0}
+    scoring['한빛'] = {'time': '2024-01-01 09:00', 'winddirection': 0, 'windspeed': 0}
+    map_utils.get_scores('고리')
+    map_utils.get_scores('한빛')
+    assert cached_times('고리') == ['2024-01-01 10:00']
+    assert cached_times('한빛') == ['2024-01-01 09:00']
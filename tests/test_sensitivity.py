@@ -0,0 +1,30 @@
+import numpy as np
+
+import sensitivity
+import topsis_engine
+
+
+def model_of(static):
+    return sensitivity.Model(
+        np.arange(len(static['index'])), np.column_stack([static['dist_score'], static['cap_pc1']]),
+        static['bearing'], static['dist'],
+        np.asarray(topsis_engine.DEFAULT_WEIGHTS), np.asarray(topsis_engine.DEFAULT_BENEFIT),
+        0.05, ['dist_score', 'cap_pc1', 'wind_risk'],
+    )
+
+
+def test_wind_speed_and_stability_do_not_change_scores(static):
+    model = model_of(static)
+    W = np.tile(model.weights, (4, 1))
+    wd = np.full(4, 200.0)
+    scores = sensitivity.score_model(model, W, wd, np.array([0.5, 2.0, 7.0, 15.0]), np.array([0.2, 0.8, 1.2, 1.5]))
+    np.testing.assert_allclose(scores, np.broadcast_to(scores[0], scores.shape), atol=1e-12)
+
+
+def test_sample_inputs_only_vary_direction():
+    rng = np.random.default_rng(0)
+    W, wd, ws, sw = sensitivity.sample_inputs(topsis_engine.DEFAULT_WEIGHTS, (90.0, 3.0, 0.8), 100, rng)
+    assert W.shape == (100, 3)
+    np.testing.assert_allclose(W.sum(axis=1), 1)
+    assert wd.std() > 0 and np.all((wd >= 0) & (wd < 360))
+    assert np.all(ws == 3.0) and np.all(sw == 0.8)
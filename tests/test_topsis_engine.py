@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import topsis_engine
+
+
+def reference_topsis(crit, weights, benefit):
+    x = np.asarray(crit, dtype=float)
+    rng = x.max(axis=0) - x.min(axis=0)
+    v = (x - x.min(axis=0)) / np.where(rng == 0, 1, rng) * weights
+    best = np.where(benefit, v.max(axis=0), v.min(axis=0))
+    worst = np.where(benefit, v.min(axis=0), v.max(axis=0))
+    d_best = np.sqrt(((v - best) ** 2).sum(axis=1))
+    d_worst = np.sqrt(((v - worst) ** 2).sum(axis=1))
+    return d_worst / (d_best + d_worst)
+
+
+def test_topsis_matches_reference():
+    rng = np.random.default_rng(5)
+    crit = rng.uniform(0, 10, (50, 3))
+    np.testing.assert_allclose(topsis_engine.topsis(crit),
+                               reference_topsis(crit, topsis_engine.DEFAULT_WEIGHTS, topsis_engine.DEFAULT_BENEFIT),
+                               atol=1e-12)
+
+
+def test_topsis_ideal_and_anti_ideal():
+    crit = np.array([[1.0, 1.0, 0.0], [0.5, 0.5, 0.5], [0.0, 0.0, 1.0]])
+    scores = topsis_engine.topsis(crit)
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[2] == pytest.approx(0.0)
+    assert scores[1] == pytest.approx(0.5)
+
+
+def test_topsis_constant_matrix_scores_zero():
+    np.testing.assert_array_equal(topsis_engine.topsis(np.ones((4, 3))), np.zeros(4))
+
+
+def test_topsis_batch_matches_single():
+    rng = np.random.default_rng(6)
+    batch = rng.uniform(0, 1, (7, 30, 3))
+    weights = rng.dirichlet(np.ones(3), (7, 1))
+    got = topsis_engine.topsis(batch, weights)
+    for s in range(7):
+        np.testing.assert_allclose(got[s], topsis_engine.topsis(batch[s], weights[s, 0]), atol=1e-12)
+
+
+def test_wind_risk_downwind_only():
+    # 북풍(0°)이면 남쪽(방위 180°)이 풍하
+    risk = topsis_engine.wind_risk(0.0, 4.0, 0.8, np.array([180.0, 90.0, 0.0]), np.zeros(3))
+    np.testing.assert_allclose(risk, [5.0, 0.0, 0.0], atol=1e-12)
+
+
+def test_score_scenarios_match_apply_weather(static):
+    wd, ws, sw = np.array([0.0, 95.0, 271.0]), np.array([2.0, 0.0, 7.5]), np.array([0.8, 1.5, 0.2])
+    batch = topsis_engine.score_scenarios(static, wd, ws, sw)
+    for s in range(3):
+        np.testing.assert_allclose(batch[s], topsis_engine.apply_weather(static, (wd[s], ws[s], sw[s]))['topsis'],
+                                   atol=1e-12)
@@ -0,0 +1,37 @@
+import numpy as np
+
+import topsis_engine
+import topsis_lut
+
+
+def exact(static, weather):
+    return topsis_engine.apply_weather(static, weather)['topsis']
+
+
+def test_lookup_matches_exact_scores(static):
+    table = topsis_lut.build_table(static)
+    assert table.shape == (361, len(static['index']))
+    rng = np.random.default_rng(1)
+    for wd, ws, sw in zip(rng.integers(0, 360, 50), rng.uniform(0.1, 25, 50), rng.choice([0.2, 0.8, 1.5], 50)):
+        weather = (float(wd), float(ws), float(sw))
+        np.testing.assert_allclose(topsis_lut.lookup(table, weather), exact(static, weather), rtol=0, atol=1e-12)
+
+
+def test_lookup_calm_and_north(static):
+    table = topsis_lut.build_table(static)
+    np.testing.assert_allclose(topsis_lut.lookup(table, (123.0, 0.0, 0.8)), exact(static, (123.0, 0.0, 0.8)), atol=1e-12)
+    np.testing.assert_allclose(topsis_lut.lookup(table, (0.0, 3.0, 0.8)), exact(static, (0.0, 3.0, 0.8)), atol=1e-12)
+    np.testing.assert_allclose(topsis_lut.lookup(table, (360.0, 3.0, 0.8)), exact(static, (0.0, 3.0, 0.8)), atol=1e-12)
+
+
+def test_fractional_direction_falls_back(static):
+    table = topsis_lut.build_table(static)
+    assert topsis_lut.lookup(table, (225.5, 3.0, 0.8)) is None
+
+
+def test_load_table_rejects_stale_digest(tmp_path, static):
+    path = str(tmp_path / 'lut.npz')
+    table = topsis_lut.build_table(static)
+    topsis_lut.save_table(path, table, 'abc')
+    assert topsis_lut.load_table(path, 'other') is None
+    np.testing.assert_array_equal(topsis_lut.load_table(path, 'abc'), table)
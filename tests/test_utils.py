@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from werkzeug.datastructures import MultiDict
+
+import utils
+
+
+@pytest.mark.parametrize('t', ['2024-05-01 12:30', datetime(2024, 5, 1, 12, 30, 15, 250000)])
+def test_cursor_round_trip(t):
+    oid = ObjectId()
+    assert utils.decode_cursor(utils.encode_cursor({'time': t, '_id': oid})) == (t, oid)
+
+
+def test_cursor_requires_time():
+    with pytest.raises(ValueError):
+        utils.encode_cursor({'_id': ObjectId()})
+
+
+@pytest.mark.parametrize('token', ['not-a-cursor', 'W10', utils.encode_cursor({'time': 'x', '_id': ObjectId()})[:-4]])
+def test_decode_rejects_bad_tokens(token):
+    with pytest.raises(ValueError):
+        utils.decode_cursor(token)
+
+
+def test_page_args_defaults():
+    assert utils.page_args(MultiDict()) == (None, None, None, False)
+    limit, after, _, paged = utils.page_args(MultiDict({'after': 'abc'}))
+    assert (limit, after, paged) == (utils.DEFAULT_PAGE_LIMIT, 'abc', True)
+    assert utils.DEFAULT_PAGE_LIMIT <= utils.MAX_PAGE_LIMIT
+    assert utils.page_args(MultiDict({'limit': '999999'}))[0] == utils.MAX_PAGE_LIMIT
+
+
+@pytest.mark.parametrize('limit', ['abc', '0', '-3', '1.5'])
+def test_page_args_rejects_bad_limit(limit):
+    with pytest.raises(ValueError):
+        utils.page_args(MultiDict({'limit': limit}))
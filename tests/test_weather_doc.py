@@ -0,0 +1,18 @@
+import map_utils
+
+
+def test_zero_direction_and_speed_are_kept():
+    doc = {'winddirection': 0, 'wind_direction': 270, 'windspeed': 0, 'wind_speed': 5, 'stability': '중립'}
+    wd, ws, _ = map_utils.weather_from_doc(doc)
+    assert (wd, ws) == (0, 0)
+
+
+def test_alternate_field_names():
+    wd, ws, _ = map_utils.weather_from_doc({'wind_direction': 0.0, 'wind_speed': 0.0})
+    assert (wd, ws) == (0.0, 0.0)
+
+
+def test_missing_fields_stay_none():
+    wd, ws, sw = map_utils.weather_from_doc({})
+    assert wd is None and ws is None
+    assert sw == map_utils.stab_map['D']
@@ -0,0 +1,274 @@
+# topsis_engine.py
+# 행정동 중심점 배열과 기상 조건(풍향, 풍속, 안정도 가중치)으로 TOPSIS 점수를 한 번의 배열 연산으로 계산합니다.
+# map_utils(웹 지도/TOP5)와 분석 스크립트가 같은 엔진을 공유합니다.
+
+from functools import lru_cache
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+from sklearn.decomposition import PCA
+
+EARTH_RADIUS_KM = 6371.0
+MAX_DIST_KM = 120          # 평가 반경
+OPT_DIST_KM = 60           # 삼각형 거리 점수의 최적 거리
+DEFAULT_WEIGHTS = (0.34, 0.33, 0.33)   # dist_score, cap_pc1, wind_risk
+DEFAULT_BENEFIT = (True, True, False)  # wind_risk만 비용(작을수록 좋음) 기준
+
+# WGS84 타원체 (geopy.distance.distance와 같은 기준)
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+
+
+# ----------------------------
+# 거리/방위/풍위험 (벡터화)
+# ----------------------------
+def haversine_km(lat, lon, lats, lons):
+    """발전소(lat, lon) → 각 중심점까지 대원 거리(km)"""
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    dphi, dl = phi2 - phi1, np.radians(np.asarray(lons) - lon)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dl / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def bearing_deg(lat, lon, lats, lons):
+    """발전소(lat, lon) → 각 중심점 방위각(0~360°)"""
+    lat1r, lat2r = np.radians(lat), np.radians(lats)
+    dl = np.radians(np.asarray(lons) - lon)
+    x = np.sin(dl) * np.cos(lat2r)
+    y = np.cos(lat1r) * np.sin(lat2r) - np.sin(lat1r) * np.cos(lat2r) * np.cos(dl)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+
+def wind_risk(wd, ws, sw, bearing, dist, alpha=0.05):
+    """풍하 방향 노출 위험: ws*cos(rel)/(1+αd)/sw, 음수는 0"""
+    rel = np.abs((wd + 180) % 360 - bearing)
+    rel = np.where(rel > 180, 360 - rel, rel)
+    return np.maximum(ws * np.cos(np.radians(rel)) / (1 + alpha * dist) / sw, 0)
+
+
+def destination(lat, lon, bearings, dist_km, tol=1e-12, max_iter=20):
+    """
+    (lat, lon)에서 방위각 배열 bearings(°)로 dist_km 떨어진 WGS84 타원체 위 지점 (Vincenty 직접해)
+    반환: (lats, lons) 배열 — geopy distance(...).destination과 mm 단위로 일치
+    """
+    a, f = WGS84_A, WGS84_F
+    b = (1 - f) * a
+    alpha1 = np.radians(np.asarray(bearings, dtype=float))
+    s = dist_km * 1000.0
+    sin_a1, cos_a1 = np.sin(alpha1), np.cos(alpha1)
+    tan_u1 = (1 - f) * np.tan(np.radians(lat))
+    cos_u1 = 1 / np.sqrt(1 + tan_u1 ** 2)
+    sin_u1 = tan_u1 * cos_u1
+    sigma1 = np.arctan2(tan_u1, cos_a1)
+    sin_alpha = cos_u1 * sin_a1
+    cos2_alpha = 1 - sin_alpha ** 2
+    u2 = cos2_alpha * (a * a - b * b) / (b * b)
+    big_a = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    big_b = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+
+    sigma = s / (b * big_a)
+    for _ in range(max_iter):
+        cos_2sm = np.cos(2 * sigma1 + sigma)
+        sin_s, cos_s = np.sin(sigma), np.cos(sigma)
+        d_sigma = big_b * sin_s * (cos_2sm + big_b / 4 * (
+            cos_s * (-1 + 2 * cos_2sm ** 2)
+            - big_b / 6 * cos_2sm * (-3 + 4 * sin_s ** 2) * (-3 + 4 * cos_2sm ** 2)))
+        prev, sigma = sigma, s / (b * big_a) + d_sigma
+        if np.all(np.abs(sigma - prev) < tol):
+            break
+
+    cos_2sm = np.cos(2 * sigma1 + sigma)
+    sin_s, cos_s = np.sin(sigma), np.cos(sigma)
+    tmp = sin_u1 * sin_s - cos_u1 * cos_s * cos_a1
+    lat2 = np.arctan2(sin_u1 * cos_s + cos_u1 * sin_s * cos_a1,
+                      (1 - f) * np.sqrt(sin_alpha ** 2 + tmp ** 2))
+    lam = np.arctan2(sin_s * sin_a1, cos_u1 * cos_s - sin_u1 * sin_s * cos_a1)
+    c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+    big_l = lam - (1 - c) * f * sin_alpha * (
+        sigma + c * sin_s * (cos_2sm + c * cos_s * (-1 + 2 * cos_2sm ** 2)))
+    lon2 = (lon + np.degrees(big_l) + 540) % 360 - 180
+    return np.degrees(lat2), lon2
+
+
+def sector(lat, lon, bearing, width, radius_km=100, points=50):
+    """
+    풍하 섹터 꼭짓점 ((lat, lon), 호 위 points+1개 지점...) — 호 전체를 한 번의 배열 연산으로 계산
+    (위치, 0.1° 단위 방위, 폭, 반경)별로 메모이즈한 tuple을 돌려줌 (공유, 수정 금지)
+    """
+    return _sector(float(lat), float(lon), round(float(bearing) % 360, 1), round(float(width), 3),
+                   float(radius_km), int(points))
+
+
+@lru_cache(maxsize=1024)
+def _sector(lat, lon, bearing, width, radius_km, points):
+    angs = bearing - width / 2 + np.arange(points + 1) * (width / points)
+    lats, lons = destination(lat, lon, angs, radius_km)
+    return ((lat, lon),) + tuple(zip(lats.tolist(), lons.tolist()))
+
+
+def distance_score(dist, opt=OPT_DIST_KM, decay=1):
+    """삼각형 거리 점수: opt까지 증가, 이후 2*opt - decay*d (음수는 0)"""
+    return np.where(dist <= opt, dist, np.maximum(0, 2 * opt - decay * dist))
+
+
+# ----------------------------
+# 정규화 / PCA / TOPSIS
+# ----------------------------
+def minmax(x):
+    """
+    열 단위 Min-Max 정규화 (MinMaxScaler와 동일, 범위 0인 열은 0)
+    x: (n, k) 또는 시나리오 배치 (..., n, k) — 행정동 축(-2) 기준
+    """
+    x = np.asarray(x, dtype=float)
+    lo, hi = x.min(axis=-2, keepdims=True), x.max(axis=-2, keepdims=True)
+    rng = np.where(hi - lo == 0, 1.0, hi - lo)
+    return (x - lo) / rng
+
+
+def cap_pc1(*cols):
+    """표준화한 수용능력 관련 열들의 제1주성분"""
+    cap = np.nan_to_num(np.column_stack(cols).astype(float))
+    return PCA(n_components=1).fit_transform(StandardScaler().fit_transform(cap)).ravel()
+
+
+def topsis(crit, weights=DEFAULT_WEIGHTS, benefit=DEFAULT_BENEFIT):
+    """
+    crit: (n, k) 기준 행렬 또는 시나리오 배치 (..., n, k)
+    weights: (k,) 또는 배치별 (..., 1, k)
+    반환: (n,) 또는 (..., n) TOPSIS 근접도 (d_worst / (d_best + d_worst), 분모 0이면 0)
+    """
+    w = minmax(crit) * np.asarray(weights)
+    benefit = np.asarray(benefit)
+    hi, lo = w.max(axis=-2, keepdims=True), w.min(axis=-2, keepdims=True)
+    best, worst = np.where(benefit, hi, lo), np.where(benefit, lo, hi)
+    d_best = np.sqrt(((w - best) ** 2).sum(axis=-1))
+    d_worst = np.sqrt(((w - worst) ** 2).sum(axis=-1))
+    denom = d_best + d_worst
+    return np.divide(d_worst, denom, out=np.zeros_like(denom), where=denom > 0)
+
+
+# ----------------------------
+# 점수 엔진
+# ----------------------------
+def static_criteria(lat, lon, centroid_lat, centroid_lon, capacity, population, max_dist=MAX_DIST_KM):
+    """
+    기상과 무관한 항목: 반경 내 행정동 위치(index), dist, dist_score, bearing, cap_pc1
+    """
+    dist = haversine_km(lat, lon, centroid_lat, centroid_lon)
+    idx = np.flatnonzero(dist <= max_dist)
+    dist = dist[idx]
+    return {
+        'index':      idx,
+        'dist':       dist,
+        'dist_score': distance_score(dist, decay=2),  # 웹 지도 기존 식(120-2d) 유지
+        'bearing':    bearing_deg(lat, lon, np.asarray(centroid_lat)[idx], np.asarray(centroid_lon)[idx]),
+        'cap_pc1':    cap_pc1(np.asarray(capacity)[idx], np.asarray(population)[idx]),
+    }
+
+
+def score(lat, lon, centroid_lat, centroid_lon, capacity, population, weather,
+          weights=DEFAULT_WEIGHTS, max_dist=MAX_DIST_KM, with_topsis=True):
+    """
+    lat, lon: 발전소 좌표
+    centroid_lat, centroid_lon, capacity, population: 행정동별 배열
+    weather: (풍향°, 풍속 m/s, 안정도 가중치)
+    반환: 반경 내 행정동 위치(index)와 항목별 배열을 담은 dict
+    """
+    static = static_criteria(lat, lon, centroid_lat, centroid_lon, capacity, population, max_dist)
+    return apply_weather(static, weather, weights, with_topsis)
+
+
+def apply_weather(static, weather, weights=DEFAULT_WEIGHTS, with_topsis=True, risk=None):
+    """
+    static_criteria() 결과에 기상 조건을 더해 wind_risk(, topsis)를 채운 새 dict
+    risk: 다른 방식(예: plume.zonal_risk)으로 구한 행정동별 위험도 — 주면 기본 식 대신 사용
+    """
+    wd, ws, sw = weather
+    out = dict(static)
+    out['wind_risk'] = wind_risk(wd, ws, sw, out['bearing'], out['dist']) if risk is None else np.asarray(risk)
+    if with_topsis:
+        crit = np.column_stack([out['dist_score'], out['cap_pc1'], out['wind_risk']])
+        out['topsis'] = topsis(crit, weights)
+    return out
+
+
+# 여러 발전소 동시 사고: 발전소별 위험을 하나로 합치는 방식
+COMBINE = {
+    'max': lambda risk: risk.max(axis=0),   # 최악 발전소 기준
+    'sum': lambda risk: risk.sum(axis=0),   # 발전소별 위험 합
+}
+
+
+def compound_criteria(plants, weathers, centroid_lat, centroid_lon, capacity, population,
+                      combine='max', max_dist=MAX_DIST_KM, alpha=0.05):
+    """
+    plants: (P, 2) 발전소 (lat, lon), weathers: (P, 3) 발전소별 (풍향°, 풍속, 안정도 가중치)
+    발전소 × 행정동 거리/방위/풍위험을 (P, n) 배열 한 번으로 계산하고 combine 방식으로 합침
+    반환: 어느 발전소든 max_dist 안에 드는 행정동의 index, dist(가장 가까운 발전소), dist_score,
+          cap_pc1, wind_risk(합친 값), plant_dist/plant_risk (P, n), nearest (가장 가까운 발전소 위치)
+    """
+    if combine not in COMBINE:
+        raise ValueError(f"Unknown combine '{combine}' (expected one of {sorted(COMBINE)})")
+    plants = np.asarray(plants, dtype=float).reshape(-1, 2)
+    weathers = np.asarray(weathers, dtype=float).reshape(-1, 3)
+    lat, lon = plants[:, :1], plants[:, 1:]
+    clat, clon = np.asarray(centroid_lat, dtype=float), np.asarray(centroid_lon, dtype=float)
+    dist = haversine_km(lat, lon, clat, clon)
+    idx = np.flatnonzero((dist <= max_dist).any(axis=0))
+    dist = dist[:, idx]
+    bearing = bearing_deg(lat, lon, clat[idx], clon[idx])
+    wd, ws, sw = (weathers[:, i:i + 1] for i in range(3))
+    risk = np.where(dist <= max_dist, wind_risk(wd, ws, sw, bearing, dist, alpha), 0.0)
+    nearest = dist.argmin(axis=0)
+    dmin = dist[nearest, np.arange(len(idx))]
+    return {
+        'index':      idx,
+        'dist':       dmin,
+        'dist_score': distance_score(dmin, decay=2),
+        'cap_pc1':    cap_pc1(np.asarray(capacity)[idx], np.asarray(population)[idx]),
+        'wind_risk':  COMBINE[combine](risk),
+        'plant_dist': dist,
+        'plant_risk': risk,
+        'nearest':    nearest,
+    }
+
+
+def score_compound(plants, weathers, centroid_lat, centroid_lon, capacity, population,
+                   combine='max', weights=DEFAULT_WEIGHTS, max_dist=MAX_DIST_KM):
+    """compound_criteria() 결과에 TOPSIS 점수(topsis)를 더한 dict"""
+    out = compound_criteria(plants, weathers, centroid_lat, centroid_lon, capacity, population,
+                            combine, max_dist)
+    crit = np.column_stack([out['dist_score'], out['cap_pc1'], out['wind_risk']])
+    out['topsis'] = topsis(crit, weights)
+    return out
+
+
+def score_scenarios(static, wd, ws, sw, weights=DEFAULT_WEIGHTS, chunk=512):
+    """
+    static: static_criteria() 결과
+    wd, ws, sw: 길이 S의 시나리오 배열 (풍향°, 풍속, 안정도 가중치)
+    weights: (k,) 공통 가중치 또는 시나리오별 (S, k)
+    반환: (S, n) TOPSIS 점수 — chunk개 시나리오씩 (chunk, n, 3) 텐서로 계산
+    """
+    fixed = np.column_stack([static['dist_score'], static['cap_pc1']])
+    return score_samples(fixed, static['bearing'], static['dist'], wd, ws, sw, weights, DEFAULT_BENEFIT, chunk=chunk)
+
+
+def score_samples(fixed, bearing, dist, wd, ws, sw, weights, benefit, alpha=0.05, chunk=512):
+    """
+    fixed: (n, k-1) 기상과 무관한 기준 열 (wind_risk는 마지막 열로 붙음)
+    bearing, dist: (n,) 발전소 → 행정동 방위/거리
+    wd, ws, sw: 길이 S의 시나리오 배열, weights: (k,) 또는 (S, k), benefit: (k,)
+    반환: (S, n) TOPSIS 점수
+    """
+    wd, ws, sw = (np.atleast_1d(np.asarray(v, dtype=float)) for v in (wd, ws, sw))
+    fixed = np.asarray(fixed, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    n, kf = fixed.shape
+    out = np.empty((len(wd), n))
+    for s in range(0, len(wd), chunk):
+        e = s + chunk
+        risk = wind_risk(wd[s:e, None], ws[s:e, None], sw[s:e, None], bearing, dist, alpha)
+        crit = np.concatenate([np.broadcast_to(fixed, (len(risk), n, kf)), risk[..., None]], axis=-1)
+        w = weights[s:e, None, :] if weights.ndim == 2 else weights
+        out[s:e] = topsis(crit, w, benefit)
+    return out
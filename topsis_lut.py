@@ -0,0 +1,90 @@
+# topsis_lut.py
+# 발전소별로 풍향 1°마다(360행) + 무풍 1행의 정확한 TOPSIS 점수를 미리 계산해 .npz로 저장합니다.
+# 실시간 요청은 보간 없이 행 하나를 꺼내기만 합니다.
+#
+# 풍속·안정도 축이 필요 없는 이유: 풍속 > 0이면 wind_risk = (ws / sw) × g(풍향, 방위, 거리)로
+# 양의 배율만 다르고, TOPSIS의 열별 Min-Max가 그 배율을 지우므로 점수는 풍향에만 의존합니다.
+# 풍속 0이면 wind_risk가 모두 0(상수 열)이라 풍향과도 무관한 한 행입니다.
+# 풍향이 정수(°)가 아니면 표를 쓰지 않고(None) map_utils가 정확히 계산합니다 — 표를 쓰든 안 쓰든 결과는 같습니다.
+# POI 파일(poi_context.POI_PATH)이 있으면 시간 맥락별 동적인구 기준으로 맥락마다 표를 만듭니다.
+#
+# 표 만들기(배포 시/행정동 데이터 변경 시):  python topsis_lut.py
+
+import os
+import time
+import hashlib
+import numpy as np
+import topsis_engine
+
+LUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache', 'lut')
+
+DIRECTIONS = np.arange(360, dtype=float)               # 풍향(°) 1° 간격, 행 번호 = 풍향
+CALM_ROW = len(DIRECTIONS)                             # 마지막 행: 무풍(ws = 0)
+
+
+def static_digest(static, weights=topsis_engine.DEFAULT_WEIGHTS):
+    """표가 유효한지 확인하는 키: 정적 기준 배열과 가중치의 해시"""
+    h = hashlib.sha256()
+    for k in ('index', 'dist', 'dist_score', 'bearing', 'cap_pc1'):
+        h.update(np.ascontiguousarray(static[k]).tobytes())
+    h.update(np.asarray(weights, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def build_table(static, weights=topsis_engine.DEFAULT_WEIGHTS):
+    """
+    static: topsis_engine.static_criteria() 결과
+    반환: (361, 행정동) float64 점수 — 0~359행은 풍향 d°(풍속 1, 안정도 가중치 1), 360행은 무풍
+    """
+    wd = np.append(DIRECTIONS, 0.0)
+    ws = np.append(np.ones(len(DIRECTIONS)), 0.0)
+    return topsis_engine.score_scenarios(static, wd, ws, np.ones(len(wd)), weights)
+
+
+def save_table(path, table, digest):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp, table=table, digest=np.array(digest))
+    os.replace(tmp, path)
+
+
+def load_table(path, digest):
+    """저장된 표의 digest가 일치하면 (361, n) 배열, 없거나 오래되었으면(이전 형식 포함) None"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as z:
+        if str(z['digest']) != digest or z['table'].shape[0] != CALM_ROW + 1:
+            return None
+        return z['table']
+
+
+def lookup(table, weather):
+    """
+    weather: (풍향°, 풍속, 안정도 가중치)
+    반환: (n,) 정확한 TOPSIS 점수 — 풍향이 정수가 아니면 None (호출 측에서 직접 계산)
+    """
+    wd, ws, sw = weather
+    if ws <= 0:
+        return table[CALM_ROW]
+    if wd != round(wd):
+        return None
+    return table[int(round(wd)) % 360]
+
+
+def main():
+    from map_utils import power_plants, mapping_codes, plant_static, lut_path, time_context
+    import poi_context
+    # POI 파일이 있으면 시간 맥락(12가지)마다, 없으면 정적 인구 기준 표 하나
+    contexts = poi_context.CONTEXTS if time_context() is not None else [None]
+    for plant in power_plants:
+        for context in contexts:
+            t = time.perf_counter()
+            static = plant_static(plant, context)
+            table = build_table(static)
+            path = lut_path(plant, context)
+            save_table(path, table, static_digest(static))
+            print(f"{plant}({mapping_codes[plant]}) {context or ''}: {table.shape} → {path} "
+                  f"({os.path.getsize(path) / 1024:.0f} KB, {time.perf_counter() - t:.2f}s)")
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
 # utils.py
 
 from flask import Response
-import csv, io
+import csv, io, re, json, base64
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
 from pymongo import DESCENDING
 
 def export_csv(collection, filename, header, fields, query=None, sort=None):
@@ -46,3 +49,93 @@ def upload_csv(collection, file, field_map):
     if docs:
         collection.insert_many(docs)
     return "Upload successful", 200
+
+
+# ----------------------------
+# 시계열 목록 API: time 기준 키셋 페이지네이션 + 필드 투영
+# ----------------------------
+MAX_PAGE_LIMIT = 5000
+DEFAULT_PAGE_LIMIT = 500   # after만 주고 limit을 생략했을 때
+_FIELD_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def parse_fields(text):
+    """'time,value' → ['time', 'value'] (없으면 None, 이름이 아닌 값은 ValueError)"""
+    if not text:
+        return None
+    fields = [f.strip() for f in text.split(',') if f.strip()]
+    bad = [f for f in fields if not _FIELD_RE.match(f)]
+    if bad:
+        raise ValueError(f"Invalid field name(s): {bad}")
+    return fields
+
+def encode_cursor(doc):
+    """마지막 문서의 (time, _id) → URL 안전 토큰 (time이 없으면 ValueError, datetime은 {'$date': ISO 문자열})"""
+    t = doc.get('time')
+    if t is None:
+        raise ValueError(f"Cannot page past a document without 'time' (_id={doc.get('_id')})")
+    if isinstance(t, datetime):
+        t = {'$date': t.isoformat()}
+    raw = json.dumps([t, str(doc['_id'])], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """encode_cursor() 토큰 → (time, ObjectId), 잘못된 토큰은 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        t, oid = json.loads(raw)
+        if isinstance(t, dict):
+            t = datetime.fromisoformat(t['$date'])
+        return t, ObjectId(oid)
+    except (ValueError, TypeError, KeyError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+def keyset_page(collection, query, direction=DESCENDING, limit=None, after=None, fields=None, with_id=False):
+    """
+    (time, _id) 순서로 정렬한 query 결과 중 after 토큰 다음부터 limit개
+    fields: 돌려줄 필드 목록 (None이면 전체), _id는 fields에 있거나 with_id일 때만 문자열로 포함
+    반환: (문서 목록, 다음 페이지 토큰 또는 None) — limit이 없으면 전체와 None
+    페이지 모드(limit/after)에서는 time이 없는 문서는 커서로 가리킬 수 없으므로 제외
+    """
+    query = dict(query)
+    if limit or after:
+        query = {'$and': [query, {'time': {'$ne': None}}]}
+    if after:
+        t, oid = decode_cursor(after)
+        op = '$lt' if direction == DESCENDING else '$gt'
+        query = {'$and': [query, {'$or': [{'time': {op: t}}, {'time': t, '_id': {op: oid}}]}]}
+    projection = None if fields is None else {f: 1 for f in set(fields) | {'time'}}
+    cursor = collection.find(query, projection).sort([('time', direction), ('_id', direction)])
+    if limit:
+        cursor = cursor.limit(min(limit, MAX_PAGE_LIMIT) + 1)
+    docs = list(cursor)
+    token = None
+    if limit and len(docs) > min(limit, MAX_PAGE_LIMIT):
+        docs = docs[:min(limit, MAX_PAGE_LIMIT)]
+        token = encode_cursor(docs[-1])
+    keep_id = with_id if fields is None else '_id' in fields
+    keep_time = fields is None or 'time' in fields
+    for doc in docs:
+        oid = doc.pop('_id', None)
+        if keep_id:
+            doc['_id'] = str(oid)
+        if not keep_time:
+            doc.pop('time', None)
+    return docs, token
+
+def page_args(args):
+    """
+    request.args → (limit, after, fields, 페이지 모드 여부) — 잘못된 값은 ValueError
+    페이지 모드에서 limit을 생략하면 DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT보다 크면 MAX_PAGE_LIMIT
+    """
+    limit, after = args.get('limit'), args.get('after')
+    paged = limit is not None or after is not None
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be a positive integer") from None
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+    elif paged:
+        limit = DEFAULT_PAGE_LIMIT
+    return (min(limit, MAX_PAGE_LIMIT) if limit else None), after, parse_fields(args.get('fields')), paged